@@ -2,15 +2,17 @@
 FastAPI backend application for job management.
 Provides REST API endpoints for video generation jobs.
 """
+import asyncio
 import base64
+import hashlib
 import json
 import uuid
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import redis
 from rq import Queue
@@ -19,8 +21,12 @@ from rq.job import Job
 from config import settings, VideoConfig, init_storage
 from backend.models import (
     JobCreateRequest, JobCreateResponse, JobStatusResponse,
-    JobResultResponse, JobStatus, ErrorResponse
+    JobResultResponse, JobStatus, JobCancelResponse, ErrorResponse
 )
+from backend.delivery import build_video_response
+from backend.ingest import ingest_image, INPUT_EXTENSION
+from storage import get_storage_manager
+from worker.scheduling import enqueue_generation, estimate_job_cost, select_queue_name
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -46,6 +52,9 @@ redis_client = redis.Redis(
     decode_responses=False
 )
 
+# Artifact index for hot/archive storage tiering
+storage_manager = get_storage_manager(redis_client)
+
 # RQ Queue for job processing
 # Note: default_timeout removed for Windows compatibility (no SIGALRM support)
 job_queue = Queue(
@@ -53,13 +62,39 @@ job_queue = Queue(
     connection=redis_client
 )
 
+# Short jobs (by predicted cost) go here; workers drain it first
+priority_queue = Queue(
+    name=settings.worker_priority_queue_name,
+    connection=redis_client
+)
+
+
+def queued_jobs_count() -> int:
+    """Total number of jobs waiting in both queues."""
+    return len(priority_queue) + len(job_queue)
+
+
+async def reap_expired_artifacts():
+    """Periodically delete input/output files whose lifetime has ended."""
+    while True:
+        try:
+            await asyncio.to_thread(storage_manager.reap_expired)
+        except Exception as e:
+            print(f"[STORAGE] Artifact reaper failed: {e}")
+        await asyncio.sleep(settings.storage_reaper_interval)
+
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize storage directories on startup."""
+    """Initialize storage directories and start the artifact reaper on startup."""
     init_storage()
     print("[OK] FastAPI backend started")
     print(f"[STORAGE] Initialized at {settings.storage_hot_path}")
+    print(f"[DOWNLOAD] Offload mode: {settings.download_offload_mode}")
+    
+    if settings.artifact_ttl > 0:
+        app.state.reaper_task = asyncio.create_task(reap_expired_artifacts())
+        print(f"[STORAGE] Artifact reaper running every {settings.storage_reaper_interval}s")
 
 
 @app.get("/")
@@ -72,7 +107,8 @@ async def root():
         "endpoints": {
             "create_job": "/job/create",
             "job_status": "/job/status/{job_id}",
-            "job_result": "/job/result/{job_id}"
+            "job_result": "/job/result/{job_id}",
+            "job_cancel": "/job/cancel/{job_id}"
         }
     }
 
@@ -83,13 +119,16 @@ async def health_check():
     try:
         # Check Redis connection
         redis_client.ping()
-        queue_length = len(job_queue)
+        queue_length = queued_jobs_count()
+        # Model load time of the most recent cold worker
+        cold_start = redis_client.get("worker:cold_start")
         
         return {
             "status": "healthy",
             "redis": "connected",
             "queue_length": queue_length,
-            "max_queue_size": VideoConfig.MAX_QUEUE_SIZE
+            "max_queue_size": VideoConfig.MAX_QUEUE_SIZE,
+            "model_cold_start": json.loads(cold_start) if cold_start else None
         }
     except Exception as e:
         return JSONResponse(
@@ -111,7 +150,7 @@ async def create_job(request: JobCreateRequest):
     """
     try:
         # Check queue limit
-        current_queue_size = len(job_queue)
+        current_queue_size = queued_jobs_count()
         if current_queue_size >= VideoConfig.MAX_QUEUE_SIZE:
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
@@ -128,20 +167,46 @@ async def create_job(request: JobCreateRequest):
         # Generate unique job ID
         job_id = str(uuid.uuid4())
         
-        # Save image to temporary storage
-        image_filename = f"{job_id}_input.png"
+        # Validate, decode, scale and crop the image to the requested resolution
+        # once here, so bad uploads never reach the queue and the worker gets
+        # an already-normalized input
+        image_filename = f"{job_id}_input.{INPUT_EXTENSION}"
         image_path = settings.storage_hot_path / image_filename
+        target_size = VideoConfig.RESOLUTIONS[request.resolution.value]
+        
+        # Reject oversized payloads before decoding base64
+        if len(request.image_data) * 3 // 4 > settings.ingest_max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Image too large. Maximum {settings.ingest_max_bytes} bytes allowed."
+            )
         
         try:
-            image_bytes = base64.b64decode(request.image_data)
-            with open(image_path, "wb") as f:
-                f.write(image_bytes)
+            image_bytes = base64.b64decode(request.image_data, validate=True)
+            await ingest_image(image_bytes, target_size, image_path)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid image data: {str(e)}"
             )
         
+        storage_manager.register(image_path)
+        
+        # Hash of the request; the worker adds the seed it rendered with, so
+        # only the same video (e.g. "Send again") reuses a delivered file_id
+        render_params = {
+            "duration": request.duration,
+            "resolution": request.resolution.value,
+            "motion_preset": request.motion_preset.value,
+            "visual_style": request.visual_style.value if request.visual_style else "none",
+            "quality_mode": request.quality_mode.value if request.quality_mode else "standard",
+            "user_prompt": request.user_prompt or "",
+            "custom_fps": request.custom_fps,
+            "custom_steps": request.custom_steps,
+        }
+        content_hash = hashlib.sha256(image_bytes)
+        content_hash.update(json.dumps(render_params, sort_keys=True).encode("utf-8"))
+        
         # Prepare job metadata with new fields
         job_metadata = {
             "job_id": job_id,
@@ -155,10 +220,16 @@ async def create_job(request: JobCreateRequest):
             "user_prompt": request.user_prompt or "",
             "custom_fps": request.custom_fps,
             "custom_steps": request.custom_steps,
+            "content_hash": content_hash.hexdigest(),
             "created_at": datetime.utcnow().isoformat(),
             "status": JobStatus.QUEUED.value
         }
         
+        # Route by predicted GPU time so short jobs don't wait behind long ones
+        predicted_cost = estimate_job_cost(job_metadata)
+        job_metadata["predicted_cost"] = round(predicted_cost, 1)
+        queue = Queue(select_queue_name(predicted_cost), connection=redis_client)
+        
         # Store job metadata in Redis
         redis_client.set(
             f"job:{job_id}:metadata",
@@ -167,21 +238,16 @@ async def create_job(request: JobCreateRequest):
         )
         
         # Enqueue job for processing
-        # Use string path to avoid importing heavy ML libraries in backend
-        # Note: job_timeout is not supported by SimpleWorker on Windows
-        # But we set result_ttl to keep results longer
-        rq_job = job_queue.enqueue(
-            'worker.tasks.process_video_generation',
-            job_id,  # Pass as positional argument
-            result_ttl=3600,  # Keep result for 1 hour
-            job_timeout=settings.worker_timeout  # Worker timeout from settings
-        )
+        rq_job = enqueue_generation(queue, job_id)
         
         # Store RQ job ID
         redis_client.set(f"job:{job_id}:rq_id", rq_job.id, ex=86400)
         
         # Calculate queue position and estimated time
-        queue_position = current_queue_size + 1
+        if queue.name == priority_queue.name:
+            queue_position = len(priority_queue)
+        else:
+            queue_position = current_queue_size + 1
         estimated_time = queue_position * 60  # Rough estimate: 60s per job
         
         return JobCreateResponse(
@@ -230,15 +296,23 @@ async def get_job_status(job_id: str):
         queue_position = None
         progress = None
         
-        if rq_job_id:
+        # A cancelled job finishes normally in RQ - keep the recorded status
+        if rq_job_id and metadata.get("status") != JobStatus.CANCELLED.value:
             try:
                 rq_job = Job.fetch(rq_job_id.decode('utf-8'), connection=redis_client)
                 
                 # Determine status from RQ job
-                if rq_job.is_queued:
+                if rq_job.is_canceled:
+                    metadata["status"] = JobStatus.CANCELLED.value
+                elif rq_job.is_queued:
                     metadata["status"] = JobStatus.QUEUED.value
-                    # Calculate queue position
-                    queue_position = job_queue.get_job_position(rq_job.id)
+                    # Calculate queue position (priority jobs run first)
+                    if rq_job.origin == priority_queue.name:
+                        queue_position = priority_queue.get_job_position(rq_job.id)
+                    else:
+                        queue_position = job_queue.get_job_position(rq_job.id)
+                        if queue_position is not None:
+                            queue_position += len(priority_queue)
                     if queue_position is not None:
                         queue_position += 1
                 elif rq_job.is_started:
@@ -264,7 +338,8 @@ async def get_job_status(job_id: str):
             created_at=datetime.fromisoformat(metadata["created_at"]),
             started_at=datetime.fromisoformat(metadata["started_at"]) if metadata.get("started_at") else None,
             completed_at=datetime.fromisoformat(metadata["completed_at"]) if metadata.get("completed_at") else None,
-            error=metadata.get("error")
+            error=metadata.get("error"),
+            preview_url=f"/job/preview/{job_id}" if metadata.get("preview_path") else None
         )
         
     except HTTPException:
@@ -276,6 +351,82 @@ async def get_job_status(job_id: str):
         )
 
 
+@app.post("/job/cancel/{job_id}", response_model=JobCancelResponse)
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued or running job.
+    
+    Queued jobs are removed from the queue immediately. Running jobs get a
+    cancel flag that the worker checks at every denoising step, so the GPU
+    is freed at the next step boundary.
+    
+    Args:
+        job_id: Unique job identifier
+        
+    Returns:
+        Cancellation result with the job status
+    """
+    try:
+        metadata_key = f"job:{job_id}:metadata"
+        metadata_json = redis_client.get(metadata_key)
+        
+        if not metadata_json:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
+            )
+        
+        metadata = json.loads(metadata_json)
+        finished = (JobStatus.COMPLETED.value, JobStatus.FAILED.value, JobStatus.CANCELLED.value)
+        if metadata.get("status") in finished:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Job already {metadata['status']}"
+            )
+        
+        # Flag first, so a worker picking the job up right now still sees it
+        redis_client.set(f"job:{job_id}:cancel", 1, ex=86400)
+        
+        removed = False
+        rq_job_id = redis_client.get(f"job:{job_id}:rq_id")
+        if rq_job_id:
+            rq_job_id = rq_job_id.decode('utf-8')
+            # LREM is atomic: either we take the job off the queue or a worker already has it
+            removed = (priority_queue.remove(rq_job_id) + job_queue.remove(rq_job_id)) > 0
+            if removed:
+                try:
+                    Job.fetch(rq_job_id, connection=redis_client).cancel()
+                except Exception as e:
+                    print(f"Error marking RQ job cancelled: {e}")
+        
+        if not removed:
+            return JobCancelResponse(
+                job_id=job_id,
+                status=JobStatus.PROCESSING,
+                message="Cancellation requested, stopping at the next step"
+            )
+        
+        metadata["status"] = JobStatus.CANCELLED.value
+        metadata["message"] = "Cancelled while queued"
+        metadata["completed_at"] = datetime.utcnow().isoformat()
+        redis_client.set(metadata_key, json.dumps(metadata), ex=86400)
+        storage_manager.delete(metadata["image_path"])
+        
+        return JobCancelResponse(
+            job_id=job_id,
+            status=JobStatus.CANCELLED,
+            message="Job removed from queue"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to cancel job: {str(e)}"
+        )
+
+
 @app.get("/job/result/{job_id}", response_model=JobResultResponse)
 async def get_job_result(job_id: str):
     """
@@ -310,8 +461,10 @@ async def get_job_result(job_id: str):
                 completed_at=None
             )
         
-        # Get video file path
+        # Get video file path (may have been moved to archive storage)
         video_path = metadata.get("video_path")
+        if video_path:
+            video_path = str(storage_manager.locate(video_path))
         if not video_path or not Path(video_path).exists():
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -320,6 +473,7 @@ async def get_job_result(job_id: str):
         
         # Get file size
         file_size = Path(video_path).stat().st_size
+        storage_manager.touch(video_path)
         
         return JobResultResponse(
             job_id=job_id,
@@ -331,7 +485,9 @@ async def get_job_result(job_id: str):
             motion_preset=metadata.get("motion_preset"),
             created_at=datetime.fromisoformat(metadata["created_at"]),
             completed_at=datetime.fromisoformat(metadata["completed_at"]) if metadata.get("completed_at") else None,
-            file_size=file_size
+            file_size=file_size,
+            content_hash=metadata.get("content_hash"),
+            degradation=metadata.get("degradation")
         )
         
     except HTTPException:
@@ -343,13 +499,18 @@ async def get_job_result(job_id: str):
         )
 
 
-@app.get("/job/download/{job_id}")
-async def download_video(job_id: str):
+@app.api_route("/job/download/{job_id}", methods=["GET", "HEAD"])
+async def download_video(job_id: str, request: Request):
     """
     Download the generated video file.
     
+    Supports Range requests, ETags and conditional GETs. With
+    DOWNLOAD_OFFLOAD_MODE set, the bytes are served by the fronting
+    web server via X-Accel-Redirect / X-Sendfile.
+    
     Args:
         job_id: Unique job identifier
+        request: Incoming request (for Range and conditional headers)
         
     Returns:
         Video file as downloadable content
@@ -374,26 +535,74 @@ async def download_video(job_id: str):
                 detail="Job not completed yet"
             )
         
-        # Get video file path
+        # Get video file path (existence is checked by the single stat in build_video_response)
         video_path = metadata.get("video_path")
-        if not video_path or not Path(video_path).exists():
+        try:
+            if not video_path:
+                raise FileNotFoundError(video_path)
+            video_path = storage_manager.locate(video_path)
+            response = build_video_response(request, video_path, f"video_{job_id}.mp4")
+            storage_manager.touch(video_path)
+            return response
+        except FileNotFoundError:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Video file not found"
             )
         
-        return FileResponse(
-            path=video_path,
-            media_type="video/mp4",
-            filename=f"video_{job_id}.mp4"
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to download video: {str(e)}"
         )
+
+
+@app.api_route("/job/preview/{job_id}", methods=["GET", "HEAD"])
+async def download_preview(job_id: str, request: Request):
+    """
+    Download the draft clip of a job.
+    
+    The draft is published while the final render is still running.
+    
+    Args:
+        job_id: Unique job identifier
+        request: Incoming request (for Range and conditional headers)
+        
+    Returns:
+        Preview video file
+    """
+    try:
+        metadata_json = redis_client.get(f"job:{job_id}:metadata")
+        
+        if not metadata_json:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
+            )
+        
+        metadata = json.loads(metadata_json)
+        preview_path = metadata.get("preview_path")
+        try:
+            if not preview_path:
+                raise FileNotFoundError(preview_path)
+            preview_path = storage_manager.locate(preview_path)
+            response = build_video_response(request, preview_path, f"preview_{job_id}.mp4")
+            storage_manager.touch(preview_path)
+            return response
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Preview not available"
+            )
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to download video: {str(e)}"
+            detail=f"Failed to download preview: {str(e)}"
         )
 
 
@@ -0,0 +1,240 @@
+"""
+Video file delivery helpers for the download endpoint.
+Handles conditional GETs, HTTP Range requests and offloading the transfer
+to a fronting web server (nginx X-Accel-Redirect / Apache X-Sendfile).
+"""
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from config import settings
+
+# Read size for streaming ranges through Python
+CHUNK_SIZE = 256 * 1024
+
+OFFLOAD_MODES = ("none", "x-accel-redirect", "x-sendfile")
+
+# Checked at import, so a typo stops the API at startup instead of quietly
+# serving every download through Python
+if settings.download_offload_mode not in OFFLOAD_MODES:
+    raise ValueError(f"Unknown DOWNLOAD_OFFLOAD_MODE '{settings.download_offload_mode}'. "
+                     f"Available: {', '.join(OFFLOAD_MODES)}")
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header does not overlap the file."""
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """
+    Build a strong ETag from file modification time and size.
+
+    Args:
+        stat_result: Result of os.stat for the file
+
+    Returns:
+        Quoted ETag value
+    """
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """
+    Check conditional GET headers against the current file version.
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110).
+
+    Args:
+        request: Incoming request
+        etag: Current ETag of the file
+        mtime: File modification time (seconds since epoch)
+
+    Returns:
+        True if a 304 Not Modified response should be sent
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+
+def parse_range(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range "bytes=" Range header.
+
+    Multi-range and malformed headers are ignored (the full file is sent),
+    as RFC 9110 allows.
+
+    Args:
+        range_header: Value of the Range header
+        file_size: Size of the file in bytes
+
+    Returns:
+        Inclusive (start, end) byte positions, or None to send the full file
+
+    Raises:
+        RangeNotSatisfiable: If the range starts beyond the end of the file
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    start_str, sep, end_str = spec.strip().partition("-")
+    if not sep:
+        return None
+
+    try:
+        if not start_str:
+            # Suffix range: last N bytes
+            length = int(end_str)
+            if length <= 0 or file_size == 0:
+                raise RangeNotSatisfiable()
+            return max(file_size - length, 0), file_size - 1
+
+        start = int(start_str)
+        end = int(end_str) if end_str else file_size - 1
+    except ValueError:
+        return None
+
+    if end_str and start > end:
+        return None
+    if start >= file_size:
+        raise RangeNotSatisfiable()
+
+    return start, min(end, file_size - 1)
+
+
+def iter_file_range(path: Path, start: int, end: int) -> Iterator[bytes]:
+    """
+    Yield the inclusive byte range [start, end] of a file in chunks.
+
+    Args:
+        path: File to read
+        start: First byte position
+        end: Last byte position
+    """
+    remaining = end - start + 1
+    with open(path, "rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def offload_headers(path: Path) -> Optional[dict]:
+    """
+    Build the header handing the transfer over to the fronting web server.
+
+    Args:
+        path: Video file on disk
+
+    Returns:
+        Offload header dict, or None if offload is disabled or the file is
+        outside the storage mapped for nginx
+    """
+    mode = settings.download_offload_mode
+
+    if mode == "x-sendfile":
+        return {"X-Sendfile": str(path.resolve())}
+
+    if mode == "x-accel-redirect":
+        locations = [
+            (settings.storage_hot_path, settings.download_offload_prefix),
+            (settings.storage_archive_path, settings.download_offload_archive_prefix),
+        ]
+        for root, prefix in locations:
+            try:
+                relative = path.resolve().relative_to(root.resolve())
+            except ValueError:
+                continue
+            return {"X-Accel-Redirect": f"{prefix.rstrip('/')}/{quote(relative.as_posix())}"}
+
+    return None
+
+
+def build_video_response(request: Request, path: Path, filename: str,
+                         media_type: str = "video/mp4") -> Response:
+    """
+    Build the download response for a video file.
+
+    Answers conditional GETs with 304, then either offloads the transfer to
+    the fronting web server (which handles Range itself) or streams the
+    requested byte range through Python.
+
+    Args:
+        request: Incoming request
+        path: Video file on disk
+        filename: Download file name for Content-Disposition
+        media_type: Content type of the file
+
+    Returns:
+        Response object
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    stat_result = os.stat(path)
+    file_size = stat_result.st_size
+    etag = file_etag(stat_result)
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename=\"{filename}\"",
+    }
+
+    if is_not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    offload = offload_headers(path)
+    if offload:
+        # Video bytes never pass through the uvicorn worker
+        headers.update(offload)
+        return Response(status_code=200, headers=headers, media_type=media_type)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, file_size)
+        except RangeNotSatisfiable:
+            headers["Content-Range"] = f"bytes */{file_size}"
+            return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        start, end, status_code = 0, file_size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+    return StreamingResponse(
+        iter_file_range(path, start, end),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type
+    )
@@ -15,6 +15,7 @@ class JobStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     TIMEOUT = "timeout"
+    CANCELLED = "cancelled"
 
 
 class ResolutionEnum(str, Enum):
@@ -103,6 +104,7 @@ class JobStatusResponse(BaseModel):
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     error: Optional[str] = None
+    preview_url: Optional[str] = Field(None, description="Draft clip URL, available before the final video")
 
 
 class JobResultResponse(BaseModel):
@@ -117,6 +119,15 @@ class JobResultResponse(BaseModel):
     created_at: datetime
     completed_at: Optional[datetime] = None
     file_size: Optional[int] = None
+    content_hash: Optional[str] = Field(None, description="Hash of input image, render parameters and seed")
+    degradation: Optional[dict] = Field(None, description="Quality reductions applied under load, if any")
+
+
+class JobCancelResponse(BaseModel):
+    """Response model for job cancellation."""
+    job_id: str
+    status: JobStatus = Field(..., description="Job status after the cancel request")
+    message: str
 
 
 class ErrorResponse(BaseModel):
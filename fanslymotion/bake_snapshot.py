@@ -0,0 +1,53 @@
+"""
+Bake the SVD pipeline into a local safetensors snapshot.
+
+Loads the model once from the Hugging Face cache and writes every
+component as a single safetensors file in the dtype the worker runs in,
+so workers load it in seconds without touching the hub cache. Run it
+once per model version; workers pick the snapshot up from
+SVD_SNAPSHOT_PATH automatically.
+
+Usage:
+    python bake_snapshot.py
+    python bake_snapshot.py --dtype float32 --output ./cache/snapshot_cpu
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import torch
+from diffusers import StableVideoDiffusionPipeline
+
+from config import settings
+from svd.snapshot import DTYPES, bake_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bake a local SVD model snapshot")
+    parser.add_argument("--model-id", default=settings.svd_model_id)
+    parser.add_argument("--output", type=Path, default=settings.svd_snapshot_path)
+    parser.add_argument("--dtype", choices=list(DTYPES),
+                        default="float16" if torch.cuda.is_available() else "float32",
+                        help="Dtype of the worker that loads the snapshot (float16 on GPU, float32 on CPU)")
+    args = parser.parse_args()
+
+    dtype = DTYPES[args.dtype]
+    print(f"[BAKE] Loading {args.model_id} ({args.dtype})...")
+    started = time.perf_counter()
+    pipeline = StableVideoDiffusionPipeline.from_pretrained(
+        args.model_id,
+        cache_dir=settings.svd_model_cache,
+        torch_dtype=dtype,
+        variant="fp16" if dtype == torch.float16 else None,
+    )
+    print(f"[BAKE] Loaded from hub cache in {time.perf_counter() - started:.1f}s")
+
+    print(f"[BAKE] Writing snapshot to {args.output}...")
+    manifest = bake_snapshot(pipeline, args.output, args.model_id)
+    print(f"[BAKE] Done: {manifest['size_bytes'] / 1024**3:.2f}GB, {manifest['dtype']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark the compiled UNet against the eager UNet.
+
+Times one UNet forward pass per shape with the eager module and with the
+torch.compile'd module (after its compile pass). Runs on the CPU backend
+too, with small shapes, so compiled mode can be evaluated without a GPU.
+
+Usage:
+    python benchmark_compile.py
+    python benchmark_compile.py --device cpu --shapes 256x256x8 256x256x14 --repeats 2
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import torch
+
+from config import settings
+from svd.benchmark import print_banner, print_table
+from svd.compiled import CompileOptions, ShapeBuckets
+from svd.renderer import SVDRenderer
+
+
+def parse_shape(value: str):
+    width, height, frames = (int(part) for part in value.lower().split("x"))
+    return width, height, frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compiled SVD UNet")
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu", choices=["cuda", "cpu"])
+    parser.add_argument("--shapes", nargs="+", default=["640x480x25", "1024x576x25"],
+                        help="widthxheightxframes shapes to time")
+    parser.add_argument("--batch", type=int, default=1, help="UNet batch size (2 with CFG)")
+    parser.add_argument("--mode", default=settings.compile_mode, help="torch.compile mode")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    shapes = [parse_shape(shape) for shape in args.shapes]
+    buckets = ShapeBuckets(resolutions={(width, height) for width, height, _ in shapes},
+                           frame_buckets={frames for _, _, frames in shapes})
+
+    print_banner("Compiled UNet Benchmark", [f"Device: {args.device}, torch {torch.__version__}, mode {args.mode}"])
+
+    renderer = SVDRenderer(
+        model_id=settings.svd_model_id,
+        cache_dir=settings.svd_model_cache,
+        device=args.device,
+        compile=CompileOptions(buckets=buckets, mode=args.mode, cache_dir=settings.compile_cache_dir)
+    )
+    renderer.load_model()
+
+    def time_forward(unet, inputs):
+        timings = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            with torch.inference_mode():
+                unet(**inputs)
+            if args.device == "cuda":
+                torch.cuda.synchronize()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
+
+    results = []
+    for width, height, frames in shapes:
+        inputs = renderer._unet_probe_inputs(width, height, frames, args.batch)
+        print(f"[SHAPE] {width}x{height}x{frames}")
+        eager_s = time_forward(renderer._eager_unet, inputs)
+
+        started = time.perf_counter()
+        with torch.inference_mode():
+            renderer._compiled_unet(**inputs)
+        compile_s = time.perf_counter() - started
+        compiled_s = time_forward(renderer._compiled_unet, inputs)
+        results.append((f"{width}x{height}x{frames}", eager_s, compiled_s, f"{eager_s / compiled_s:.2f}x", compile_s))
+
+    print()
+    print("=" * 60)
+    print_table([("shape", "<16"), ("eager s", ">10.2f"), ("compiled s", ">12.2f"),
+                 ("speedup", ">9"), ("compile s", ">11.1f")], results)
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark the CPU execution modes against the plain fp32 CPU path.
+
+Renders the same image with the same seed once per mode on the CPU and
+reports time per step, total time and drift from the fp32 render. The
+fp32 baseline matches the old CPU fallback (float32, no channels-last).
+
+Usage:
+    python benchmark_cpu.py photo.jpg
+    python benchmark_cpu.py photo.jpg --modes bf16 int8 --width 384 --height 256 --frames 8 --steps 8
+"""
+import argparse
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import settings, VideoConfig
+from svd.benchmark import Variant, print_banner, print_sweep, run_sweep, sweep_renderer
+from svd.cpu import CpuOptions, cpu_supports_bf16
+from svd.renderer import SVDRenderer, VideoGenerationParams
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CPU inference modes")
+    parser.add_argument("image", type=Path, help="Input image")
+    parser.add_argument("--modes", nargs="+", default=["bf16", "int8"], choices=["bf16", "int8", "fp32"],
+                        help="Optimized modes to compare with the fp32 baseline")
+    parser.add_argument("--width", type=int, default=512)
+    parser.add_argument("--height", type=int, default=320)
+    parser.add_argument("--frames", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threads", type=int, default=settings.cpu_threads, help="Intra-op threads (0 = auto)")
+    parser.add_argument("--output-dir", type=Path, default=Path("./cache/benchmarks/cpu"))
+    args = parser.parse_args()
+
+    print_banner("CPU Inference Benchmark", [
+        f"Native bf16: {'yes' if cpu_supports_bf16() else 'no'}",
+        f"Input: {args.image}, {args.width}x{args.height}, {args.frames} frames, {args.steps} steps, seed {args.seed}",
+    ])
+    template = VideoGenerationParams(
+        image_path=args.image,
+        output_path=args.output_dir / "render.mp4",
+        duration=1,
+        resolution=(args.width, args.height),
+        motion_preset="micro",
+        fps=args.frames,
+        steps=args.steps,
+        guidance_scale=VideoConfig.GUIDANCE_SCALE,
+        enhance_output=False,
+        seed=args.seed,
+    )
+
+    # Each mode needs its own renderer: precision is applied when the model loads
+    options = {"fp32 baseline": CpuOptions(precision="fp32", channels_last=False, threads=args.threads)}
+    options.update({f"{mode} channels-last": CpuOptions(precision=mode, channels_last=True, threads=args.threads)
+                    for mode in args.modes})
+
+    def render(variant: Variant):
+        renderer = SVDRenderer(model_id=settings.svd_model_id, cache_dir=settings.svd_model_cache,
+                               device="cpu", snapshot_dir=settings.svd_snapshot_path, cpu=options[variant.label])
+        renderer.load_model()
+        try:
+            return sweep_renderer(renderer, template, args.output_dir)(variant)
+        finally:
+            renderer.cleanup()
+
+    baseline, *variants = (Variant(label) for label in options)
+    baseline_timing, results = run_sweep(render, baseline, variants)
+    print_sweep(baseline, baseline_timing, results)
+
+
+if __name__ == "__main__":
+    main()
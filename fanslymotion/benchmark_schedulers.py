@@ -0,0 +1,51 @@
+"""
+Benchmark sampling schedulers and step budgets against a reference render.
+
+Renders the same image with the same seed once with the reference
+scheduler/step count and once per candidate, then reports time per step
+and similarity to the reference. Use it to pick the "scheduler"/"steps"
+entries of VideoConfig.QUALITY_MODES.
+
+Usage:
+    python benchmark_schedulers.py photo.jpg
+    python benchmark_schedulers.py photo.jpg --reference euler:50 --candidates euler:25 dpmpp_2m:15 dpmpp_2m:20
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import settings, VideoConfig
+from svd.benchmark import (Variant, describe_mode_run, mode_params, print_banner, print_sweep,
+                           render_argument_parser, run_sweep, sweep_renderer)
+from svd.renderer import get_renderer
+from svd.schedulers import available_schedulers
+
+
+def scheduler_variant(value: str) -> Variant:
+    name, _, steps = value.partition(":")
+    steps = int(steps or VideoConfig.STEPS)
+    return Variant(f"{name} x {steps}", {"scheduler": name, "steps": steps})
+
+
+def main():
+    parser = render_argument_parser("Benchmark SVD schedulers and step budgets", VideoConfig,
+                                    "./cache/benchmarks/schedulers")
+    parser.add_argument("--reference", default="euler:50", help="scheduler:steps of the reference render")
+    parser.add_argument("--candidates", nargs="+",
+                        default=["euler:40", "euler:30", "euler:25",
+                                 "dpmpp_2m:25", "dpmpp_2m:20", "dpmpp_2m:15"],
+                        help="scheduler:steps pairs to compare")
+    args = parser.parse_args()
+
+    print_banner("SVD Scheduler Benchmark",
+                 [f"Available schedulers: {', '.join(available_schedulers())}"] + describe_mode_run(args, VideoConfig))
+    renderer = get_renderer(model_id=settings.svd_model_id, cache_dir=settings.svd_model_cache)
+    render = sweep_renderer(renderer, mode_params(args, VideoConfig, args.image), args.output_dir)
+
+    baseline = scheduler_variant(args.reference)
+    baseline_timing, results = run_sweep(render, baseline, [scheduler_variant(value) for value in args.candidates])
+    print_sweep(baseline, baseline_timing, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Benchmark token merging against unmerged attention.
+
+Renders the same image with the same seed without token merging and once
+per merge ratio, then reports speed and drift from the unmerged render.
+Use it to pick the "token_merge_ratio" of VideoConfig.QUALITY_MODES;
+the gain grows with resolution and frame count.
+
+Usage:
+    python benchmark_token_merging.py photo.jpg
+    python benchmark_token_merging.py photo.jpg --resolution 1080p --ratios 0.3 0.5
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import settings, VideoConfig
+from svd.benchmark import (Variant, describe_mode_run, mode_params, print_banner, print_sweep,
+                           render_argument_parser, run_sweep, sweep_renderer)
+from svd.renderer import get_renderer
+
+
+def main():
+    parser = render_argument_parser("Benchmark token merging", VideoConfig,
+                                    "./cache/benchmarks/token_merging", resolution="720p")
+    parser.add_argument("--ratios", type=float, nargs="+", default=[0.2, 0.3, 0.4, 0.5],
+                        help="Fractions of self-attention tokens to merge")
+    args = parser.parse_args()
+
+    print_banner("Token Merging Benchmark", describe_mode_run(args, VideoConfig))
+    renderer = get_renderer(model_id=settings.svd_model_id, cache_dir=settings.svd_model_cache)
+    render = sweep_renderer(renderer, mode_params(args, VideoConfig, args.image), args.output_dir)
+
+    baseline = Variant("no merging", {"token_merge_ratio": 0.0})
+    variants = [Variant(f"ratio {ratio:.2f}", {"token_merge_ratio": ratio}) for ratio in args.ratios]
+    baseline_timing, results = run_sweep(render, baseline, variants)
+    print_sweep(baseline, baseline_timing, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Benchmark the UNet feature cache (DeepCache) against the uncached path.
+
+Renders the same image with the same seed without caching and once per
+full-refresh interval, then reports speed and drift from the uncached
+render. Use it to pick the "cache_interval" of VideoConfig.QUALITY_MODES.
+
+Usage:
+    python benchmark_unet_cache.py photo.jpg
+    python benchmark_unet_cache.py photo.jpg --mode fast --intervals 2 3 4
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import settings, VideoConfig
+from svd.benchmark import (Variant, describe_mode_run, mode_params, print_banner, print_sweep,
+                           render_argument_parser, run_sweep, sweep_renderer)
+from svd.renderer import get_renderer
+
+
+def main():
+    parser = render_argument_parser("Benchmark UNet feature caching", VideoConfig,
+                                    "./cache/benchmarks/unet_cache", mode="fast")
+    parser.add_argument("--intervals", type=int, nargs="+", default=[2, 3, 4, 5],
+                        help="Full-refresh intervals to compare")
+    args = parser.parse_args()
+
+    print_banner("UNet Feature Cache Benchmark", describe_mode_run(args, VideoConfig))
+    renderer = get_renderer(model_id=settings.svd_model_id, cache_dir=settings.svd_model_cache)
+    render = sweep_renderer(renderer, mode_params(args, VideoConfig, args.image), args.output_dir,
+                            stats=[("cached_calls", "unet_cached_calls")])
+
+    baseline = Variant("no cache", {"unet_cache_interval": 0})
+    variants = [Variant(f"interval {interval}", {"unet_cache_interval": interval}) for interval in args.intervals]
+    baseline_timing, results = run_sweep(render, baseline, variants)
+    print_sweep(baseline, baseline_timing, results, extra_columns=[("cached", "cached_calls", ">8")])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Telegram file_id cache for delivered videos.
+Maps a job's content hash to the file_id Telegram returned for its upload,
+so identical renders and re-sends skip uploading the bytes again.
+"""
+import logging
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class VideoFileCache:
+    """Redis-backed mapping of content hash -> Telegram video file_id."""
+
+    KEY_PREFIX = "tg:video_file_id:"
+
+    def __init__(self, client: aioredis.Redis, ttl: int):
+        """
+        Initialize the cache.
+
+        Args:
+            client: Async Redis client
+            ttl: Entry lifetime in seconds
+        """
+        self.client = client
+        self.ttl = ttl
+
+    async def get(self, content_hash: str) -> Optional[str]:
+        """
+        Look up the file_id of an already delivered video.
+
+        Args:
+            content_hash: Job content hash
+
+        Returns:
+            Telegram file_id or None if not cached
+        """
+        try:
+            file_id = await self.client.get(self.KEY_PREFIX + content_hash)
+            return file_id.decode("utf-8") if file_id else None
+        except Exception as e:
+            # Cache is best-effort - a miss just means uploading again
+            logger.warning(f"file_id cache lookup failed: {e}")
+            return None
+
+    async def set(self, content_hash: str, file_id: str):
+        """
+        Record the file_id returned by Telegram for a delivered video.
+
+        Args:
+            content_hash: Job content hash
+            file_id: Telegram file_id of the uploaded video
+        """
+        try:
+            await self.client.set(self.KEY_PREFIX + content_hash, file_id, ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"file_id cache store failed: {e}")
+
+    async def delete(self, content_hash: str):
+        """
+        Drop a cached file_id (e.g. when Telegram rejects it).
+
+        Args:
+            content_hash: Job content hash
+        """
+        try:
+            await self.client.delete(self.KEY_PREFIX + content_hash)
+        except Exception as e:
+            logger.warning(f"file_id cache delete failed: {e}")
+
+
+# Shared cache instance for handlers
+video_file_cache = VideoFileCache(
+    client=aioredis.Redis(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=settings.redis_db,
+        decode_responses=False
+    ),
+    ttl=settings.bot_file_id_ttl
+)
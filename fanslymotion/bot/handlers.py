@@ -5,23 +5,26 @@ import base64
 import asyncio
 import logging
 from io import BytesIO
+from pathlib import Path
 from typing import Optional
 
 import httpx
 
 logger = logging.getLogger(__name__)
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery, FSInputFile
+from aiogram.types import Message, CallbackQuery, FSInputFile, URLInputFile, InputFile
 from aiogram.filters import CommandStart, Command
 from aiogram.fsm.context import FSMContext
 
-from config import settings, VideoConfig
+from config import settings, VideoConfig, PROJECT_ROOT
 from bot.states import VideoGenerationStates
 from bot.keyboards import (
     get_main_menu_keyboard, get_duration_keyboard, get_resolution_keyboard,
     get_style_keyboard, get_quality_mode_keyboard, get_motion_keyboard, 
-    get_prompt_keyboard, get_cancel_keyboard, get_back_to_menu_keyboard
+    get_prompt_keyboard, get_cancel_keyboard, get_back_to_menu_keyboard,
+    get_video_ready_keyboard
 )
+from bot.file_cache import video_file_cache
 
 # Create router
 router = Router()
@@ -42,6 +45,7 @@ async def poll_job_status(job_id: str, message: Message) -> Optional[dict]:
         Job result dictionary or None on failure
     """
     progress_msg = None
+    preview_sent = False
     last_progress = -1
     retry_count = 0
     max_retries = VideoConfig.RETRY_COUNT
@@ -97,10 +101,11 @@ async def poll_job_status(job_id: str, message: Message) -> Optional[dict]:
                 current_text_hash = hash(new_text)
                 if not hasattr(poll_job_status, 'last_text_hash') or poll_job_status.last_text_hash != current_text_hash:
                     try:
+                        # Keep the cancel button on the progress message
                         if progress_msg:
-                            await progress_msg.edit_text(new_text)
+                            await progress_msg.edit_text(new_text, reply_markup=get_cancel_keyboard())
                         else:
-                            progress_msg = await message.answer(new_text)
+                            progress_msg = await message.answer(new_text, reply_markup=get_cancel_keyboard())
                         poll_job_status.last_text_hash = current_text_hash
                     except Exception as e:
                         error_str = str(e)
@@ -121,9 +126,29 @@ async def poll_job_status(job_id: str, message: Message) -> Optional[dict]:
                 
                 last_progress = progress
             
+            # Draft clip is ready while the final render is still running
+            preview_url = status_data.get("preview_url")
+            if preview_url and not preview_sent and status not in ("completed", "cancelled", "failed"):
+                preview_sent = True
+                try:
+                    await message.answer_animation(
+                        animation=URLInputFile(
+                            f"{settings.backend_url}{preview_url}",
+                            filename=f"preview_{job_id}.mp4",
+                            timeout=VideoConfig.TIMEOUT
+                        ),
+                        caption="👀 Quick preview. Full quality is on the way - cancel if you don't like it.",
+                        reply_markup=get_cancel_keyboard()
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to send preview for job {job_id}: {e}")
+            
             # Check if completed
             if status == "completed":
                 return status_data
+            elif status == "cancelled":
+                # User already got the confirmation from cancel_generation
+                return None
             elif status == "failed":
                 error = status_data.get("error") or "Unknown error"
                 # Ensure error is a string
@@ -159,6 +184,107 @@ async def poll_job_status(job_id: str, message: Message) -> Optional[dict]:
     return None
 
 
+async def fetch_job_result(job_id: str) -> dict:
+    """
+    Fetch the result record of a finished job.
+    
+    Args:
+        job_id: Job identifier
+        
+    Returns:
+        Job result dictionary, empty if it could not be fetched
+    """
+    try:
+        response = await http_client.get(f"{settings.backend_url}/job/result/{job_id}")
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        logger.warning(f"Failed to fetch result for job {job_id}: {e}")
+        return {}
+
+
+def get_video_input(job_id: str, video_path: Optional[str] = None) -> InputFile:
+    """
+    Build the Telegram input file for a finished job without buffering it.
+    
+    In "shared" delivery mode the worker output is sent straight from the
+    storage volume shared with the backend and worker. Otherwise (or when the
+    file is not visible from the bot) the download endpoint is streamed to
+    Telegram in chunks.
+    
+    Args:
+        job_id: Job identifier
+        video_path: Worker output path from the job result, if known
+        
+    Returns:
+        Input file ready to pass to answer_video
+    """
+    filename = f"video_{job_id}.mp4"
+    
+    if settings.bot_video_delivery == "shared" and video_path:
+        path = Path(video_path)
+        if not path.is_absolute():
+            path = PROJECT_ROOT / path
+        if path.is_file():
+            return FSInputFile(path, filename=filename)
+        logger.info(f"Video for job {job_id} not on shared storage, streaming instead")
+    
+    return URLInputFile(
+        f"{settings.backend_url}/job/download/{job_id}",
+        filename=filename,
+        timeout=VideoConfig.TIMEOUT
+    )
+
+
+async def send_job_video(message: Message, job_id: str, caption: str, reply_markup=None) -> Message:
+    """
+    Deliver a finished job's video, reusing Telegram's file_id when possible.
+    
+    If a video with the same content hash was already uploaded, its cached
+    file_id is re-sent without uploading the bytes again. Otherwise the video
+    is uploaded and the returned file_id is recorded for next time. The
+    content hash includes the render seed, so it only matches the same
+    video - in practice the same job sent again.
+    
+    Args:
+        message: Message to reply to
+        job_id: Job identifier
+        caption: Video caption (HTML)
+        reply_markup: Optional keyboard attached to the video
+        
+    Returns:
+        Sent message
+    """
+    job_result = await fetch_job_result(job_id)
+    content_hash = job_result.get("content_hash")
+    
+    if content_hash:
+        file_id = await video_file_cache.get(content_hash)
+        if file_id:
+            try:
+                return await message.answer_video(
+                    video=file_id,
+                    caption=caption,
+                    parse_mode="HTML",
+                    reply_markup=reply_markup
+                )
+            except Exception as e:
+                logger.warning(f"Cached file_id rejected for job {job_id}, uploading: {e}")
+                await video_file_cache.delete(content_hash)
+    
+    sent = await message.answer_video(
+        video=get_video_input(job_id, job_result.get("video_path")),
+        caption=caption,
+        parse_mode="HTML",
+        reply_markup=reply_markup
+    )
+    
+    if content_hash and sent.video:
+        await video_file_cache.set(content_hash, sent.video.file_id)
+    
+    return sent
+
+
 @router.message(CommandStart())
 async def cmd_start(message: Message, state: FSMContext):
     """Handle /start command."""
@@ -506,18 +632,7 @@ async def process_photo(message: Message, state: FSMContext):
         job_result = await poll_job_status(job_id, message)
         
         if job_result:
-            # Download and send video
-            await processing_msg.edit_text("📥 Downloading video...")
-            
-            video_response = await http_client.get(
-                f"{settings.backend_url}/job/download/{job_id}"
-            )
-            video_response.raise_for_status()
-            
-            # Save to temporary file
-            video_path = settings.storage_hot_path / f"temp_{job_id}.mp4"
-            with open(video_path, "wb") as f:
-                f.write(video_response.content)
+            await processing_msg.edit_text("📤 Sending video...")
             
             # Prepare caption with all settings
             style_desc = VideoConfig.VISUAL_STYLES.get(data.get('visual_style', 'none'), {}).get("description", "Realistic")
@@ -545,18 +660,15 @@ async def process_photo(message: Message, state: FSMContext):
                 if len(caption) > 1020:
                     caption = "✅ Video ready! 🎥"
             
-            # Send video
-            await message.answer_video(
-                video=FSInputFile(video_path),
-                caption=caption,
-                parse_mode="HTML",
-                reply_markup=get_back_to_menu_keyboard()
+            # Send video from cache, shared storage or the download stream
+            await send_job_video(
+                message,
+                job_id,
+                caption,
+                reply_markup=get_video_ready_keyboard(job_id)
             )
             
-            # Cleanup
             await processing_msg.delete()
-            if video_path.exists():
-                video_path.unlink()
         
         await state.clear()
         
@@ -575,10 +687,44 @@ async def invalid_photo(message: Message):
     )
 
 
+@router.callback_query(F.data.startswith("resend_"))
+async def resend_video(callback: CallbackQuery):
+    """Send an already delivered video again."""
+    await callback.answer()
+    
+    job_id = callback.data.split("_", 1)[1]
+    
+    try:
+        await send_job_video(
+            callback.message,
+            job_id,
+            "🔁 <b>Your video</b>\nFanslyMotion v2.0 🎥",
+            reply_markup=get_video_ready_keyboard(job_id)
+        )
+    except Exception as e:
+        logger.warning(f"Failed to resend video for job {job_id}: {e}")
+        await callback.message.answer(
+            "⚠️ This video is no longer available.",
+            reply_markup=get_back_to_menu_keyboard()
+        )
+
+
 @router.callback_query(F.data == "cancel_generation")
 async def cancel_generation(callback: CallbackQuery, state: FSMContext):
-    """Cancel current generation."""
+    """Cancel current generation, stopping the backend job if one was submitted."""
     await callback.answer("Generation cancelled")
+    
+    data = await state.get_data()
+    job_id = data.get("job_id")
+    if job_id:
+        try:
+            response = await http_client.post(f"{settings.backend_url}/job/cancel/{job_id}")
+            # 409 means the job finished before the cancel arrived
+            if response.status_code != 409:
+                response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Failed to cancel job {job_id}: {e}")
+    
     await state.clear()
     
     await callback.message.edit_text(
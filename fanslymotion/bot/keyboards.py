@@ -137,3 +137,12 @@ def get_back_to_menu_keyboard() -> InlineKeyboardMarkup:
     builder.button(text="◀️ Back to Menu", callback_data="back_to_menu")
     return builder.as_markup()
 
+
+
+def get_video_ready_keyboard(job_id: str) -> InlineKeyboardMarkup:
+    """Get keyboard attached to a delivered video."""
+    builder = InlineKeyboardBuilder()
+    builder.button(text="🔁 Send again", callback_data=f"resend_{job_id}")
+    builder.button(text="◀️ Back to Menu", callback_data="back_to_menu")
+    builder.adjust(1, 1)
+    return builder.as_markup()
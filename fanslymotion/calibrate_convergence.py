@@ -0,0 +1,75 @@
+"""
+Calibrate convergence thresholds against full-step renders.
+
+Renders every image once with all steps of the quality mode and once per
+candidate threshold with the early exit enabled, all with the same seed,
+then reports the steps actually used, the speedup and the drift from the
+full-step render. The recommended threshold is the largest one whose
+worst-case SSIM stays above --min-ssim; set it as "convergence_threshold"
+of the mode in VideoConfig.QUALITY_MODES.
+
+Usage:
+    python calibrate_convergence.py photo1.jpg photo2.jpg
+    python calibrate_convergence.py photos/*.jpg --mode fast --thresholds 0.005 0.01 0.02 --min-ssim 0.97
+"""
+import statistics
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import settings, VideoConfig
+from svd.benchmark import (Variant, describe_mode_run, mode_params, print_banner, print_table,
+                           render_argument_parser, run_sweep, sweep_renderer)
+from svd.renderer import get_renderer
+
+
+def main():
+    parser = render_argument_parser("Calibrate early-exit convergence thresholds", VideoConfig,
+                                    "./cache/benchmarks/convergence", multiple_images=True)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.002, 0.005, 0.01, 0.02, 0.04],
+                        help="Relative x0 change thresholds to compare")
+    parser.add_argument("--min-ssim", type=float, default=0.98,
+                        help="Worst-case SSIM against the full-step render a threshold must keep")
+    args = parser.parse_args()
+
+    print_banner("Convergence Threshold Calibration", describe_mode_run(args, VideoConfig))
+    renderer = get_renderer(model_id=settings.svd_model_id, cache_dir=settings.svd_model_cache)
+
+    # threshold -> list of (steps used, speedup, drift) over the images
+    runs = {threshold: [] for threshold in args.thresholds}
+    for image in args.images:
+        render = sweep_renderer(renderer, mode_params(args, VideoConfig, image), args.output_dir,
+                                stats=[("steps_used", "steps_used")])
+        baseline = Variant(f"{image.stem} full", {"convergence_threshold": 0.0})
+        variants = [Variant(f"{image.stem} threshold {threshold:g}", {"convergence_threshold": threshold})
+                    for threshold in args.thresholds]
+        full_timing, results = run_sweep(render, baseline, variants)
+        for threshold, (_, timing, drift) in zip(args.thresholds, results):
+            runs[threshold].append((timing["steps_used"], full_timing["total_s"] / timing["total_s"], drift))
+
+    rows, recommended = [], None
+    for threshold in args.thresholds:
+        worst_ssim = min(drift["ssim"] for _, _, drift in runs[threshold])
+        rows.append([threshold,
+                     statistics.mean(steps for steps, _, _ in runs[threshold]),
+                     f"{statistics.mean(speedup for _, speedup, _ in runs[threshold]):.2f}x",
+                     statistics.mean(drift["psnr"] for _, _, drift in runs[threshold]),
+                     statistics.mean(drift["ssim"] for _, _, drift in runs[threshold]),
+                     worst_ssim])
+        if worst_ssim >= args.min_ssim and (recommended is None or threshold > recommended):
+            recommended = threshold
+
+    print()
+    print("=" * 60)
+    print_table([("threshold", ">10g"), ("steps", ">8.1f"), ("speedup", ">9"),
+                 ("PSNR", ">8.2f"), ("SSIM", ">8.3f"), ("min SSIM", ">10.3f")], rows)
+    print("-" * 60)
+    if recommended is None:
+        print(f"No threshold keeps SSIM >= {args.min_ssim}; leave convergence_threshold at 0.0 for '{args.mode}'")
+    else:
+        print(f"Recommended for '{args.mode}': \"convergence_threshold\": {recommended:g}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
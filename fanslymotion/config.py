@@ -32,14 +32,54 @@ class Settings(BaseSettings):
     backend_port: int = int(os.getenv("BACKEND_PORT", "8000"))
     backend_url: str = os.getenv("BACKEND_URL", "http://localhost:8000")
     
+    # Download offload: "none" streams files through uvicorn, "x-accel-redirect"
+    # hands them to nginx (internal locations mapped to the hot/archive storage
+    # dirs at DOWNLOAD_OFFLOAD_PREFIX / DOWNLOAD_OFFLOAD_ARCHIVE_PREFIX),
+    # "x-sendfile" hands them to Apache/lighttpd
+    download_offload_mode: str = os.getenv("DOWNLOAD_OFFLOAD_MODE", "none")
+    download_offload_prefix: str = os.getenv("DOWNLOAD_OFFLOAD_PREFIX", "/protected/hot/")
+    download_offload_archive_prefix: str = os.getenv("DOWNLOAD_OFFLOAD_ARCHIVE_PREFIX", "/protected/archive/")
+    
     # Storage
     storage_hot_path: Path = Path(os.getenv("STORAGE_HOT_PATH", "./storage/hot"))
     storage_archive_path: Path = Path(os.getenv("STORAGE_ARCHIVE_PATH", "./storage/archive"))
+    storage_hot_budget_gb: float = float(os.getenv("STORAGE_HOT_BUDGET_GB", "20"))  # LRU moves the rest to archive (0 = unlimited)
+    storage_archive_budget_gb: float = float(os.getenv("STORAGE_ARCHIVE_BUDGET_GB", "100"))  # LRU deletes beyond this (0 = unlimited)
+    artifact_ttl: int = int(os.getenv("ARTIFACT_TTL", "86400"))  # Input/output file lifetime, matches job metadata expiry (0 = keep)
+    storage_reaper_interval: int = int(os.getenv("STORAGE_REAPER_INTERVAL", "300"))  # Seconds between expired-artifact sweeps
+    
+    # Video delivery: "shared" sends the worker output straight from the shared
+    # storage volume (falls back to streaming), "stream" always streams
+    # /job/download/{id} to Telegram in chunks
+    bot_video_delivery: str = os.getenv("BOT_VIDEO_DELIVERY", "shared")
+    bot_file_id_ttl: int = int(os.getenv("BOT_FILE_ID_TTL", str(30 * 86400)))  # Telegram file_id cache lifetime
+    
+    # Image ingest (upload validation and normalization in the backend)
+    ingest_workers: int = int(os.getenv("INGEST_WORKERS", "4"))
+    ingest_max_bytes: int = int(os.getenv("INGEST_MAX_BYTES", str(20 * 1024 * 1024)))
+    ingest_max_pixels: int = int(os.getenv("INGEST_MAX_PIXELS", str(50_000_000)))
+    ingest_min_side: int = int(os.getenv("INGEST_MIN_SIDE", "64"))
     
     # Worker
     worker_queue_name: str = os.getenv("WORKER_QUEUE_NAME", "svd_jobs")
     worker_max_jobs: int = int(os.getenv("WORKER_MAX_JOBS", "10"))
     worker_timeout: int = int(os.getenv("WORKER_TIMEOUT", "900"))  # 15 minutes for 12GB VRAM
+    worker_priority_queue_name: str = os.getenv("WORKER_PRIORITY_QUEUE_NAME", "svd_jobs_high")
+    
+    # Scheduling (cost-based queue routing and time-sliced preemption)
+    scheduler_cost_per_unit: float = float(os.getenv("SCHEDULER_COST_PER_UNIT", "0.15"))  # seconds per megapixel-frame-step
+    priority_cost_threshold: float = float(os.getenv("PRIORITY_COST_THRESHOLD", "120"))  # jobs up to this many seconds go to the priority queue
+    preempt_slice_seconds: int = int(os.getenv("PREEMPT_SLICE_SECONDS", "120"))  # 0 = never preempt
+    preempt_min_cost: float = float(os.getenv("PREEMPT_MIN_COST", "600"))
+    preempt_max_count: int = int(os.getenv("PREEMPT_MAX_COUNT", "3"))
+    
+    # Load shedding (lower quality within bounds when the backlog is deep)
+    load_shed_enabled: bool = os.getenv("LOAD_SHED_ENABLED", "false").lower() in ("1", "true", "yes")
+    load_shed_queue_depth: int = int(os.getenv("LOAD_SHED_QUEUE_DEPTH", "5"))  # waiting jobs per degradation level
+    job_deadline_seconds: int = int(os.getenv("JOB_DEADLINE_SECONDS", "900"))  # latency SLO from submission (0 = none)
+    load_shed_min_steps: int = int(os.getenv("LOAD_SHED_MIN_STEPS", "16"))
+    load_shed_min_fps: int = int(os.getenv("LOAD_SHED_MIN_FPS", "12"))
+    load_shed_min_resolution: str = os.getenv("LOAD_SHED_MIN_RESOLUTION", "480p")
     
     # GPU
     cuda_visible_devices: str = os.getenv("CUDA_VISIBLE_DEVICES", "0")
@@ -49,6 +89,51 @@ class Settings(BaseSettings):
     # SVD Model
     svd_model_id: str = os.getenv("SVD_MODEL_ID", "stabilityai/stable-video-diffusion-img2vid-xt")
     svd_model_cache: Path = Path(os.getenv("SVD_MODEL_CACHE", "./cache/models"))
+    # Local safetensors snapshot written by bake_snapshot.py (loaded instead of the hub cache when present)
+    svd_snapshot_path: Path = Path(os.getenv("SVD_SNAPSHOT_PATH", "./cache/snapshot"))
+    
+    # Latent checkpoints for resuming interrupted renders (0 = disabled)
+    checkpoint_interval: int = int(os.getenv("CHECKPOINT_INTERVAL", "0"))
+    checkpoint_path: Path = Path(os.getenv("CHECKPOINT_PATH", "./cache/checkpoints"))
+    
+    # Progressive preview: low-step draft clip delivered before the final render
+    preview_enabled: bool = os.getenv("PREVIEW_ENABLED", "false").lower() in ("1", "true", "yes")
+    preview_steps: int = int(os.getenv("PREVIEW_STEPS", "6"))
+    preview_max_side: int = int(os.getenv("PREVIEW_MAX_SIDE", "384"))
+    preview_frames: int = int(os.getenv("PREVIEW_FRAMES", "14"))
+    preview_fps: int = int(os.getenv("PREVIEW_FPS", "7"))
+    
+    # Time attention backends for the compile shape buckets when the worker
+    # starts (CUDA only) and keep the fastest; other shapes use the default
+    attention_autotune: bool = os.getenv("ATTENTION_AUTOTUNE", "true").lower() in ("1", "true", "yes")
+    attention_autotune_cache: Path = Path(os.getenv("ATTENTION_AUTOTUNE_CACHE", "./cache/attention_autotune.json"))
+    
+    # Compiled UNet: renders are snapped to shape buckets (resolution names x frame
+    # counts, frames rounded up and trimmed); other shapes and offloaded renders run eagerly.
+    # Frame buckets default to every duration at every quality mode's fps (no padding)
+    compile_unet: bool = os.getenv("COMPILE_UNET", "false").lower() in ("1", "true", "yes")
+    compile_mode: str = os.getenv("COMPILE_MODE", "default")
+    compile_cache_dir: Path = Path(os.getenv("COMPILE_CACHE_DIR", "./cache/torch_compile"))
+    compile_resolutions: str = os.getenv("COMPILE_RESOLUTIONS", "480p,720p")
+    compile_frame_buckets: str = os.getenv("COMPILE_FRAME_BUCKETS", "")
+    compile_warmup: bool = os.getenv("COMPILE_WARMUP", "true").lower() in ("1", "true", "yes")
+    
+    # CPU execution (hosts without CUDA): fp32 matches the original output; bf16/int8
+    # (or auto = bf16 where the CPU supports it, else int8) are faster but drift -
+    # check with benchmark_cpu.py before opting in
+    cpu_precision: str = os.getenv("CPU_PRECISION", "fp32")
+    cpu_channels_last: bool = os.getenv("CPU_CHANNELS_LAST", "true").lower() in ("1", "true", "yes")
+    cpu_threads: int = int(os.getenv("CPU_THREADS", "0"))  # 0 = all cores
+    cpu_interop_threads: int = int(os.getenv("CPU_INTEROP_THREADS", "1"))
+    cpu_encode_threads: int = int(os.getenv("CPU_ENCODE_THREADS", "0"))  # 0 = ffmpeg's default
+    
+    # Render low, then upscale: "output=internal" resolution pairs, e.g. "1080p=720p"
+    # (internal: resolution name or WxH, same aspect ratio); other resolutions diffuse at full size
+    upscale_tiers: str = os.getenv("UPSCALE_TIERS", "")
+    upscale_sharpen: float = float(os.getenv("UPSCALE_SHARPEN", "0.6"))  # Edge-aware sharpening after upscaling (0 = off)
+    
+    # Retries of a job that ran out of memory with every memory plan (0 = fail right away)
+    oom_retry_max: int = int(os.getenv("OOM_RETRY_MAX", "3"))
     
     # Job Configuration
     job_retry_count: int = int(os.getenv("JOB_RETRY_COUNT", "3"))
@@ -103,17 +188,22 @@ class VideoConfig:
         "fantasy": {"description": "Fantasy", "prompt_suffix": ", fantasy style, magical, dreamy"},
     }
     
-    # Quality modes
+    # Quality modes: step budget and sampler (see svd.schedulers, validate
+    # changes with benchmark_schedulers.py), UNet feature cache refresh
+    # interval (0 = off, validate with benchmark_unet_cache.py)
     QUALITY_MODES = {
-        "standard": {"steps": 40, "fps": 24, "description": "Standard quality"},
-        "smooth": {"steps": 50, "fps": 30, "description": "Ultra smooth (highest quality)"},
-        "fast": {"steps": 30, "fps": 18, "description": "Fast generation"},
+        "standard": {"steps": 40, "fps": 24, "scheduler": "euler", "cache_interval": 0, "token_merge_ratio": 0.0, "convergence_threshold": 0.0, "description": "Standard quality"},
+        "smooth": {"steps": 50, "fps": 30, "scheduler": "euler", "cache_interval": 0, "token_merge_ratio": 0.0, "convergence_threshold": 0.0, "description": "Ultra smooth (highest quality)"},
+        "fast": {"steps": 30, "fps": 18, "scheduler": "euler", "cache_interval": 0, "token_merge_ratio": 0.0, "convergence_threshold": 0.0, "description": "Fast generation"},
     }
     
     # Technical parameters (Enhanced for maximum quality)
     FPS: int = 24  # Increased from 12 to 24 for smoother video
     STEPS: int = 40  # Increased from 24 to 40 for better quality
-    GUIDANCE_SCALE: float = 1.0
+    SCHEDULER: str = "euler"  # Sampler when a quality mode doesn't set one
+    GUIDANCE_SCALE: float = 1.0  # Max CFG scale; 1.0 = CFG-free (single UNet pass per step)
+    MIN_GUIDANCE_SCALE: float = 1.0  # CFG scale of the first frame (ramps up to GUIDANCE_SCALE)
+    GUIDANCE_STEPS: int = 0  # Truncated guidance: CFG only for the first N steps (0 = all)
     NOISE_AUGMENTATION: float = 0.1
     ENHANCE_OUTPUT: bool = True  # Enable post-processing enhancements
     
@@ -113,7 +113,7 @@ After=network.target fanslymotion-redis.service
 Type=simple
 WorkingDirectory=/workspace/fanslymotion
 Environment="PATH=/usr/local/bin:/usr/bin:/bin"
-ExecStart=/usr/bin/python3 -m rq worker --url redis://localhost:6379/0 svd_jobs
+ExecStart=/usr/bin/python3 worker/worker.py
 Restart=always
 
 [Install]
@@ -0,0 +1,403 @@
+"""
+Storage manager for job artifacts (input images and output videos).
+Keeps an index of artifacts, their access times and expiry times in Redis,
+moves cold files from hot to archive storage, evicts against byte budgets in
+LRU order and reaps expired artifacts, so cleanup cost scales with files
+evicted rather than files stored. Shared by the API and the worker.
+"""
+import shutil
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+import redis
+
+from config import settings
+
+TIERS = ("hot", "archive")
+
+# Index updates run as Lua scripts, so concurrent callers (API and worker)
+# never read an entry and update the byte counters from a stale copy.
+# KEYS: size hash, tier hash, expiry zset, LRU zsets (hot, archive),
+# byte counters (hot, archive)
+_FORGET_FUNCTION = """
+local function tier_slot(tier)
+    if tier == 'archive' then return 1 end
+    return 0
+end
+local function forget(name)
+    -- Drop the LRU entries unconditionally: a member left behind without a
+    -- tier entry would be fetched by the eviction loops forever
+    redis.call('ZREM', KEYS[3], name)
+    redis.call('ZREM', KEYS[4], name)
+    redis.call('ZREM', KEYS[5], name)
+    local tier = redis.call('HGET', KEYS[2], name)
+    if not tier then return false end
+    local size = tonumber(redis.call('HGET', KEYS[1], name) or '0')
+    redis.call('HDEL', KEYS[1], name)
+    redis.call('HDEL', KEYS[2], name)
+    redis.call('DECRBY', KEYS[6 + tier_slot(tier)], size)
+    return tier
+end
+"""
+
+# ARGV: name
+_FORGET_SCRIPT = _FORGET_FUNCTION + """
+return forget(ARGV[1])
+"""
+
+# ARGV: name, tier, size, access time, expiry time (0 = none)
+_REGISTER_SCRIPT = _FORGET_FUNCTION + """
+local name, tier, size = ARGV[1], ARGV[2], tonumber(ARGV[3])
+forget(name)
+redis.call('ZADD', KEYS[4 + tier_slot(tier)], ARGV[4], name)
+redis.call('HSET', KEYS[1], name, size)
+redis.call('HSET', KEYS[2], name, tier)
+redis.call('INCRBY', KEYS[6 + tier_slot(tier)], size)
+if tonumber(ARGV[5]) > 0 then
+    redis.call('ZADD', KEYS[3], ARGV[5], name)
+end
+"""
+
+# ARGV: name, access time to use if it has none; returns the tier the entry
+# was in (only a hot entry is moved, a stale hot LRU member is dropped)
+_ARCHIVE_SCRIPT = """
+local name = ARGV[1]
+local tier = redis.call('HGET', KEYS[2], name)
+if tier ~= 'hot' then
+    redis.call('ZREM', KEYS[4], name)
+    return tier
+end
+local atime = redis.call('ZSCORE', KEYS[4], name) or ARGV[2]
+local size = tonumber(redis.call('HGET', KEYS[1], name) or '0')
+redis.call('ZREM', KEYS[4], name)
+redis.call('ZADD', KEYS[5], atime, name)
+redis.call('HSET', KEYS[2], name, 'archive')
+redis.call('DECRBY', KEYS[6], size)
+redis.call('INCRBY', KEYS[7], size)
+return tier
+"""
+
+
+class StorageManager:
+    """
+    Redis-indexed hot/archive artifact storage.
+
+    Artifacts are keyed by file name (job files are named after the job ID,
+    so names are unique). Index layout:
+        storage:lru:{tier}   sorted set, name -> last access time
+        storage:bytes:{tier} total bytes stored in the tier
+        storage:size         hash, name -> size in bytes
+        storage:tier         hash, name -> "hot" | "archive"
+        storage:expiry       sorted set, name -> expiry time
+    """
+
+    LRU_KEY = "storage:lru:{tier}"
+    BYTES_KEY = "storage:bytes:{tier}"
+    SIZE_KEY = "storage:size"
+    TIER_KEY = "storage:tier"
+    EXPIRY_KEY = "storage:expiry"
+
+    def __init__(self, redis_client: redis.Redis,
+                 hot_path: Path, archive_path: Path,
+                 hot_budget: int, archive_budget: int,
+                 artifact_ttl: int = 0):
+        """
+        Initialize the storage manager.
+
+        Args:
+            redis_client: Redis client instance
+            hot_path: Hot storage directory
+            archive_path: Archive storage directory
+            hot_budget: Maximum bytes kept in hot storage (<= 0 for unlimited)
+            archive_budget: Maximum bytes kept in archive storage (<= 0 for unlimited)
+            artifact_ttl: Default artifact lifetime in seconds (<= 0 for no expiry)
+        """
+        self.redis = redis_client
+        self.paths = {"hot": Path(hot_path), "archive": Path(archive_path)}
+        self.budgets = {"hot": hot_budget, "archive": archive_budget}
+        self.artifact_ttl = artifact_ttl
+        self._index_keys = [self.SIZE_KEY, self.TIER_KEY, self.EXPIRY_KEY,
+                            *(self.LRU_KEY.format(tier=tier) for tier in TIERS),
+                            *(self.BYTES_KEY.format(tier=tier) for tier in TIERS)]
+        self._forget_script = redis_client.register_script(_FORGET_SCRIPT)
+        self._register_script = redis_client.register_script(_REGISTER_SCRIPT)
+        self._archive_script = redis_client.register_script(_ARCHIVE_SCRIPT)
+
+    @staticmethod
+    def _name(path: Union[str, Path]) -> str:
+        return Path(path).name
+
+    @staticmethod
+    def _decode(value) -> Optional[str]:
+        if value is None:
+            return None
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def register(self, path: Union[str, Path], tier: str = "hot",
+                 ttl: Optional[int] = None):
+        """
+        Add a newly written artifact to the index.
+
+        Args:
+            path: Artifact file path
+            tier: Storage tier the file was written to
+            ttl: Lifetime in seconds (defaults to artifact_ttl, <= 0 for no expiry)
+        """
+        name = self._name(path)
+        size = Path(path).stat().st_size
+        now = time.time()
+        ttl = self.artifact_ttl if ttl is None else ttl
+
+        # Re-registering replaces the old entry instead of double-counting it
+        self._register_script(keys=self._index_keys,
+                              args=[name, tier, size, now, now + ttl if ttl > 0 else 0])
+
+    def touch(self, path: Union[str, Path]):
+        """
+        Record an access to an artifact (moves it to the LRU tail).
+
+        Args:
+            path: Artifact file path or name
+        """
+        name = self._name(path)
+        tier = self._decode(self.redis.hget(self.TIER_KEY, name))
+        if tier:
+            self.redis.zadd(self.LRU_KEY.format(tier=tier), {name: time.time()}, xx=True)
+
+    def locate(self, path: Union[str, Path]) -> Path:
+        """
+        Resolve the current location of an artifact.
+
+        Paths stored in job metadata point at hot storage; files archived
+        since then are found in the archive directory.
+
+        Args:
+            path: Artifact path as originally written
+
+        Returns:
+            Current path of the artifact (original path if not indexed)
+        """
+        tier = self._decode(self.redis.hget(self.TIER_KEY, self._name(path)))
+        if tier in self.paths:
+            return self.paths[tier] / self._name(path)
+        return Path(path)
+
+    def forget(self, path: Union[str, Path]) -> Optional[str]:
+        """
+        Remove an artifact from the index without touching the file.
+
+        Args:
+            path: Artifact file path or name
+
+        Returns:
+            Tier the artifact was indexed in, or None if it was not indexed
+        """
+        return self._decode(self._forget_script(keys=self._index_keys, args=[self._name(path)]))
+
+    def delete(self, path: Union[str, Path]) -> bool:
+        """
+        Delete an artifact file and drop it from the index.
+
+        Args:
+            path: Artifact file path or name
+
+        Returns:
+            True if the artifact was indexed
+        """
+        name = self._name(path)
+        tier = self.forget(name)
+        if tier is None:
+            return False
+
+        try:
+            (self.paths[tier] / name).unlink(missing_ok=True)
+        except Exception as e:
+            print(f"[STORAGE] Failed to delete {name}: {e}")
+        return True
+
+    def _archive(self, name: str):
+        """Move an artifact from hot to archive storage, keeping its access time."""
+        source = self.paths["hot"] / name
+        target = self.paths["archive"] / name
+
+        if not source.exists():
+            # File vanished behind our back - just drop the stale entry
+            self.forget(name)
+            return
+
+        self.paths["archive"].mkdir(parents=True, exist_ok=True)
+        shutil.move(str(source), str(target))
+
+        tier = self._decode(self._archive_script(keys=self._index_keys, args=[name, time.time()]))
+        if tier is None:
+            # Deleted while it was being moved - don't leave an unindexed copy
+            target.unlink(missing_ok=True)
+
+    def used_bytes(self, tier: str) -> int:
+        """Total bytes currently indexed in a tier."""
+        return int(self.redis.get(self.BYTES_KEY.format(tier=tier)) or 0)
+
+    def enforce_budget(self, batch_size: int = 50) -> dict:
+        """
+        Bring both tiers under their byte budgets in LRU order.
+
+        Least recently used hot artifacts are moved to archive; least
+        recently used archive artifacts are deleted.
+
+        Args:
+            batch_size: Number of LRU entries fetched per round trip
+
+        Returns:
+            Dictionary with counts of archived and deleted artifacts
+        """
+        stats = {"archived": 0, "deleted": 0}
+
+        for tier in TIERS:
+            budget = self.budgets[tier]
+            if budget <= 0:
+                continue
+
+            lru_key = self.LRU_KEY.format(tier=tier)
+            while self.used_bytes(tier) > budget:
+                names = self.redis.zrange(lru_key, 0, batch_size - 1)
+                if not names:
+                    break
+                remaining = self.redis.zcard(lru_key)
+
+                for raw_name in names:
+                    name = self._decode(raw_name)
+                    if tier == "hot":
+                        self._archive(name)
+                        stats["archived"] += 1
+                    else:
+                        self.delete(name)
+                        stats["deleted"] += 1
+
+                    if self.used_bytes(tier) <= budget:
+                        break
+
+                # Stop rather than spin if the batch removed nothing (the
+                # byte counter may have drifted from the LRU index)
+                if self.redis.zcard(lru_key) >= remaining:
+                    break
+
+        if stats["archived"] or stats["deleted"]:
+            print(f"[STORAGE] Archived {stats['archived']}, deleted {stats['deleted']} artifacts")
+
+        return stats
+
+    def evict_older_than(self, max_age: float, batch_size: int = 50) -> int:
+        """
+        Delete artifacts not accessed within max_age seconds.
+
+        Only entries past the cutoff are read from the LRU index.
+
+        Args:
+            max_age: Maximum idle time in seconds
+            batch_size: Number of entries fetched per round trip
+
+        Returns:
+            Number of deleted artifacts
+        """
+        cutoff = time.time() - max_age
+        deleted = 0
+
+        for tier in TIERS:
+            lru_key = self.LRU_KEY.format(tier=tier)
+            while True:
+                names = self.redis.zrangebyscore(lru_key, "-inf", cutoff, start=0, num=batch_size)
+                if not names:
+                    break
+                remaining = self.redis.zcard(lru_key)
+                for raw_name in names:
+                    if self.delete(self._decode(raw_name)):
+                        deleted += 1
+                if self.redis.zcard(lru_key) >= remaining:
+                    break
+
+        return deleted
+
+    def reap_expired(self, batch_size: int = 100) -> int:
+        """
+        Delete artifacts whose expiry time has passed.
+
+        Only expired entries are read from the expiry index. Each entry is
+        claimed with ZREM before its file is deleted, so concurrent reapers
+        never process the same artifact twice.
+
+        Args:
+            batch_size: Number of expired entries handled per round trip
+
+        Returns:
+            Number of deleted artifacts
+        """
+        reaped = 0
+
+        while True:
+            names = self.redis.zrangebyscore(self.EXPIRY_KEY, "-inf", time.time(),
+                                             start=0, num=batch_size)
+            if not names:
+                break
+
+            pipe = self.redis.pipeline()
+            for raw_name in names:
+                pipe.zrem(self.EXPIRY_KEY, raw_name)
+            claimed = pipe.execute()
+
+            for raw_name, won in zip(names, claimed):
+                if won and self.delete(self._decode(raw_name)):
+                    reaped += 1
+
+        if reaped:
+            print(f"[STORAGE] Reaped {reaped} expired artifacts")
+
+        return reaped
+
+    def reindex(self):
+        """
+        Rebuild the index from the storage directories.
+
+        One-off full scan for files written before the index existed; the
+        file modification time is used as the last access time and as the
+        start of the artifact lifetime.
+        """
+        for tier in TIERS:
+            self.redis.delete(self.LRU_KEY.format(tier=tier), self.BYTES_KEY.format(tier=tier))
+        self.redis.delete(self.SIZE_KEY, self.TIER_KEY, self.EXPIRY_KEY)
+
+        for tier, storage_path in self.paths.items():
+            if not storage_path.exists():
+                continue
+            for file_path in storage_path.glob("*"):
+                if not file_path.is_file():
+                    continue
+                stat_result = file_path.stat()
+                pipe = self.redis.pipeline()
+                pipe.zadd(self.LRU_KEY.format(tier=tier), {file_path.name: stat_result.st_mtime})
+                pipe.hset(self.SIZE_KEY, file_path.name, stat_result.st_size)
+                pipe.hset(self.TIER_KEY, file_path.name, tier)
+                pipe.incrby(self.BYTES_KEY.format(tier=tier), stat_result.st_size)
+                if self.artifact_ttl > 0:
+                    pipe.zadd(self.EXPIRY_KEY, {file_path.name: stat_result.st_mtime + self.artifact_ttl})
+                pipe.execute()
+
+
+def get_storage_manager(redis_client: redis.Redis) -> StorageManager:
+    """
+    Create a storage manager configured from settings.
+
+    Args:
+        redis_client: Redis client instance
+
+    Returns:
+        StorageManager instance
+    """
+    return StorageManager(
+        redis_client,
+        hot_path=settings.storage_hot_path,
+        archive_path=settings.storage_archive_path,
+        hot_budget=int(settings.storage_hot_budget_gb * 1024**3),
+        archive_budget=int(settings.storage_archive_budget_gb * 1024**3),
+        artifact_ttl=settings.artifact_ttl,
+    )
@@ -2,7 +2,7 @@
 Stable Video Diffusion (SVD) rendering module.
 Handles video generation from static images using the SVD-XT model.
 """
-from .renderer import SVDRenderer, VideoGenerationParams
+from .renderer import SVDRenderer, VideoGenerationParams, PreviewParams, GenerationCancelled, GenerationPreempted
 
-__all__ = ["SVDRenderer", "VideoGenerationParams"]
+__all__ = ["SVDRenderer", "VideoGenerationParams", "PreviewParams", "GenerationCancelled", "GenerationPreempted"]
 
@@ -0,0 +1,170 @@
+"""
+Attention backend selection for the SVD UNet.
+Times the available attention implementations once per device, software
+stack and render shape, and keeps the fastest one in a JSON file so later
+renders of the same shape configure themselves without measuring again.
+"""
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import torch
+from diffusers.models.attention_processor import AttnProcessor2_0, SlicedAttnProcessor
+
+try:
+    import xformers  # noqa: F401
+    from diffusers.models.attention_processor import XFormersAttnProcessor
+except ImportError:
+    XFormersAttnProcessor = None
+
+DEFAULT_BACKEND = "sdpa"
+SLICE_SIZES = (2, 4, 8)
+
+
+def available_backends() -> List[str]:
+    """Attention backends usable in this environment, default first."""
+    backends = [DEFAULT_BACKEND]
+    if XFormersAttnProcessor is not None:
+        backends.append("xformers")
+    backends.extend(f"sliced_{size}" for size in SLICE_SIZES)
+    return backends
+
+
+def apply_attention_backend(unet, name: str):
+    """
+    Set the attention processor of every attention layer of the UNet.
+
+    Args:
+        unet: UNet of the SVD pipeline
+        name: Backend name from available_backends()
+
+    Raises:
+        ValueError: If the backend is unknown or not available
+    """
+    if name == "sdpa":
+        processor = AttnProcessor2_0()
+    elif name == "xformers" and XFormersAttnProcessor is not None:
+        processor = XFormersAttnProcessor()
+    elif name.startswith("sliced_") and name[len("sliced_"):].isdigit():
+        processor = SlicedAttnProcessor(int(name[len("sliced_"):]))
+    else:
+        raise ValueError(f"Unknown attention backend '{name}'. Available: {', '.join(available_backends())}")
+    unet.set_attn_processor(processor)
+
+
+def device_fingerprint(device: str) -> str:
+    """Identify the device and software stack that timings are valid for."""
+    if device == "cuda" and torch.cuda.is_available():
+        name = f"{torch.cuda.get_device_name(0)} cuda {torch.version.cuda}"
+    else:
+        name = device
+    return f"{name} | torch {torch.__version__}"
+
+
+class AttentionAutotuner:
+    """
+    Picks the fastest attention backend per render shape and remembers it.
+
+    Decisions are stored in a JSON file keyed by device fingerprint,
+    shape (width x height x frames x batch) and candidate set, so a new GPU,
+    driver stack or torch version is tuned afresh, and a winner among the
+    backends a frugal memory plan allows never replaces the unrestricted
+    winner of the same shape. A shape on which every candidate failed is
+    remembered too (backend None) and not timed again.
+    """
+
+    def __init__(self, cache_path: Path, device_key: str):
+        """
+        Initialize the autotuner.
+
+        Args:
+            cache_path: JSON file holding the decisions
+            device_key: Device fingerprint (see device_fingerprint)
+        """
+        self.cache_path = Path(cache_path)
+        self.device_key = device_key
+        self._decisions = self._load()
+
+    def _load(self) -> dict:
+        try:
+            return json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"[ATTENTION] Ignoring unreadable autotune cache {self.cache_path}: {e}")
+            return {}
+
+    def _save(self):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.cache_path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(self._decisions, indent=2, sort_keys=True), encoding="utf-8")
+        temp_path.replace(self.cache_path)
+
+    @staticmethod
+    def shape_key(width: int, height: int, num_frames: int, batch: int) -> str:
+        return f"{width}x{height}x{num_frames}x{batch}"
+
+    @staticmethod
+    def decision_key(shape_key: str, candidates: List[str]) -> str:
+        return f"{shape_key} [{','.join(candidates)}]"
+
+    def lookup(self, shape_key: str, candidates: List[str]) -> Optional[str]:
+        """
+        Cached decision for a shape and candidate set.
+
+        Returns:
+            The winner, the first candidate if all of them failed when
+            tuned, or None if this shape and candidate set were never tuned
+        """
+        decision = self._decisions.get(self.device_key, {}).get(self.decision_key(shape_key, candidates))
+        if decision is None:
+            return None
+        return decision["backend"] or candidates[0]
+
+    def tune(self, shape_key: str, candidates: List[str], run: Callable[[str], None],
+             repeats: int = 2) -> str:
+        """
+        Time each candidate and persist the fastest.
+
+        Args:
+            shape_key: Shape the timings are for
+            candidates: Backend names to try
+            run: Callable(backend) that applies the backend and runs one
+                representative forward pass
+            repeats: Timed runs per candidate after one warm-up run
+
+        Returns:
+            Name of the fastest backend (the first candidate if all failed)
+        """
+        timings: Dict[str, Optional[float]] = {}
+        for backend in candidates:
+            try:
+                run(backend)  # Warm-up: kernel selection, lazy allocations
+                started = time.perf_counter()
+                for _ in range(repeats):
+                    run(backend)
+                timings[backend] = (time.perf_counter() - started) / repeats
+                print(f"[ATTENTION] {shape_key} {backend}: {timings[backend] * 1000:.0f}ms")
+            except Exception as e:
+                # Out of memory or an unsupported kernel - not a contender
+                timings[backend] = None
+                print(f"[ATTENTION] {shape_key} {backend} failed: {type(e).__name__}: {str(e)[:200]}")
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+        measured = {backend: seconds for backend, seconds in timings.items() if seconds is not None}
+        winner = min(measured, key=measured.get) if measured else None
+
+        self._decisions.setdefault(self.device_key, {})[self.decision_key(shape_key, candidates)] = {
+            "backend": winner,
+            "timings_ms": {backend: round(seconds * 1000, 1) if seconds is not None else None
+                           for backend, seconds in timings.items()},
+            "tuned_at": datetime.utcnow().isoformat(),
+        }
+        try:
+            self._save()
+        except OSError as e:
+            print(f"[ATTENTION] Could not persist autotune cache: {e}")
+        return winner or candidates[0]
@@ -0,0 +1,307 @@
+"""
+Helpers for renderer benchmarks.
+Times renders per denoising step, measures how far an optimized render
+drifts from a reference render of the same seed, and provides the
+argument parsing, sweep loop and result tables shared by the benchmark
+scripts, so each script only defines the variants it compares.
+"""
+import argparse
+import re
+import statistics
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Iterable, List, Sequence, Tuple
+
+import cv2
+import imageio
+import numpy as np
+
+
+def load_video_frames(path: Path) -> np.ndarray:
+    """
+    Read all frames of a video file.
+
+    Args:
+        path: Video file
+
+    Returns:
+        Array of shape (frames, height, width, 3), dtype uint8
+    """
+    return np.stack([np.asarray(frame)[..., :3] for frame in imageio.mimread(str(path), memtest=False)])
+
+
+def psnr(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """Peak signal-to-noise ratio in dB (inf for identical inputs)."""
+    mse = np.mean((reference.astype(np.float64) - candidate.astype(np.float64)) ** 2)
+    if mse == 0:
+        return float("inf")
+    return float(10 * np.log10(255.0 ** 2 / mse))
+
+
+def ssim(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """Mean structural similarity of two RGB frames (Gaussian window, luma only)."""
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    x = cv2.cvtColor(reference, cv2.COLOR_RGB2GRAY).astype(np.float64)
+    y = cv2.cvtColor(candidate, cv2.COLOR_RGB2GRAY).astype(np.float64)
+
+    def blur(image):
+        return cv2.GaussianBlur(image, (11, 11), 1.5)
+
+    mu_x, mu_y = blur(x), blur(y)
+    sigma_x = blur(x * x) - mu_x ** 2
+    sigma_y = blur(y * y) - mu_y ** 2
+    sigma_xy = blur(x * y) - mu_x * mu_y
+
+    ssim_map = ((2 * mu_x * mu_y + c1) * (2 * sigma_xy + c2)) / ((mu_x ** 2 + mu_y ** 2 + c1) * (sigma_x + sigma_y + c2))
+    return float(ssim_map.mean())
+
+
+def compare_videos(reference_path: Path, candidate_path: Path) -> dict:
+    """
+    Compare a render against a reference render frame by frame.
+
+    Frames are compared pairwise up to the shorter video; a candidate of a
+    different size is resized to the reference first.
+
+    Args:
+        reference_path: Reference video
+        candidate_path: Video to compare
+
+    Returns:
+        Dictionary with mean "psnr" (dB) and mean "ssim" (0-1)
+    """
+    reference = load_video_frames(reference_path)
+    candidate = load_video_frames(candidate_path)
+    count = min(len(reference), len(candidate))
+    height, width = reference.shape[1:3]
+
+    psnr_values, ssim_values = [], []
+    for ref_frame, frame in zip(reference[:count], candidate[:count]):
+        if frame.shape != ref_frame.shape:
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        psnr_values.append(psnr(ref_frame, frame))
+        ssim_values.append(ssim(ref_frame, frame))
+
+    finite = [value for value in psnr_values if value != float("inf")]
+    return {
+        "psnr": statistics.mean(finite) if finite else float("inf"),
+        "ssim": statistics.mean(ssim_values),
+    }
+
+
+def timed_render(renderer, params, **kwargs) -> Tuple[Path, dict]:
+    """
+    Run a render and time it per denoising step.
+
+    The first step also pays for image encoding and warm-up, so the
+    per-step figure is the median of the later step intervals.
+
+    Args:
+        renderer: SVDRenderer with the model loaded
+        params: VideoGenerationParams (set params.seed for comparable runs)
+        **kwargs: Extra keyword arguments for generate_video
+
+    Returns:
+        Tuple of (video path, timings dict with "total_s" and "step_s")
+    """
+    step_times = []
+
+    def on_progress(step, total_steps):
+        step_times.append(time.perf_counter())
+
+    started = time.perf_counter()
+    video_path = renderer.generate_video(params, progress_callback=on_progress, **kwargs)
+    total = time.perf_counter() - started
+
+    intervals = [later - earlier for earlier, later in zip(step_times, step_times[1:])]
+    step_s = statistics.median(intervals) if intervals else total
+    return video_path, {"total_s": total, "step_s": step_s}
+
+
+@dataclass
+class Variant:
+    """One render of a sweep."""
+    label: str  # Row label in the results table, also names the video file
+    overrides: dict = field(default_factory=dict)  # VideoGenerationParams fields to change
+
+
+# (variant, timing, drift from the baseline)
+SweepResult = Tuple[Variant, dict, dict]
+
+
+def render_argument_parser(description: str, video_config, output_dir: str,
+                           mode: str = "standard", resolution: str = "480p",
+                           multiple_images: bool = False) -> argparse.ArgumentParser:
+    """
+    Argument parser with the options shared by quality-mode benchmarks.
+
+    Args:
+        description: Parser description
+        video_config: VideoConfig (quality modes and resolutions)
+        output_dir: Default directory for the rendered videos
+        mode: Default quality mode
+        resolution: Default resolution name
+        multiple_images: Take several input images ("images") instead of one ("image")
+
+    Returns:
+        Parser; scripts add their sweep options before parsing
+    """
+    parser = argparse.ArgumentParser(description=description)
+    if multiple_images:
+        parser.add_argument("images", type=Path, nargs="+", help="Input images (use a few typical uploads)")
+    else:
+        parser.add_argument("image", type=Path, help="Input image")
+    parser.add_argument("--mode", default=mode, choices=list(video_config.QUALITY_MODES),
+                        help="Quality mode whose steps/fps/scheduler are used")
+    parser.add_argument("--resolution", default=resolution, choices=list(video_config.RESOLUTIONS))
+    parser.add_argument("--duration", type=int, default=2, help="Seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", type=Path, default=Path(output_dir))
+    return parser
+
+
+def mode_params(args: argparse.Namespace, video_config, image: Path):
+    """
+    Render parameters of the quality mode selected on the command line.
+
+    Args:
+        args: Arguments parsed by a render_argument_parser parser
+        video_config: VideoConfig
+        image: Input image
+
+    Returns:
+        VideoGenerationParams to apply variant overrides to
+    """
+    from .renderer import VideoGenerationParams
+
+    mode = video_config.QUALITY_MODES[args.mode]
+    return VideoGenerationParams(
+        image_path=image,
+        output_path=args.output_dir / "render.mp4",
+        duration=args.duration,
+        resolution=video_config.RESOLUTIONS[args.resolution],
+        motion_preset="micro",
+        fps=mode["fps"],
+        steps=mode["steps"],
+        guidance_scale=video_config.GUIDANCE_SCALE,
+        enhance_output=False,
+        scheduler=mode.get("scheduler", video_config.SCHEDULER),
+        seed=args.seed,
+    )
+
+
+def describe_mode_run(args: argparse.Namespace, video_config) -> List[str]:
+    """Banner lines describing a quality-mode benchmark run."""
+    mode = video_config.QUALITY_MODES[args.mode]
+    images = getattr(args, "images", None)
+    inputs = f"Inputs: {len(images)} images" if images else f"Input: {args.image}"
+    return [
+        f"Mode: {args.mode} ({mode['steps']} steps, {mode['fps']} fps, {mode.get('scheduler', video_config.SCHEDULER)})",
+        f"{inputs}, {args.resolution}, {args.duration}s, seed {args.seed}",
+    ]
+
+
+def print_banner(title: str, lines: Iterable[str] = ()):
+    """Print a benchmark header."""
+    print("=" * 60)
+    print(title)
+    print("=" * 60)
+    for line in lines:
+        print(line)
+    print()
+
+
+def print_table(columns: Sequence[Tuple[str, str]], rows: Iterable[Sequence]):
+    """
+    Print a results table.
+
+    Args:
+        columns: (header, format spec) pairs, e.g. ("PSNR", ">8.2f"); the
+            header uses the alignment and width of the spec
+        rows: Row values, one per column
+    """
+    header_specs = [re.match(r"[<>^]?\d*", spec).group() for _, spec in columns]
+    print("".join(f"{header:{spec}}" for (header, _), spec in zip(columns, header_specs)))
+    for row in rows:
+        print("".join(f"{value:{spec}}" for value, (_, spec) in zip(row, columns)))
+
+
+def sweep_renderer(renderer, template, output_dir: Path,
+                   stats: Sequence[Tuple[str, str]] = ()) -> Callable[[Variant], Tuple[Path, dict]]:
+    """
+    Render function for run_sweep: the template with a variant's overrides.
+
+    Args:
+        renderer: SVDRenderer with the model loaded
+        template: VideoGenerationParams shared by all variants
+        output_dir: Directory for the rendered videos
+        stats: (timing key, renderer.last_stats key) pairs copied into the timings
+
+    Returns:
+        Function rendering a Variant, returning (video path, timings)
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    def render(variant: Variant) -> Tuple[Path, dict]:
+        file_name = re.sub(r"[^\w.-]+", "_", variant.label) + ".mp4"
+        params = replace(template, output_path=output_dir / file_name, **variant.overrides)
+        video_path, timing = timed_render(renderer, params)
+        for timing_key, stats_key in stats:
+            timing[timing_key] = renderer.last_stats.get(stats_key, 0)
+        return video_path, timing
+
+    return render
+
+
+def run_sweep(render: Callable[[Variant], Tuple[Path, dict]], baseline: Variant,
+              variants: Iterable[Variant]) -> Tuple[dict, List[SweepResult]]:
+    """
+    Render a baseline and each variant, comparing every variant to the baseline.
+
+    Args:
+        render: Function rendering a Variant (see sweep_renderer)
+        baseline: Reference render
+        variants: Renders to compare
+
+    Returns:
+        Tuple of (baseline timings, results)
+    """
+    print(f"[BASELINE] {baseline.label}")
+    baseline_path, baseline_timing = render(baseline)
+
+    results = []
+    for variant in variants:
+        print(f"\n[VARIANT] {variant.label}")
+        video_path, timing = render(variant)
+        results.append((variant, timing, compare_videos(baseline_path, video_path)))
+    return baseline_timing, results
+
+
+def print_sweep(baseline: Variant, baseline_timing: dict, results: List[SweepResult],
+                extra_columns: Sequence[Tuple[str, str, str]] = ()):
+    """
+    Print the speed and drift of each variant against the baseline.
+
+    Args:
+        baseline: Reference render
+        baseline_timing: Timings of the reference render
+        results: Results of run_sweep
+        extra_columns: (header, timing key, format spec) columns shown after the label
+    """
+    label_width = max(len(variant.label) for variant in [baseline] + [result[0] for result in results]) + 2
+    print()
+    print("=" * 60)
+    print(f"Baseline {baseline.label}: {baseline_timing['step_s']:.2f}s/step, {baseline_timing['total_s']:.1f}s total")
+    print("-" * 60)
+    columns = [("variant", f"<{label_width}")]
+    columns += [(header, spec) for header, _, spec in extra_columns]
+    columns += [("s/step", ">9.2f"), ("total s", ">10.1f"), ("speedup", ">9"), ("PSNR", ">8.2f"), ("SSIM", ">8.3f")]
+    print_table(columns, (
+        [variant.label]
+        + [timing[key] for _, key, _ in extra_columns]
+        + [timing["step_s"], timing["total_s"], f"{baseline_timing['total_s'] / timing['total_s']:.2f}x",
+           drift["psnr"], drift["ssim"]]
+        for variant, timing, drift in results
+    ))
+    print("=" * 60)
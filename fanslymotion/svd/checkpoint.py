@@ -0,0 +1,117 @@
+"""
+Denoising-step checkpoints for resumable renders.
+Latents are saved to local disk every N steps from the renderer's step
+callback, keyed by job and parameter hash, so a retried job can continue
+from the last checkpoint instead of starting over.
+"""
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+import torch
+
+
+def checkpoint_key(params) -> str:
+    """
+    Build the checkpoint key for a render.
+
+    The output file is named after the job ID; the hash covers every
+    parameter that affects the latents, so a job re-run with different
+    settings never resumes from a stale checkpoint. Only the input's file
+    name is hashed, as storage tiering may move it to another directory.
+
+    Args:
+        params: VideoGenerationParams of the render
+
+    Returns:
+        Checkpoint key string
+    """
+    fingerprint = "|".join(str(value) for value in (
+        Path(params.image_path).name, params.resolution, params.duration, params.fps,
+        params.steps, params.motion_preset, params.motion_bucket_id,
+        params.noise_aug_strength, params.guidance_scale,
+        params.min_guidance_scale, params.guidance_steps, params.scheduler,
+        params.unet_cache_interval, params.render_size, params.render_scale,
+        params.token_merge_ratio, params.convergence_threshold,
+    ))
+    digest = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:16]
+    return f"{Path(params.output_path).stem}_{digest}"
+
+
+def clear_checkpoints(directory: Path, output_path: Path) -> int:
+    """
+    Remove every checkpoint of a job, whatever parameters it was saved with.
+
+    Args:
+        directory: Directory holding checkpoint files
+        output_path: Output path of the job's render
+
+    Returns:
+        Number of files removed
+    """
+    removed = 0
+    for path in Path(directory).glob(f"{Path(output_path).stem}_*"):
+        if path.suffix in (".pt", ".tmp"):
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+class LatentCheckpointer:
+    """Saves and restores denoising latents for one render."""
+
+    def __init__(self, directory: Path, key: str, interval: int):
+        """
+        Initialize the checkpointer.
+
+        Args:
+            directory: Directory holding checkpoint files
+            key: Checkpoint key (see checkpoint_key)
+            interval: Save every N completed steps (0 = only on demand)
+        """
+        self.directory = Path(directory)
+        self.path = self.directory / f"{key}.pt"
+        self.interval = interval
+
+    def load(self) -> Optional[dict]:
+        """
+        Load the last checkpoint of this render.
+
+        Returns:
+            Dictionary with "step" (completed steps), "latents" and "seed",
+            or None if there is no usable checkpoint
+        """
+        if not self.path.exists():
+            return None
+        try:
+            return torch.load(self.path, map_location="cpu")
+        except Exception as e:
+            print(f"[CHECKPOINT] Ignoring unreadable checkpoint {self.path}: {e}")
+            self.clear()
+            return None
+
+    def should_save(self, completed_steps: int, total_steps: int) -> bool:
+        """Whether to save after this step (never after the last one)."""
+        if self.interval <= 0:
+            return False
+        return completed_steps < total_steps and completed_steps % self.interval == 0
+
+    def save(self, completed_steps: int, latents: torch.Tensor, seed: int):
+        """
+        Atomically write a checkpoint.
+
+        Args:
+            completed_steps: Number of denoising steps already applied
+            latents: Latents after the last completed step
+            seed: Seed of the render's generator
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        torch.save({"step": completed_steps, "latents": latents.detach().cpu(), "seed": seed}, tmp_path)
+        os.replace(tmp_path, self.path)
+        print(f"[CHECKPOINT] Saved latents after step {completed_steps}")
+
+    def clear(self):
+        """Remove the checkpoint once the render finished or was abandoned."""
+        self.path.unlink(missing_ok=True)
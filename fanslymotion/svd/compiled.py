@@ -0,0 +1,97 @@
+"""
+Compiled UNet support.
+torch.compile specializes the UNet on its input shapes, so renders are
+snapped to a small set of shape buckets: each bucket compiles once, can be
+warmed before the first job and keeps its generated kernels in an on-disk
+cache that survives worker restarts.
+"""
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+
+class ShapeBuckets:
+    """Render shapes the compiled UNet is specialized for."""
+
+    def __init__(self, resolutions: Iterable[Tuple[int, int]], frame_buckets: Iterable[int]):
+        """
+        Initialize the buckets.
+
+        Args:
+            resolutions: (width, height) pairs rendered with the compiled UNet
+            frame_buckets: Frame counts requests are rounded up to
+        """
+        self.resolutions = [tuple(resolution) for resolution in resolutions]
+        self.frame_buckets = sorted(set(frame_buckets))
+
+    def snap(self, width: int, height: int, num_frames: int) -> Optional[int]:
+        """
+        Bucket frame count for a render.
+
+        Args:
+            width: Render width in pixels
+            height: Render height in pixels
+            num_frames: Requested number of frames
+
+        Returns:
+            Smallest bucket frame count >= num_frames, or None if the shape
+            has no bucket (the render runs eagerly)
+        """
+        if (width, height) not in self.resolutions:
+            return None
+        for frames in self.frame_buckets:
+            if frames >= num_frames:
+                return frames
+        return None
+
+    def shapes(self) -> List[Tuple[int, int, int]]:
+        """All (width, height, frames) buckets."""
+        return [(width, height, frames) for width, height in self.resolutions for frames in self.frame_buckets]
+
+
+@dataclass
+class CompileOptions:
+    """How the renderer compiles its UNet."""
+    buckets: ShapeBuckets
+    mode: str = "default"  # torch.compile mode ("default", "reduce-overhead", "max-autotune")
+    cache_dir: Optional[Path] = None  # Kernel cache shared across restarts
+
+
+def configure_compile_cache(cache_dir: Path):
+    """
+    Point the inductor and Triton kernel caches at a persistent directory.
+
+    Must run before the first compilation. Environment variables set by
+    the deployment take precedence.
+
+    Args:
+        cache_dir: Cache directory
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", str(cache_dir / "inductor"))
+    os.environ.setdefault("TRITON_CACHE_DIR", str(cache_dir / "triton"))
+
+    import torch._inductor.config as inductor_config
+    # Whole-graph cache (torch >= 2.2); older versions cache the kernels only
+    if hasattr(inductor_config, "fx_graph_cache"):
+        inductor_config.fx_graph_cache = True
+
+
+def compile_unet(unet, mode: str, max_shapes: int):
+    """
+    Compile the UNet for static shapes.
+
+    Args:
+        unet: UNet of the SVD pipeline
+        mode: torch.compile mode
+        max_shapes: Number of shapes that must stay compiled at once
+
+    Returns:
+        Compiled module sharing parameters with `unet`
+    """
+    import torch._dynamo
+    # Dynamo silently falls back to eager once a frame was recompiled this often
+    torch._dynamo.config.cache_size_limit = max(torch._dynamo.config.cache_size_limit, max_shapes)
+    return torch.compile(unet, mode=mode, dynamic=False)
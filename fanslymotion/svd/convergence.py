@@ -0,0 +1,87 @@
+"""
+Convergence-based early exit from the denoising loop.
+Tracks how much the denoised estimate (x0) changes from one step to the
+next. Once the change stays below a threshold, the middle of the schedule
+is skipped: the sampler jumps straight to its last few steps, which still
+take the latents down to sigma 0.
+"""
+import math
+from typing import Optional
+
+import torch
+
+# Steps of the schedule that always run after an early exit
+FINAL_STEPS = 3
+# Never exit before this fraction of the steps
+MIN_STEP_FRACTION = 0.4
+# Consecutive steps below the threshold needed to exit
+PATIENCE = 2
+# Spatial subsampling of the latents the statistic is computed on
+SAMPLE_STRIDE = 4
+
+
+class Converged(Exception):
+    """Raised from the step callback once the latents have converged."""
+
+    def __init__(self, completed_steps: int, latents: torch.Tensor):
+        super().__init__(f"Converged after step {completed_steps}")
+        self.completed_steps = completed_steps
+        self.latents = latents
+
+
+class ConvergenceMonitor:
+    """
+    Latent-delta statistic of one render.
+
+    The statistic is the relative change of the denoised estimate between
+    consecutive steps. The estimate is the one the scheduler computed in
+    its step (pred_original_sample), so it is exact for every sampler -
+    back-solving it from two latents only holds for Euler.
+    """
+
+    def __init__(self, threshold: float, total_steps: int, final_steps: int = FINAL_STEPS,
+                 min_steps: Optional[int] = None, patience: int = PATIENCE):
+        """
+        Initialize the monitor.
+
+        Args:
+            threshold: Relative x0 change below which a step counts as converged
+            total_steps: Steps of the full schedule
+            final_steps: Steps run after the jump
+            min_steps: Earliest step to exit at (default: MIN_STEP_FRACTION of total_steps)
+            patience: Consecutive converged steps needed to exit
+        """
+        self.threshold = threshold
+        self.total_steps = total_steps
+        self.final_steps = final_steps
+        self.min_steps = min_steps if min_steps is not None else math.ceil(total_steps * MIN_STEP_FRACTION)
+        self.patience = patience
+        self.trace = []  # [completed step, statistic] per measured step
+        self.reset()
+
+    def reset(self):
+        """Forget the previous estimate; called before every pipeline call."""
+        self._estimate = None
+        self._below = 0
+
+    def update(self, denoised: torch.Tensor, completed: int) -> bool:
+        """
+        Record the denoised estimate of a step.
+
+        Args:
+            denoised: x0 predicted by the scheduler in the step
+            completed: Steps of the full schedule completed so far
+
+        Returns:
+            True if the render should jump to its final steps now
+        """
+        estimate = denoised[..., ::SAMPLE_STRIDE, ::SAMPLE_STRIDE].float()
+        converged = False
+        if self._estimate is not None:
+            change = ((estimate - self._estimate).norm() / self._estimate.norm().clamp_min(1e-8)).item()
+            self.trace.append([completed, round(change, 5)])
+            self._below = self._below + 1 if change < self.threshold else 0
+            converged = (self._below >= self.patience
+                         and self.min_steps <= completed < self.total_steps - self.final_steps)
+        self._estimate = estimate
+        return converged
@@ -0,0 +1,103 @@
+"""
+CPU execution mode for the SVD pipeline.
+Runs in fp32 by default; bf16 autocast (on CPUs with AVX512-BF16/AMX) and
+dynamic int8 linear layers are opt-in since they change the output. Switches
+convolutions to channels-last and sizes the intra-/inter-op thread pools.
+Encoding runs after inference in the same thread, so inference gets every
+core.
+"""
+import os
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+import torch
+
+PRECISIONS = ("auto", "bf16", "int8", "fp32")
+
+
+@dataclass
+class CpuOptions:
+    """How the renderer runs on the CPU."""
+    precision: str = "fp32"  # "fp32" | "bf16" | "int8" | "auto" (bf16 if supported, else int8)
+    channels_last: bool = True
+    threads: int = 0  # Intra-op threads for inference (0 = all cores)
+    interop_threads: int = 1
+    encode_threads: int = 0  # ffmpeg encoder threads (0 = ffmpeg's default)
+
+
+def cpu_supports_bf16() -> bool:
+    """Whether the CPU has native bf16 matmul support (AVX512-BF16 or AMX)."""
+    check = getattr(torch.ops.mkldnn, "_is_mkldnn_bf16_supported", None)
+    if check is not None:
+        try:
+            return bool(check())
+        except RuntimeError:
+            pass
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as cpuinfo:
+            flags = cpuinfo.read()
+        return "avx512_bf16" in flags or "amx_bf16" in flags
+    except OSError:
+        return False
+
+
+def resolve_precision(precision: str) -> str:
+    """Concrete precision for "auto": bf16 where supported, int8 otherwise."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown CPU precision '{precision}'. Available: {', '.join(PRECISIONS)}")
+    if precision == "auto":
+        return "bf16" if cpu_supports_bf16() else "int8"
+    if precision == "bf16" and not cpu_supports_bf16():
+        print("[CPU] bf16 requested but not supported natively by this CPU - expect it to be slow")
+    return precision
+
+
+def plan_threads(options: CpuOptions) -> int:
+    """
+    Set the torch thread pools for inference.
+
+    Args:
+        options: CPU options
+
+    Returns:
+        Number of intra-op threads
+    """
+    cores = os.cpu_count() or 1
+    threads = options.threads or cores
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(options.interop_threads)
+    except RuntimeError:
+        # Only settable before the first inter-op parallel work in the process
+        pass
+    return threads
+
+
+def optimize_pipeline(pipeline, precision: str, channels_last: bool):
+    """
+    Prepare a float32 pipeline on the CPU for the given precision.
+
+    Dynamic int8 quantization only exists for linear layers: it covers the
+    UNet's attention and feed-forward projections and the VAE's attention
+    projections, while convolutions stay float32. bf16 needs no weight
+    changes - it is applied with autocast() around inference.
+
+    Args:
+        pipeline: StableVideoDiffusionPipeline in float32 on the CPU
+        precision: Concrete precision ("bf16", "int8" or "fp32")
+        channels_last: Convert convolution weights to channels-last
+    """
+    if channels_last:
+        pipeline.unet.to(memory_format=torch.channels_last)
+        pipeline.vae.to(memory_format=torch.channels_last)
+
+    if precision == "int8":
+        for module in (pipeline.unet, pipeline.vae):
+            torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def autocast(precision: str):
+    """Context for CPU inference at the given precision."""
+    if precision == "bf16":
+        return torch.autocast("cpu", dtype=torch.bfloat16)
+    return nullcontext()
@@ -0,0 +1,71 @@
+"""
+Cross-step UNet feature caching (DeepCache).
+Deep UNet features change little between adjacent denoising steps. On
+cached steps only the shallow branch (conv_in, the first down block, the
+last up block and the output head) is recomputed; the deeper blocks return
+their outputs from the last full step.
+"""
+from contextlib import contextmanager
+
+
+class UNetFeatureCache:
+    """
+    Block-output cache for UNetSpatioTemporalConditionModel.
+
+    The last up block consumes the skip connections of conv_in and the
+    first down block, which are always fresh, plus the output of the
+    second-to-last up block, which is served from cache. Every
+    `interval`-th UNet call is a full refresh.
+    """
+
+    def __init__(self, unet, interval: int):
+        """
+        Initialize the cache.
+
+        Args:
+            unet: UNet of the SVD pipeline
+            interval: Full-refresh interval in UNet calls (>= 2 to have any effect)
+        """
+        self.unet = unet
+        self.interval = interval
+        self.calls = 0
+        self.cached_calls = 0
+        self._reuse = False
+        self._outputs = {}
+        self._deep_blocks = list(unet.down_blocks[1:]) + [unet.mid_block] + list(unet.up_blocks[:-1])
+
+    def _wrap(self, block):
+        original_forward = block.forward
+
+        def forward(*args, **kwargs):
+            hidden_states = kwargs.get("hidden_states", args[0] if args else None)
+            cached = self._outputs.get(id(block))
+            # A batch change (e.g. truncated CFG switching off) invalidates the cache
+            if self._reuse and cached is not None and cached[0] == tuple(hidden_states.shape):
+                return cached[1]
+            output = original_forward(*args, **kwargs)
+            self._outputs[id(block)] = (tuple(hidden_states.shape), output)
+            return output
+
+        block.forward = forward
+
+    def _before_unet_call(self, module, args, kwargs):
+        self._reuse = self.calls % self.interval != 0
+        if self._reuse:
+            self.cached_calls += 1
+        self.calls += 1
+
+    @contextmanager
+    def enabled(self):
+        """Activate caching for the duration of one pipeline call."""
+        handle = self.unet.register_forward_pre_hook(self._before_unet_call, with_kwargs=True)
+        for block in self._deep_blocks:
+            self._wrap(block)
+        try:
+            yield self
+        finally:
+            handle.remove()
+            for block in self._deep_blocks:
+                # Drop the instance override, exposing the class forward again
+                del block.forward
+            self._outputs.clear()
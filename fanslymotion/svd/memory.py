@@ -0,0 +1,241 @@
+"""
+Memory planning for SVD renders.
+Estimates the peak device memory of a render from its resolution, frame
+count and batch size, and picks the fastest offload / attention slicing /
+VAE tiling / decode chunk configuration that fits the free-memory budget.
+Device memory is behind a small interface so plans can be computed (and
+tested) without a GPU.
+"""
+import os
+from dataclasses import dataclass, replace
+from typing import List, Optional
+
+import torch
+
+GB = 1024 ** 3
+
+# Offload modes from fastest to most frugal
+OFFLOAD_MODES = ("none", "model", "sequential")
+
+
+class DeviceMemory:
+    """Memory of the device the pipeline runs on."""
+
+    def total_bytes(self) -> int:
+        raise NotImplementedError
+
+    def available_bytes(self) -> int:
+        """Bytes this process can use: free memory plus what it already holds."""
+        raise NotImplementedError
+
+
+class CudaDeviceMemory(DeviceMemory):
+    """Memory of a CUDA device, measured with the caching allocator in mind."""
+
+    def __init__(self, device_index: int = 0):
+        self.device_index = device_index
+
+    def total_bytes(self) -> int:
+        return torch.cuda.get_device_properties(self.device_index).total_memory
+
+    def available_bytes(self) -> int:
+        free, _ = torch.cuda.mem_get_info(self.device_index)
+        # Blocks cached by our allocator are free for us, just not for the driver
+        return free + torch.cuda.memory_reserved(self.device_index)
+
+
+class StaticDeviceMemory(DeviceMemory):
+    """Fixed memory figures, for CPU inference and for testing plans."""
+
+    def __init__(self, total: int, available: Optional[int] = None):
+        self.total = total
+        self.available = total if available is None else available
+
+    def total_bytes(self) -> int:
+        return self.total
+
+    def available_bytes(self) -> int:
+        return self.available
+
+
+def system_memory() -> StaticDeviceMemory:
+    """Physical RAM of this machine (8 GB if it cannot be determined)."""
+    try:
+        total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        available = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES")
+        return StaticDeviceMemory(total, available)
+    except (AttributeError, ValueError, OSError):
+        return StaticDeviceMemory(8 * GB)
+
+
+@dataclass(frozen=True)
+class MemoryPlan:
+    """Memory-related pipeline configuration for one render."""
+    offload: str = "none"  # "none" | "model" | "sequential"
+    attention_slice_size: Optional[int] = None  # None = no attention slicing
+    vae_tiling: bool = False
+    decode_chunk_size: int = 8
+    estimated_peak_bytes: int = 0
+
+    def describe(self) -> str:
+        slicing = f"slice {self.attention_slice_size}" if self.attention_slice_size else "no slicing"
+        tiling = ", VAE tiling" if self.vae_tiling else ""
+        return (f"offload={self.offload}, {slicing}{tiling}, decode chunk {self.decode_chunk_size}, "
+                f"~{self.estimated_peak_bytes / GB:.1f}GB peak")
+
+
+class MemoryPlanner:
+    """
+    Chooses a MemoryPlan per render against the measured memory budget.
+
+    The estimate is a linear model: resident weights (depending on the
+    offload mode) plus UNet activations per latent token during denoising,
+    or plus VAE activations per decoded pixel during decoding, whichever
+    phase peaks higher. Defaults are for SVD-XT in fp16; the per-token and
+    per-pixel figures are deliberately on the safe side.
+    """
+
+    # fp16 weight sizes of the pipeline components
+    UNET_BYTES = int(3.05 * GB)
+    IMAGE_ENCODER_BYTES = int(1.27 * GB)
+    VAE_BYTES = int(0.20 * GB)
+    # Largest single module kept on the device by sequential offload
+    SEQUENTIAL_RESIDENT_BYTES = int(0.35 * GB)
+
+    # Activation bytes per latent token (batch x frames x H/8 x W/8) in the UNet
+    UNET_BYTES_PER_TOKEN = 13_000
+    # Attention slicing trades speed for a smaller attention working set
+    SLICED_ATTENTION_FACTOR = 0.6
+    # Activation bytes per decoded pixel in the temporal VAE decoder
+    VAE_BYTES_PER_PIXEL = 1_400
+    # Area a tiled VAE decodes at once
+    VAE_TILE_PIXELS = 512 * 512
+
+    DECODE_CHUNK_SIZES = (14, 8, 4, 2, 1)
+
+    def __init__(self, memory: DeviceMemory, safety_margin: int = int(0.75 * GB),
+                 supports_vae_tiling: bool = False):
+        """
+        Initialize the planner.
+
+        Args:
+            memory: Device memory to plan against
+            safety_margin: Bytes kept free for fragmentation and the CUDA context
+            supports_vae_tiling: Whether the pipeline's VAE implements tiling
+        """
+        self.memory = memory
+        self.safety_margin = safety_margin
+        self.supports_vae_tiling = supports_vae_tiling
+
+    def budget(self) -> int:
+        """Bytes a render may use right now."""
+        return max(self.memory.available_bytes() - self.safety_margin, 0)
+
+    def estimate_peak(self, width: int, height: int, num_frames: int, batch: int,
+                      plan: MemoryPlan) -> int:
+        """
+        Estimate the peak device memory of a render under a plan.
+
+        Args:
+            width: Output width in pixels
+            height: Output height in pixels
+            num_frames: Number of frames
+            batch: UNet batch size (2 with classifier-free guidance)
+            plan: Memory plan to evaluate
+
+        Returns:
+            Estimated peak in bytes
+        """
+        all_weights = self.UNET_BYTES + self.IMAGE_ENCODER_BYTES + self.VAE_BYTES
+        if plan.offload == "none":
+            denoise_resident = decode_resident = all_weights
+        elif plan.offload == "model":
+            denoise_resident, decode_resident = self.UNET_BYTES, self.VAE_BYTES
+        else:
+            denoise_resident = decode_resident = self.SEQUENTIAL_RESIDENT_BYTES
+
+        tokens = batch * num_frames * (width // 8) * (height // 8)
+        unet_activations = tokens * self.UNET_BYTES_PER_TOKEN
+        if plan.attention_slice_size:
+            unet_activations *= self.SLICED_ATTENTION_FACTOR
+
+        chunk = min(plan.decode_chunk_size, num_frames)
+        pixels_per_frame = min(width * height, self.VAE_TILE_PIXELS) if plan.vae_tiling else width * height
+        decode_activations = chunk * pixels_per_frame * self.VAE_BYTES_PER_PIXEL
+
+        return int(max(denoise_resident + unet_activations, decode_resident + decode_activations))
+
+    def candidates(self, num_frames: int) -> List[MemoryPlan]:
+        """All plans from fastest to most frugal."""
+        chunks = sorted({min(size, num_frames) for size in self.DECODE_CHUNK_SIZES}, reverse=True)
+        tilings = (False, True) if self.supports_vae_tiling else (False,)
+        plans = []
+        for offload in OFFLOAD_MODES:
+            # Slice size 1 triggers "invalid configuration argument" CUDA errors with SVD
+            slice_sizes = (2,) if offload == "sequential" else (None, 2)
+            for slice_size in slice_sizes:
+                for tiling in tilings:
+                    for chunk in chunks:
+                        plans.append(MemoryPlan(offload, slice_size, tiling, chunk))
+        return plans
+
+    def plan(self, width: int, height: int, num_frames: int, batch: int = 1) -> MemoryPlan:
+        """
+        Pick the fastest plan that fits the current budget.
+
+        Args:
+            width: Output width in pixels
+            height: Output height in pixels
+            num_frames: Number of frames
+            batch: UNet batch size (2 with classifier-free guidance)
+
+        Returns:
+            Chosen plan (the most frugal one if nothing fits)
+        """
+        budget = self.budget()
+        plans = self.candidates(num_frames)
+        for plan in plans:
+            peak = self.estimate_peak(width, height, num_frames, batch, plan)
+            if peak <= budget:
+                return replace(plan, estimated_peak_bytes=peak)
+
+        frugal = plans[-1]
+        print(f"[MEMORY] No plan fits {budget / GB:.1f}GB for {width}x{height}x{num_frames}, using the most frugal one")
+        return replace(frugal, estimated_peak_bytes=self.estimate_peak(width, height, num_frames, batch, frugal))
+
+    def fallback(self, plan: MemoryPlan, width: int, height: int, num_frames: int,
+                 batch: int = 1) -> Optional[MemoryPlan]:
+        """
+        Next more conservative plan after running out of memory with `plan`.
+
+        Args:
+            plan: Plan that ran out of memory
+            width: Output width in pixels
+            height: Output height in pixels
+            num_frames: Number of frames
+            batch: UNet batch size
+
+        Returns:
+            Plan with a lower estimated peak, or None if there is none left
+        """
+        failed_peak = self.estimate_peak(width, height, num_frames, batch, plan)
+        for candidate in self.candidates(num_frames):
+            peak = self.estimate_peak(width, height, num_frames, batch, candidate)
+            if peak < failed_peak and OFFLOAD_MODES.index(candidate.offload) >= OFFLOAD_MODES.index(plan.offload):
+                return replace(candidate, estimated_peak_bytes=peak)
+        return None
+
+    def decode_fallback(self, plan: MemoryPlan) -> Optional[MemoryPlan]:
+        """
+        Same plan with a smaller decode chunk, for OOM during VAE decoding.
+
+        Args:
+            plan: Plan whose decode ran out of memory
+
+        Returns:
+            Plan with the next smaller decode chunk, or None at chunk size 1
+        """
+        smaller = [size for size in self.DECODE_CHUNK_SIZES if size < plan.decode_chunk_size]
+        if not smaller:
+            return None
+        return replace(plan, decode_chunk_size=smaller[0])
@@ -3,17 +3,61 @@ SVD Renderer module for generating videos from images.
 Uses Stable Video Diffusion XT model with CUDA acceleration.
 Enhanced with advanced optimizations for maximum quality and performance.
 """
+import time
 import torch
 import numpy as np
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 from PIL import Image, ImageFilter, ImageEnhance
-from typing import Optional, Tuple
-from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Tuple
+from dataclasses import dataclass, replace
 from diffusers import StableVideoDiffusionPipeline
 from diffusers.utils import load_image, export_to_video
 import imageio
 import cv2
 
+from .checkpoint import LatentCheckpointer, checkpoint_key
+from .schedulers import DEFAULT_SCHEDULER, create_scheduler
+from .deepcache import UNetFeatureCache
+from .attention import AttentionAutotuner, SLICE_SIZES, apply_attention_backend, available_backends, device_fingerprint
+from .cpu import CpuOptions, autocast as cpu_autocast, optimize_pipeline, plan_threads, resolve_precision
+from .tome import apply_token_merging
+from .upscale import upscale_clip
+from .convergence import Converged, ConvergenceMonitor
+from .compiled import CompileOptions, compile_unet, configure_compile_cache
+from .snapshot import usable_snapshot
+from .memory import CudaDeviceMemory, DeviceMemory, MemoryPlan, MemoryPlanner, system_memory
+
+
+class GenerationCancelled(Exception):
+    """Raised from the step callback when a job is cancelled mid-render."""
+
+
+class GenerationPreempted(Exception):
+    """Raised from the step callback after a render was suspended to a checkpoint."""
+    
+    def __init__(self, completed_steps: int, total_steps: int):
+        super().__init__(f"Suspended after step {completed_steps}/{total_steps}")
+        self.completed_steps = completed_steps
+
+
+class GenerationOutOfMemory(RuntimeError):
+    """Raised when a render runs out of memory even with the most frugal memory plan."""
+    
+    def __init__(self, message: str, fallbacks: list):
+        super().__init__(message)
+        self.fallbacks = fallbacks  # Memory plan fallbacks tried before giving up
+
+
+@dataclass
+class PreviewParams:
+    """Parameters for the low-cost draft rendered before the final video."""
+    output_path: Path
+    steps: int = 6
+    max_side: int = 384  # Longest side of the draft in pixels
+    num_frames: int = 14
+    fps: int = 7
+
 
 @dataclass
 class VideoGenerationParams:
@@ -25,10 +69,24 @@ class VideoGenerationParams:
     motion_preset: str
     fps: int = 24  # Increased from 12 to 24 for smoother video
     steps: int = 40  # Increased from 24 to 40 for better quality
-    guidance_scale: float = 1.0
+    guidance_scale: float = 1.0  # Max CFG scale (last frame); <= 1.0 skips the unconditional pass
+    min_guidance_scale: float = 1.0  # CFG scale of the first frame
+    guidance_steps: int = 0  # Apply CFG only for the first N steps (0 = all steps)
     noise_aug_strength: float = 0.1
     motion_bucket_id: int = 127
     enhance_output: bool = True  # Enable post-processing enhancements
+    checkpoint_dir: Optional[Path] = None  # Where to keep latent checkpoints
+    checkpoint_interval: int = 0  # Save latents every N steps (0 = only when preempted)
+    preview: Optional[PreviewParams] = None  # Render a draft clip first
+    scheduler: str = DEFAULT_SCHEDULER  # Sampler name (see svd.schedulers)
+    seed: Optional[int] = None  # Fixed seed for reproducible renders (None = random)
+    unet_cache_interval: int = 0  # DeepCache full-refresh interval in steps (0 = disabled)
+    render_size: Optional[Tuple[int, int]] = None  # Diffuse at this (width, height), then upscale (None = resolution)
+    render_scale: float = 1.0  # Render at this fraction of the render size, then upscale
+    upscale_sharpen: float = 0.6  # Edge-aware sharpening of upscaled frames (0 = plain bicubic)
+    window_seconds: int = 0  # Render in windows of N seconds chained by their last frame (0 = one pass)
+    token_merge_ratio: float = 0.0  # Fraction of self-attention tokens merged away (0 = disabled)
+    convergence_threshold: float = 0.0  # Jump to the final steps once x0 changes less than this (0 = disabled)
 
 
 class SVDRenderer:
@@ -39,9 +97,17 @@ class SVDRenderer:
     from static images with various motion presets and resolutions.
     """
     
+    # Job the model is placed for at load time (SVD-XT native: 1024x576, 25 frames)
+    REFERENCE_JOB = (1024, 576, 25)
+    
     def __init__(self, model_id: str = "stabilityai/stable-video-diffusion-img2vid-xt",
                  cache_dir: Optional[Path] = None,
-                 device: str = "cuda"):
+                 device: str = "cuda",
+                 memory: Optional[DeviceMemory] = None,
+                 attention_cache: Optional[Path] = None,
+                 compile: Optional[CompileOptions] = None,
+                 snapshot_dir: Optional[Path] = None,
+                 cpu: Optional[CpuOptions] = None):
         """
         Initialize the SVD renderer.
         
@@ -49,11 +115,33 @@ class SVDRenderer:
             model_id: HuggingFace model identifier
             cache_dir: Directory to cache model files
             device: Device to run inference on ('cuda' or 'cpu')
+            memory: Device memory to plan against (defaults to the actual device)
+            attention_cache: JSON file of attention autotune decisions (None = no autotuning)
+            compile: Compile the UNet for these shape buckets (None = eager only)
+            snapshot_dir: Local snapshot baked by bake_snapshot.py, used when present
+            cpu: CPU execution options (used when running on the CPU)
         """
         self.model_id = model_id
         self.cache_dir = cache_dir
         self.device = device
+        self.memory = memory
+        self.attention_cache = attention_cache
+        self.attention_autotuner = None
+        self.compile_options = compile
+        self.snapshot_dir = snapshot_dir
+        self.load_stats = {}  # Source and duration of the last model load
+        self.cpu_options = cpu or CpuOptions()
+        self.cpu_precision = "fp32"  # Precision in effect on the CPU
+        self._eager_unet = None
+        self._compiled_unet = None
         self.pipeline = None
+        self.memory_planner = None
+        self.last_stats = {}  # Details of the last generate_video run
+        self._schedulers = {}  # Scheduler instances by name, built on first use
+        self._memory_plan = None  # Memory plan currently applied to the pipeline
+        self._attention_backend = None  # Attention backend currently set on the UNet
+        self._attention_processors = {}  # Processor instances per backend, reused so compiled graphs stay valid
+        self._token_merge_ratio = 0.0  # Token merging currently wrapped around it
         
         # Check CUDA availability
         if device == "cuda" and not torch.cuda.is_available():
@@ -65,81 +153,60 @@ class SVDRenderer:
         if self.pipeline is not None:
             return
         
-        print(f"[LOADING] SVD model: {self.model_id}")
+        load_started = time.perf_counter()
+        dtype = torch.float16 if self.device == "cuda" else torch.float32
         
-        # Load pipeline with optimal settings for RTX GPU
-        self.pipeline = StableVideoDiffusionPipeline.from_pretrained(
-            self.model_id,
-            cache_dir=self.cache_dir,
-            torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-            variant="fp16" if self.device == "cuda" else None,
-        )
+        if usable_snapshot(self.snapshot_dir, self.model_id, dtype):
+            # Baked snapshot: no hub lookup, no dtype conversion, weights read
+            # from memory-mapped safetensors into uninitialized modules
+            print(f"[LOADING] SVD model: {self.model_id} from snapshot {self.snapshot_dir}")
+            load_source = "snapshot"
+            self.pipeline = StableVideoDiffusionPipeline.from_pretrained(
+                self.snapshot_dir,
+                torch_dtype=dtype,
+                use_safetensors=True,
+                local_files_only=True,
+                low_cpu_mem_usage=True,
+            )
+        else:
+            print(f"[LOADING] SVD model: {self.model_id}")
+            load_source = "hub"
+            # Load pipeline with optimal settings for RTX GPU
+            self.pipeline = StableVideoDiffusionPipeline.from_pretrained(
+                self.model_id,
+                cache_dir=self.cache_dir,
+                torch_dtype=dtype,
+                variant="fp16" if self.device == "cuda" else None,
+            )
+        self._schedulers = {DEFAULT_SCHEDULER: self.pipeline.scheduler}
         
-        # Enable advanced optimizations BEFORE moving to device
+        # Offload / slicing / tiling are chosen per job by the memory planner;
+        # place the model for a full-size clip until the first job arrives
+        self.memory_planner = MemoryPlanner(
+            self.memory or (CudaDeviceMemory() if self.device == "cuda" else system_memory()),
+            supports_vae_tiling=hasattr(self.pipeline.vae, "enable_tiling"),
+        )
         if self.device == "cuda":
-            # Check VRAM - use CPU offload ONLY if absolutely necessary
-            vram_gb = torch.cuda.get_device_properties(0).total_memory / 1024**3
-            print(f"[INFO] GPU VRAM: {vram_gb:.1f}GB")
-            
-            # For RTX 4080 Laptop (12GB) - use regular CPU offload (more stable than sequential)
-            if vram_gb < 16:
-                # Use regular CPU offload for 12GB VRAM to prevent OOM
-                try:
-                    # Regular CPU offload is more stable than sequential
-                    self.pipeline.enable_model_cpu_offload()
-                    print(f"[OK] Enabled CPU offload for {vram_gb:.1f}GB VRAM")
-                    print(f"[INFO] CPU offload prevents OOM by moving components to CPU when not needed")
-                except Exception as e:
-                    print(f"[ERROR] CPU offload failed: {e}")
-                    print(f"[ERROR] This will likely cause OOM errors!")
-                    # Only use GPU directly as last resort
-                    self.pipeline.to(self.device)
-            else:
-                # 16GB+ VRAM - use GPU directly for better performance
-                self.pipeline.to(self.device)
-                print(f"[OK] Model loaded on GPU (no CPU offload for better performance)")
-            
-            # Enable attention slicing for better VRAM management (CRITICAL for 12GB VRAM)
-            # But use larger slice size to avoid CUDA config errors
-            try:
-                # Use slice_size=2 instead of 1 to avoid "invalid configuration argument" error
-                self.pipeline.enable_attention_slicing(2)  # Slice size 2 for memory savings + stability
-                print("[OK] Enabled attention slicing (slice_size=2)")
-            except Exception as e:
-                print(f"[WARN] Attention slicing failed: {e}")
-                # Try disabling attention slicing completely if it causes issues
-                try:
-                    self.pipeline.disable_attention_slicing()
-                    print("[INFO] Disabled attention slicing to avoid CUDA errors")
-                except:
-                    pass
-            
-            # Enable VAE slicing for lower memory usage during decoding (CRITICAL for 12GB VRAM)
-            if hasattr(self.pipeline, 'vae'):
-                try:
-                    self.pipeline.vae.enable_slicing()
-                    self.pipeline.vae.enable_tiling()  # Additional tiling for large images
-                    print("[OK] Enabled VAE slicing and tiling")
-                except Exception as e:
-                    print(f"[WARN] VAE optimization failed: {e}")
+            print(f"[INFO] GPU VRAM: {self.memory_planner.memory.total_bytes() / 1024**3:.1f}GB")
         else:
             self.pipeline.to(self.device)
+            self.cpu_precision = resolve_precision(self.cpu_options.precision)
+            threads = plan_threads(self.cpu_options)
+            optimize_pipeline(self.pipeline, self.cpu_precision, self.cpu_options.channels_last)
+            print(f"[CPU] Precision {self.cpu_precision}, {threads} threads, "
+                  f"channels-last {'on' if self.cpu_options.channels_last else 'off'}")
+        self._memory_plan = None
+        self._attention_backend = None
+        self._attention_processors = {}
+        self._token_merge_ratio = 0.0
+        self._apply_memory_plan(self.memory_planner.plan(*self.REFERENCE_JOB))
+        # Timing every backend costs full UNet passes - only worth it on GPUs
+        if self.attention_cache and self.device == "cuda":
+            self.attention_autotuner = AttentionAutotuner(self.attention_cache, device_fingerprint(self.device))
         
         # Additional optimizations after device placement
         if self.device == "cuda":
-            # DISABLE xformers - it causes "CUDA error: invalid configuration argument"
-            # on RTX 4080 Laptop with SVD model
-            # Use PyTorch native scaled_dot_product_attention instead
-            print("[INFO] Skipping xformers (causes CUDA errors with this GPU/model combo)")
-            print("[INFO] Using PyTorch native attention mechanism")
-            
-            # Explicitly disable xformers if it was enabled elsewhere
-            try:
-                if hasattr(self.pipeline, 'disable_xformers_memory_efficient_attention'):
-                    self.pipeline.disable_xformers_memory_efficient_attention()
-                    print("[OK] xformers explicitly disabled")
-            except:
-                pass
+            # Attention backend (SDPA / xformers / sliced) is autotuned per job shape
             
             # Enable TF32 for Ampere GPUs (RTX 30xx, 40xx) - faster computation
             try:
@@ -152,9 +219,329 @@ class SVDRenderer:
             
             print("[OK] All optimizations enabled")
         
-        print(f"[OK] Model loaded on {self.device}")
+        # Compiled lazily per shape bucket on first call (see warmup_compiled)
+        self._eager_unet = self.pipeline.unet
+        self._compiled_unet = None
+        if self.compile_options:
+            if self.compile_options.cache_dir:
+                configure_compile_cache(self.compile_options.cache_dir)
+            # Room for every bucket with and without CFG, under every attention backend
+            max_shapes = 2 * len(self.compile_options.buckets.shapes()) * len(available_backends())
+            self._compiled_unet = compile_unet(self.pipeline.unet, self.compile_options.mode, max_shapes)
+            print(f"[COMPILE] UNet compiled ({self.compile_options.mode}) for "
+                  f"{len(self.compile_options.buckets.shapes())} shape buckets")
+        
+        self.load_stats = {
+            "source": load_source,
+            "seconds": round(time.perf_counter() - load_started, 2),
+            "loaded_at": time.time(),
+        }
+        print(f"[OK] Model loaded on {self.device} from {load_source} in {self.load_stats['seconds']:.1f}s")
         print(f"     VRAM usage: ~{torch.cuda.memory_allocated() / 1024**3:.2f} GB")
     
+    def _apply_memory_plan(self, plan: MemoryPlan):
+        """
+        Reconfigure the pipeline for a memory plan, changing only what differs.
+        
+        Args:
+            plan: Memory plan to apply
+        """
+        current = self._memory_plan
+        
+        if self.device == "cuda" and (current is None or plan.offload != current.offload):
+            if current is not None and current.offload == "sequential":
+                # Sequentially offloaded weights are not moved back reliably - reload
+                print("[MEMORY] Leaving sequential offload, reloading model...")
+                self.cleanup()
+                self.load_model()
+                current = self._memory_plan
+            if current is None or plan.offload != current.offload:
+                if hasattr(self.pipeline, "remove_all_hooks"):
+                    self.pipeline.remove_all_hooks()
+                if plan.offload == "model":
+                    self.pipeline.enable_model_cpu_offload()
+                elif plan.offload == "sequential":
+                    self.pipeline.enable_sequential_cpu_offload()
+                else:
+                    self.pipeline.to(self.device)
+        
+        # pipeline.enable_attention_slicing() does not reach the SVD UNet (it has no
+        # set_attention_slice) - slicing is an attention processor instead
+        if current is None or plan.attention_slice_size != current.attention_slice_size:
+            self._set_attention_backend(self._attention_candidates(plan)[0])
+        
+        if self.memory_planner.supports_vae_tiling and (current is None or plan.vae_tiling != current.vae_tiling):
+            if plan.vae_tiling:
+                self.pipeline.vae.enable_tiling()
+            else:
+                self.pipeline.vae.disable_tiling()
+        
+        self._memory_plan = plan
+        print(f"[MEMORY] Plan: {plan.describe()}")
+    
+    @staticmethod
+    def _attention_candidates(plan: MemoryPlan) -> list:
+        """Attention backends allowed by a memory plan, the untuned default first."""
+        backends = available_backends()
+        if not plan.attention_slice_size:
+            return backends
+        # Memory-frugal backends only: SDPA and xformers kernels keep attention
+        # memory linear in sequence length, small slices bound the score matrices
+        sliced = [f"sliced_{size}" for size in SLICE_SIZES if size <= plan.attention_slice_size]
+        return sliced + [name for name in backends if not name.startswith("sliced_")]
+    
+    def _apply_attention_processors(self, name: str):
+        """
+        Set the plain processors of a backend on the UNet.
+        
+        The instances of a backend's first use are reused afterwards:
+        compiled graphs are guarded on the processor objects, so fresh
+        instances would recompile a shape every time the backend changes.
+        """
+        processors = self._attention_processors.get(name)
+        if processors is None:
+            apply_attention_backend(self.pipeline.unet, name)
+            self._attention_processors[name] = self.pipeline.unet.attn_processors
+        else:
+            # set_attn_processor consumes the dictionary
+            self.pipeline.unet.set_attn_processor(dict(processors))
+    
+    def _set_attention_backend(self, name: str):
+        if name != self._attention_backend:
+            self._apply_attention_processors(name)
+            self._attention_backend = name
+            self._token_merge_ratio = 0.0  # Plain processors, no merging
+            print(f"[ATTENTION] Backend: {name}")
+    
+    def _set_token_merging(self, ratio: float):
+        """Merge this fraction of self-attention tokens around the current backend (0 = off)."""
+        if ratio == self._token_merge_ratio:
+            return
+        # Start from plain processors of the current backend
+        self._apply_attention_processors(self._attention_backend)
+        if ratio > 0:
+            apply_token_merging(self.pipeline.unet, ratio)
+        self._token_merge_ratio = ratio
+        print(f"[ATTENTION] Token merging: {f'{ratio:.0%} of tokens' if ratio > 0 else 'off'}")
+    
+    def _select_attention(self, plan: MemoryPlan, width: int, height: int, num_frames: int, batch: int,
+                          tune: bool = False) -> str:
+        """
+        Set the fastest attention backend for a render shape.
+        
+        Uses the persisted autotune decision for the shape and candidate
+        set. Shapes without one get the untuned default: timing the
+        candidates costs several UNet passes, so it only happens ahead of
+        jobs (tune=True, see autotune_attention and warmup_compiled).
+        
+        Args:
+            plan: Memory plan in effect (restricts the candidates)
+            width: Render width in pixels
+            height: Render height in pixels
+            num_frames: Number of frames
+            batch: UNet batch size
+            tune: Time the candidates if there is no decision yet
+            
+        Returns:
+            Name of the backend now in use
+        """
+        candidates = self._attention_candidates(plan)
+        if self.attention_autotuner is None:
+            self._set_attention_backend(candidates[0])
+            return candidates[0]
+        
+        shape_key = self.attention_autotuner.shape_key(width, height, num_frames, batch)
+        backend = self.attention_autotuner.lookup(shape_key, candidates)
+        if backend is None and not tune:
+            backend = candidates[0]
+        elif backend is None:
+            # Time every candidate with plain processors; merging wrappers left on
+            # the current backend would skew its time and the cached decision
+            self._set_token_merging(0.0)
+            print(f"[ATTENTION] Autotuning {shape_key} over {', '.join(candidates)}...")
+            backend = self.attention_autotuner.tune(
+                shape_key, candidates, self._attention_probe(width, height, num_frames, batch)
+            )
+        self._set_attention_backend(backend)
+        return backend
+    
+    def _unet_probe_inputs(self, width: int, height: int, num_frames: int, batch: int) -> dict:
+        """Random UNet inputs of a render shape, for timing and warm-up passes."""
+        unet = self._eager_unet
+        device = self.pipeline._execution_device
+        return {
+            "sample": torch.randn(batch, num_frames, unet.config.in_channels, height // 8, width // 8,
+                                  device=device, dtype=unet.dtype),
+            "timestep": torch.tensor(1.0, device=device),
+            "encoder_hidden_states": torch.randn(batch, 1, unet.config.cross_attention_dim,
+                                                 device=device, dtype=unet.dtype),
+            # fps - 1, motion bucket, noise augmentation
+            "added_time_ids": torch.tensor([[6.0, 127.0, 0.02]] * batch, device=device, dtype=unet.dtype),
+            "return_dict": False,
+        }
+    
+    def _attention_probe(self, width: int, height: int, num_frames: int, batch: int) -> Callable[[str], None]:
+        """Build a callable(backend) running one UNet forward pass of the render shape."""
+        inputs = self._unet_probe_inputs(width, height, num_frames, batch)
+        
+        def run(backend: str):
+            self._set_attention_backend(backend)
+            with torch.inference_mode(), self._cpu_precision():
+                self._eager_unet(**inputs)
+            if torch.cuda.is_available():
+                torch.cuda.synchronize()
+        
+        return run
+    
+    def _cpu_precision(self):
+        """bf16 autocast for CPU inference when selected, a no-op otherwise."""
+        if self.device != "cpu":
+            return nullcontext()
+        return cpu_autocast(self.cpu_precision)
+    
+    @contextmanager
+    def _compiled(self, enabled: bool):
+        """Run the pipeline with the compiled UNet for the duration of one call."""
+        if not enabled:
+            yield
+            return
+        self.pipeline.unet = self._compiled_unet
+        try:
+            yield
+        finally:
+            self.pipeline.unet = self._eager_unet
+    
+    def _compile_bucket(self, params: VideoGenerationParams, width: int, height: int, num_frames: int) -> Optional[int]:
+        """
+        Frame count of the compiled UNet's shape bucket for a render.
+        
+        Args:
+            params: Video generation parameters
+            width: Render width in pixels
+            height: Render height in pixels
+            num_frames: Requested number of frames
+            
+        Returns:
+            Bucket frame count, or None if the render runs eagerly: the shape
+            has no bucket, or truncated CFG hooks, DeepCache's block patching
+            or token merging wrappers need the eager UNet
+        """
+        if self._compiled_unet is None:
+            return None
+        if (params.guidance_scale > 1.0 and 0 < params.guidance_steps < params.steps) \
+                or params.unet_cache_interval >= 2 or params.token_merge_ratio > 0:
+            return None
+        return self.compile_options.buckets.snap(width, height, num_frames)
+    
+    def autotune_attention(self, shapes: Iterable[Tuple[int, int, int]], batch: int = 1):
+        """
+        Autotune the attention backend for render shapes ahead of the first job.
+        
+        Used when compiled mode is off (warmup_compiled tunes its buckets
+        itself); shapes already in the decision cache are not timed again.
+        
+        Args:
+            shapes: (width, height, frames) render shapes
+            batch: UNet batch size of the renders (2 with CFG)
+        """
+        self.load_model()
+        if self.attention_autotuner is None:
+            print("[ATTENTION] Autotuning is off, nothing to tune")
+            return
+        
+        for width, height, num_frames in shapes:
+            plan = self.memory_planner.plan(width, height, num_frames, batch)
+            self._apply_memory_plan(plan)
+            self._select_attention(plan, width, height, num_frames, batch, tune=True)
+    
+    def warmup_compiled(self, batch: int = 1):
+        """
+        Compile every shape bucket ahead of the first job.
+        
+        Buckets whose memory plan needs CPU offload are skipped, since
+        those renders run eagerly.
+        
+        Args:
+            batch: UNet batch size of the renders (2 with CFG)
+        """
+        self.load_model()
+        if self._compiled_unet is None:
+            print("[COMPILE] Compiled UNet mode is off, nothing to warm up")
+            return
+        
+        for width, height, num_frames in self.compile_options.buckets.shapes():
+            plan = self.memory_planner.plan(width, height, num_frames, batch)
+            if plan.offload != "none":
+                print(f"[COMPILE] Skipping {width}x{height}x{num_frames}: needs {plan.offload} offload")
+                continue
+            self._apply_memory_plan(plan)
+            self._select_attention(plan, width, height, num_frames, batch, tune=True)
+            # Token merging renders run eagerly (see _compile_bucket)
+            self._set_token_merging(0.0)
+            started = time.perf_counter()
+            try:
+                with torch.inference_mode(), self._cpu_precision():
+                    self._compiled_unet(**self._unet_probe_inputs(width, height, num_frames, batch))
+                print(f"[COMPILE] Warmed {width}x{height}x{num_frames} in {time.perf_counter() - started:.1f}s")
+            except Exception as e:
+                print(f"[COMPILE] Warm-up of {width}x{height}x{num_frames} failed: {type(e).__name__}: {e}")
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+    
+    @staticmethod
+    def _is_out_of_memory(error: Exception) -> bool:
+        """Whether an exception is a device out-of-memory error."""
+        if isinstance(error, torch.cuda.OutOfMemoryError):
+            return True
+        return isinstance(error, RuntimeError) and "out of memory" in str(error).lower()
+    
+    def _decode_latents(self, latents: torch.Tensor, num_frames: int, decode_chunk_size: int) -> list:
+        """
+        Decode denoised latents to RGB frames.
+        
+        Runs separately from the denoising call, so an out-of-memory error
+        while decoding only repeats the decode with a smaller chunk.
+        
+        Args:
+            latents: Latents returned with output_type="latent"
+            num_frames: Number of frames
+            decode_chunk_size: Frames decoded per VAE call
+            
+        Returns:
+            List of uint8 RGB frames
+        """
+        frames = self.pipeline.decode_latents(latents, num_frames, decode_chunk_size)
+        # [batch, channels, frames, height, width] in [-1, 1] -> frames of HxWx3 uint8
+        frames = ((frames[0].permute(1, 2, 3, 0) / 2 + 0.5).clamp(0, 1) * 255).round().to(torch.uint8)
+        if hasattr(self.pipeline, "maybe_free_model_hooks"):
+            self.pipeline.maybe_free_model_hooks()
+        return list(frames.cpu().numpy())
+    
+    def use_scheduler(self, name: str) -> str:
+        """
+        Switch the pipeline to a sampling scheduler.
+        
+        Unknown or unavailable schedulers fall back to the one the model
+        ships with, so a bad quality-mode entry never fails a job.
+        
+        Args:
+            name: Scheduler name (see svd.schedulers.SCHEDULERS)
+            
+        Returns:
+            Name of the scheduler now in use
+        """
+        if name not in self._schedulers:
+            try:
+                self._schedulers[name] = create_scheduler(name, self._schedulers[DEFAULT_SCHEDULER].config)
+            except ValueError as e:
+                print(f"[WARN] {e}, using {DEFAULT_SCHEDULER}")
+                name = DEFAULT_SCHEDULER
+        
+        if self.pipeline.scheduler is not self._schedulers[name]:
+            self.pipeline.scheduler = self._schedulers[name]
+            print(f"[SCHEDULER] Using {name} ({type(self.pipeline.scheduler).__name__})")
+        return name
+    
     def preprocess_image(self, image_path: Path, target_size: Tuple[int, int]) -> Image.Image:
         """
         Load and preprocess input image to target resolution with quality enhancements.
@@ -172,33 +559,35 @@ class SVDRenderer:
         # Resize to target resolution maintaining aspect ratio
         image = image.convert("RGB")
         
-        # Calculate aspect-preserving resize
-        img_width, img_height = image.size
-        target_width, target_height = target_size
-        
-        # Resize and center crop
-        aspect_ratio = img_width / img_height
-        target_aspect = target_width / target_height
-        
-        if aspect_ratio > target_aspect:
-            # Image is wider - fit to height
-            new_height = target_height
-            new_width = int(target_height * aspect_ratio)
-        else:
-            # Image is taller - fit to width
-            new_width = target_width
-            new_height = int(target_width / aspect_ratio)
-        
-        # Use LANCZOS for high-quality downsampling
-        image = image.resize((new_width, new_height), Image.LANCZOS)
-        
-        # Center crop to exact target size
-        left = (new_width - target_width) // 2
-        top = (new_height - target_height) // 2
-        right = left + target_width
-        bottom = top + target_height
-        
-        image = image.crop((left, top, right, bottom))
+        # Backend ingest already scales and crops uploads to the target size
+        if image.size != tuple(target_size):
+            # Calculate aspect-preserving resize
+            img_width, img_height = image.size
+            target_width, target_height = target_size
+            
+            # Resize and center crop
+            aspect_ratio = img_width / img_height
+            target_aspect = target_width / target_height
+            
+            if aspect_ratio > target_aspect:
+                # Image is wider - fit to height
+                new_height = target_height
+                new_width = int(target_height * aspect_ratio)
+            else:
+                # Image is taller - fit to width
+                new_width = target_width
+                new_height = int(target_width / aspect_ratio)
+            
+            # Use LANCZOS for high-quality downsampling
+            image = image.resize((new_width, new_height), Image.LANCZOS)
+            
+            # Center crop to exact target size
+            left = (new_width - target_width) // 2
+            top = (new_height - target_height) // 2
+            right = left + target_width
+            bottom = top + target_height
+            
+            image = image.crop((left, top, right, bottom))
         
         # Enhance image quality before processing
         # Slight sharpening
@@ -280,30 +669,386 @@ class SVDRenderer:
         
         return motion_configs.get(preset, motion_configs["micro"])
     
-    def generate_video(self, params: VideoGenerationParams, progress_callback=None) -> Path:
+    @contextmanager
+    def _resume_from(self, start_step: int, latents: torch.Tensor, final_steps: int = 0):
+        """
+        Make the next pipeline call continue a render from a checkpoint.
+        
+        The SVD pipeline has no "start at step k" option, so for the
+        duration of the call the scheduler's timesteps/sigmas are cut to the
+        remaining steps and prepare_latents returns the checkpointed latents
+        instead of fresh (sigma-scaled) noise. The Euler schedulers keep no
+        state besides sigmas and the step index, so this continues the exact
+        trajectory; multistep solvers restart at first order from the
+        checkpoint.
+        
+        Args:
+            start_step: Number of steps already completed
+            latents: Latents after the last completed step
+            final_steps: Jump from start_step straight to the last
+                final_steps steps of the schedule (0 = run all remaining steps)
+        """
+        pipeline = self.pipeline
+        scheduler = pipeline.scheduler
+        original_set_timesteps = scheduler.set_timesteps
+        original_prepare_latents = pipeline.prepare_latents
+        
+        def set_timesteps(*args, **kwargs):
+            original_set_timesteps(*args, **kwargs)
+            keep = list(range(start_step, len(scheduler.timesteps)))
+            if final_steps:
+                keep = keep[:1] + keep[len(keep) - final_steps + 1:]
+            scheduler.timesteps = scheduler.timesteps[keep]
+            # sigmas has one more entry than timesteps: the final sigma (0)
+            scheduler.sigmas = torch.cat([scheduler.sigmas[keep], scheduler.sigmas[-1:]])
+        
+        def prepare_latents(*args, **kwargs):
+            fresh = original_prepare_latents(*args, **kwargs)
+            return latents.to(device=fresh.device, dtype=fresh.dtype)
+        
+        scheduler.set_timesteps = set_timesteps
+        pipeline.prepare_latents = prepare_latents
+        try:
+            yield
+        finally:
+            # Drop the instance overrides, exposing the class methods again
+            del scheduler.set_timesteps
+            del pipeline.prepare_latents
+    
+    @contextmanager
+    def _recorded_denoised(self, record: dict):
+        """
+        Keep the scheduler's x0 prediction of each step in record["x0"].
+        
+        The pipeline only uses prev_sample of the step output; the
+        denoised estimate the sampler computed is captured for the
+        convergence monitor.
+        
+        Args:
+            record: Dictionary receiving the latest pred_original_sample
+        """
+        scheduler = self.pipeline.scheduler
+        original_step = scheduler.step
+        
+        def step(*args, **kwargs):
+            output = original_step(*args, **kwargs)
+            if not isinstance(output, tuple):
+                record["x0"] = output.pred_original_sample
+            return output
+        
+        scheduler.step = step
+        try:
+            yield
+        finally:
+            del scheduler.step
+    
+    @contextmanager
+    def _shared_image_embeddings(self, cache: dict):
+        """
+        Serve repeated CLIP encodings of the conditioning image from cache.
+        
+        The image embedding does not depend on the output resolution (the
+        encoder resizes to 224x224), so the draft and the final pass of a job
+        can share it as long as both get the same PIL image. Only the
+        conditional embedding is cached: the guidance-free draft and a final
+        pass with CFG add the zero unconditional half on top of it, as the
+        pipeline does.
+        
+        Args:
+            cache: Dictionary shared by all pipeline calls of one job
+        """
+        pipeline = self.pipeline
+        original_encode_image = pipeline._encode_image
+        
+        def encode_image(image, device, num_videos_per_prompt, do_classifier_free_guidance):
+            key = (id(image), num_videos_per_prompt)
+            if key not in cache:
+                cache[key] = original_encode_image(image, device, num_videos_per_prompt, False)
+            image_embeddings = cache[key]
+            if do_classifier_free_guidance:
+                image_embeddings = torch.cat([torch.zeros_like(image_embeddings), image_embeddings])
+            return image_embeddings
+        
+        pipeline._encode_image = encode_image
+        try:
+            yield
+        finally:
+            del pipeline._encode_image
+    
+    @contextmanager
+    def _truncated_guidance(self, state: dict):
+        """
+        Drop the unconditional UNet pass once state["active"] is set.
+        
+        The pipeline decides on CFG once per call and keeps the doubled
+        conditioning batch for every step. While active, the UNet hooks run
+        only the conditional half and return its prediction for both halves,
+        so uncond + scale * (cond - uncond) reduces to cond at half the cost.
+        
+        Args:
+            state: Dictionary with an "active" flag, flipped by the step callback
+        """
+        def conditional_half(value):
+            # Batched inputs are [uncond, cond]; the timestep is a 0-dim tensor
+            if isinstance(value, torch.Tensor) and value.dim() > 0:
+                return value.chunk(2)[1]
+            return value
+        
+        def conditional_only(module, args, kwargs):
+            if not state["active"]:
+                return None
+            return tuple(conditional_half(arg) for arg in args), {key: conditional_half(value) for key, value in kwargs.items()}
+        
+        def duplicate_prediction(module, args, output):
+            if not state["active"]:
+                return None
+            if isinstance(output, tuple):
+                return (torch.cat([output[0]] * 2),) + output[1:]
+            output.sample = torch.cat([output.sample] * 2)
+            return output
+        
+        unet = self.pipeline.unet
+        handles = [
+            unet.register_forward_pre_hook(conditional_only, with_kwargs=True),
+            unet.register_forward_hook(duplicate_prediction),
+        ]
+        try:
+            yield
+        finally:
+            for handle in handles:
+                handle.remove()
+    
+    @staticmethod
+    def _scaled_size(resolution: Tuple[int, int], max_side: int) -> Tuple[int, int]:
+        """Size with the given aspect ratio and longest side, in multiples of 64 pixels."""
+        width, height = resolution
+        scale = min(1.0, max_side / max(width, height))
+        return max(64, int(width * scale) // 64 * 64), max(64, int(height * scale) // 64 * 64)
+    
+    def _render_preview(self, image: Image.Image, params: VideoGenerationParams,
+                        motion_config: dict, seed: int, image_embeddings: dict,
+                        cancel_check: Optional[Callable[[], bool]] = None) -> Path:
+        """
+        Render and encode the draft clip of a job.
+        
+        Args:
+            image: Preprocessed conditioning image (shared with the final pass)
+            params: Video generation parameters with params.preview set
+            motion_config: Motion preset parameters
+            seed: Seed of the final render
+            image_embeddings: Image embedding cache shared with the final pass
+            cancel_check: Optional cancellation check polled at every step
+            
+        Returns:
+            Path to the encoded draft
+        """
+        preview = params.preview
+        width, height = self._scaled_size(params.resolution, preview.max_side)
+        print(f"[PREVIEW] Draft: {preview.steps} steps, {preview.num_frames} frames @ {width}x{height}")
+        
+        def step_callback(pipe, step_index, timestep, callback_kwargs):
+            if cancel_check and cancel_check():
+                raise GenerationCancelled(f"Cancelled during preview step {step_index + 1}/{preview.steps}")
+            return callback_kwargs
+        
+        with torch.inference_mode(), self._cpu_precision(), self._shared_image_embeddings(image_embeddings):
+            result = self.pipeline(
+                image=image,
+                height=height,
+                width=width,
+                num_frames=preview.num_frames,
+                num_inference_steps=preview.steps,
+                fps=preview.fps,
+                motion_bucket_id=motion_config["motion_bucket_id"],
+                noise_aug_strength=motion_config.get("noise_aug_strength", params.noise_aug_strength),
+                # The draft only shows the motion - skip the unconditional pass
+                min_guidance_scale=1.0,
+                max_guidance_scale=1.0,
+                decode_chunk_size=preview.num_frames,
+                generator=torch.Generator("cpu").manual_seed(seed),
+                callback_on_step_end=step_callback,
+                callback_on_step_end_tensor_inputs=["latents"],
+            )
+        
+        preview.output_path.parent.mkdir(parents=True, exist_ok=True)
+        # Small and fast: the draft only has to be good enough to judge the motion
+        imageio.mimsave(
+            str(preview.output_path),
+            [np.array(frame) for frame in result.frames[0]],
+            fps=preview.fps,
+            codec='libx264',
+            pixelformat='yuv420p',
+            macro_block_size=1,
+            ffmpeg_params=['-crf', '30', '-preset', 'veryfast', '-movflags', '+faststart']
+        )
+        print(f"[PREVIEW] Saved draft to {preview.output_path}")
+        return preview.output_path
+    
+    def generate_video(self, params: VideoGenerationParams, progress_callback=None,
+                       cancel_check: Optional[Callable[[], bool]] = None,
+                       preempt_check: Optional[Callable[[], bool]] = None,
+                       preview_callback: Optional[Callable[[Path], None]] = None) -> Path:
         """
         Generate video from image using SVD model.
         
         Args:
             params: Video generation parameters
             progress_callback: Optional callback function(step, total_steps) for progress updates
+            cancel_check: Optional callable polled at every denoising step;
+                returning True aborts the render
+            preempt_check: Optional callable polled at every denoising step;
+                returning True suspends the render to a checkpoint (needs
+                params.checkpoint_dir) so it can be resumed later
+            preview_callback: Optional callback function(preview_path) called
+                once the draft clip (params.preview) is written
             
         Returns:
             Path to generated video file
+            
+        Raises:
+            GenerationCancelled: If cancel_check requested cancellation
+            GenerationPreempted: If preempt_check suspended the render
+        """
+        if params.window_seconds and params.duration > params.window_seconds:
+            frames = self._render_windows(params, progress_callback, cancel_check, preview_callback)
+        else:
+            frames = self._render_frames(params, progress_callback, cancel_check, preempt_check, preview_callback)
+        
+        # Save video to file using imageio with ffmpeg
+        print(f"[SAVING] Video to {params.output_path}")
+        
+        # Ensure output directory exists
+        params.output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Upscale the whole clip at once, so sharpening is consistent across frames
+        height, width = frames[0].shape[:2]
+        if (width, height) != tuple(params.resolution):
+            started = time.perf_counter()
+            frames = upscale_clip(frames, tuple(params.resolution), params.upscale_sharpen)
+            self.last_stats["upscaled_from"] = [width, height]
+            print(f"[SCALE] Upscaled {len(frames)} frames in {time.perf_counter() - started:.1f}s")
+        
+        # Apply post-processing enhancements if enabled
+        if params.enhance_output:
+            frames = [self.enhance_frame(frame) for frame in frames]
+        
+        self._encode_video(frames, params.output_path, params.fps)
+        
+        print(f"[SUCCESS] Video generated: {params.output_path}")
+        print(f"           Frames: {len(frames)}, FPS: {params.fps}, Duration: {params.duration}s")
+        
+        return params.output_path
+    
+    def _render_frames(self, params: VideoGenerationParams, progress_callback=None,
+                       cancel_check: Optional[Callable[[], bool]] = None,
+                       preempt_check: Optional[Callable[[], bool]] = None,
+                       preview_callback: Optional[Callable[[Path], None]] = None,
+                       image: Optional[Image.Image] = None) -> list:
+        """
+        Denoise and decode one clip, without upscaling or encoding it.
+        
+        Args:
+            params: Video generation parameters
+            progress_callback: Optional callback function(step, total_steps) for progress updates
+            cancel_check: Optional callable polled at every denoising step
+            preempt_check: Optional callable polled at every denoising step
+            preview_callback: Optional callback function(preview_path) for the draft
+            image: Conditioning image at the render size (default: params.image_path, preprocessed)
+            
+        Returns:
+            List of uint8 RGB frames at the internal render size
+            
+        Raises:
+            GenerationCancelled: If cancel_check requested cancellation
+            GenerationPreempted: If preempt_check suspended the render
         """
         # Ensure model is loaded
         self.load_model()
         
+        # Internal render size; frames are upscaled to params.resolution after decoding
+        width, height = params.render_size or params.resolution
+        if params.render_scale < 1.0:
+            width, height = self._scaled_size((width, height), int(max(width, height) * params.render_scale))
+        if (width, height) != tuple(params.resolution):
+            print(f"[SCALE] Rendering at {width}x{height}, upscaling to {params.resolution[0]}x{params.resolution[1]}")
+        
+        # Fit offload/slicing/decode chunking to this job before anything else
+        # touches the pipeline (leaving sequential offload reloads it)
+        # A compiled UNet renders the shape bucket's frame count; extra frames are trimmed.
+        # Offloaded renders run eagerly, so they render the requested frames only
+        requested_frames = params.duration * params.fps
+        batch = 2 if params.guidance_scale > 1.0 else 1
+        compile_bucket = self._compile_bucket(params, width, height, requested_frames)
+        num_frames = compile_bucket or requested_frames
+        memory_plan = self.memory_planner.plan(width, height, num_frames, batch)
+        if compile_bucket and memory_plan.offload != "none":
+            compile_bucket = None
+            num_frames = requested_frames
+            memory_plan = self.memory_planner.plan(width, height, num_frames, batch)
+        self._apply_memory_plan(memory_plan)
+        attention_backend = self._select_attention(memory_plan, width, height, num_frames, batch)
+        self._set_token_merging(params.token_merge_ratio)
+        
         print(f"[GENERATING] Video: {params.duration}s @ {params.resolution[0]}x{params.resolution[1]}")
         
-        # Preprocess input image
-        image = self.preprocess_image(params.image_path, params.resolution)
+        # Preprocess input image (a window of a windowed render gets the previous window's last frame)
+        if image is None:
+            image = self.preprocess_image(params.image_path, (width, height))
+        elif image.size != (width, height):
+            image = image.resize((width, height), Image.LANCZOS)
         
         # Apply motion preset
         motion_config = self.apply_motion_preset(params.motion_preset)
         
-        # Calculate number of frames
-        num_frames = params.duration * params.fps
+        self.last_stats = {"steps": params.steps, "resumed_from_step": 0}
+        self.last_stats["memory_plan"] = memory_plan.describe()
+        self.last_stats["memory_fallbacks"] = []
+        self.last_stats["attention"] = attention_backend
+        self.last_stats["token_merge_ratio"] = params.token_merge_ratio
+        self.last_stats["scheduler"] = self.use_scheduler(params.scheduler)
+        
+        # Resume from a latent checkpoint left by an interrupted attempt
+        checkpointer = None
+        checkpoint = None
+        seed = params.seed if params.seed is not None else int(torch.randint(0, 2**31 - 1, (1,)).item())
+        if params.checkpoint_dir:
+            checkpointer = LatentCheckpointer(params.checkpoint_dir, checkpoint_key(params), params.checkpoint_interval)
+            checkpoint = checkpointer.load()
+            if checkpoint and checkpoint["latents"].shape[1] != num_frames:
+                # Saved under a different frame bucket configuration
+                print(f"[CHECKPOINT] Discarding checkpoint with {checkpoint['latents'].shape[1]} frames")
+                checkpoint = None
+            if checkpoint:
+                seed = checkpoint["seed"]
+                self.last_stats["resumed_from_step"] = checkpoint["step"]
+                print(f"[CHECKPOINT] Resuming from step {checkpoint['step']}/{params.steps}")
+        start_step = checkpoint["step"] if checkpoint else 0
+        self.last_stats["seed"] = seed
+        
+        # CFG doubles the UNet batch; skip it entirely at scale <= 1.0, or
+        # stop it after guidance_steps (truncated guidance)
+        use_cfg = params.guidance_scale > 1.0
+        truncate_cfg = use_cfg and 0 < params.guidance_steps < params.steps
+        guidance_state = {}
+        cfg_steps = (params.guidance_steps if truncate_cfg else params.steps) if use_cfg else 0
+        self.last_stats["cfg_steps"] = cfg_steps
+        print(f"[GUIDANCE] Scale {params.min_guidance_scale}-{params.guidance_scale}, CFG for {cfg_steps}/{params.steps} steps")
+        
+        # Jump to the final steps once the denoised estimate stops changing
+        monitor = None
+        denoised = {}  # x0 of the latest step, recorded from the scheduler
+        converged_at = None  # Step the early exit happened after
+        converged_latents = None
+        jumped = False  # Current pipeline call runs the final steps after an early exit
+        if params.convergence_threshold > 0:
+            monitor = ConvergenceMonitor(params.convergence_threshold, params.steps)
+            print(f"[CONVERGENCE] Early exit below {params.convergence_threshold}, "
+                  f"earliest after step {monitor.min_steps}, then {monitor.final_steps} final steps")
+        
+        # Reuse deep UNet features between full refreshes
+        feature_cache = None
+        if params.unet_cache_interval >= 2:
+            print(f"[CACHE] UNet feature cache, full refresh every {params.unet_cache_interval} steps")
         
         # Generate video frames using the pipeline
         print(f"[INFERENCE] Running with {params.steps} steps, {num_frames} frames...")
@@ -311,9 +1056,27 @@ class SVDRenderer:
         
         # Create callback wrapper for progress
         def step_callback(pipe, step_index, timestep, callback_kwargs):
+            # step_index restarts at 0 when resuming from a checkpoint or after an early exit
+            if jumped:
+                completed = params.steps - monitor.final_steps + step_index + 1
+            else:
+                completed = start_step + step_index + 1
             if progress_callback:
-                progress_callback(step_index + 1, params.steps)
-            print(f"   Step {step_index + 1}/{params.steps} completed")
+                progress_callback(completed, params.steps)
+            print(f"   Step {completed}/{params.steps} completed")
+            if truncate_cfg and completed >= params.guidance_steps:
+                guidance_state["active"] = True
+            if checkpointer and checkpointer.should_save(completed, params.steps):
+                checkpointer.save(completed, callback_kwargs["latents"], seed)
+            # Stop at the step boundary instead of finishing the whole render
+            if cancel_check and cancel_check():
+                raise GenerationCancelled(f"Cancelled after step {completed}/{params.steps}")
+            # Yield the GPU: persist latents (scheduler state is the step count) and stop
+            if checkpointer and completed < params.steps and preempt_check and preempt_check():
+                checkpointer.save(completed, callback_kwargs["latents"], seed)
+                raise GenerationPreempted(completed, params.steps)
+            if monitor and converged_at is None and monitor.update(denoised["x0"], completed):
+                raise Converged(completed, callback_kwargs["latents"])
             return callback_kwargs
         
         # Force GPU usage for inference
@@ -340,6 +1103,24 @@ class SVDRenderer:
             else:
                 raise TypeError(f"Expected PIL.Image, got {type(image)}")
         
+        # CLIP embedding of the conditioning image, computed once per job
+        image_embeddings = {}
+        
+        # Draft first, so the user sees the motion long before the final render.
+        # A resumed render already delivered its draft.
+        if params.preview and not checkpoint:
+            try:
+                preview_path = self._render_preview(image, params, motion_config, seed,
+                                                    image_embeddings, cancel_check)
+                self.last_stats["preview_steps"] = params.preview.steps
+                if preview_callback:
+                    preview_callback(preview_path)
+            except GenerationCancelled:
+                raise
+            except Exception as e:
+                # The draft is best effort - never fail the job because of it
+                print(f"[WARN] Preview render failed: {e}")
+        
         try:
             with torch.inference_mode():
                 # NEVER call pipeline.to() when using CPU offload - it causes meta tensor errors
@@ -351,22 +1132,113 @@ class SVDRenderer:
                 
                 # Call pipeline with error handling
                 try:
-                    result = self.pipeline(
-                        image=image,
-                        num_frames=num_frames,
-                        num_inference_steps=params.steps,
-                        fps=params.fps,
-                        motion_bucket_id=motion_config["motion_bucket_id"],
-                        noise_aug_strength=motion_config.get("noise_aug_strength", params.noise_aug_strength),
-                        decode_chunk_size=4,  # Reduced from 8 to 4 for less memory usage
-                        callback_on_step_end=step_callback,
-                        callback_on_step_end_tensor_inputs=["latents"],
-                    )
+                    # Denoise to latents; on OOM step down the memory plan and retry,
+                    # from the last latent checkpoint if there is one
+                    while True:
+                        # Seeded so a resumed or retried run reuses the same conditioning noise
+                        generator = torch.Generator("cpu").manual_seed(seed)
+                        # A checkpoint saved during the final steps is further along than the early exit
+                        jumped = converged_at is not None and not (checkpoint and start_step > converged_at)
+                        resumed_at = converged_at if jumped else start_step
+                        guidance_state["active"] = truncate_cfg and resumed_at >= params.guidance_steps
+                        if params.unet_cache_interval >= 2:
+                            feature_cache = UNetFeatureCache(self.pipeline.unet, params.unet_cache_interval)
+                        if monitor:
+                            monitor.reset()
+                        try:
+                            if jumped:
+                                resume = self._resume_from(converged_at, converged_latents, monitor.final_steps)
+                            elif checkpoint:
+                                resume = self._resume_from(start_step, checkpoint["latents"])
+                            else:
+                                resume = nullcontext()
+                            truncation = self._truncated_guidance(guidance_state) if truncate_cfg else nullcontext()
+                            caching = feature_cache.enabled() if feature_cache else nullcontext()
+                            recording = self._recorded_denoised(denoised) if monitor else nullcontext()
+                            # Offload hooks (e.g. after an OOM fallback) need the eager UNet
+                            use_compiled = compile_bucket is not None and memory_plan.offload == "none"
+                            self.last_stats["compiled_unet"] = use_compiled
+                            with resume, truncation, caching, recording, self._compiled(use_compiled), \
+                                    self._cpu_precision(), self._shared_image_embeddings(image_embeddings):
+                                result = self.pipeline(
+                                    image=image,
+                                    num_frames=num_frames,
+                                    num_inference_steps=params.steps,
+                                    fps=params.fps,
+                                    motion_bucket_id=motion_config["motion_bucket_id"],
+                                    noise_aug_strength=motion_config.get("noise_aug_strength", params.noise_aug_strength),
+                                    min_guidance_scale=min(params.min_guidance_scale, params.guidance_scale) if use_cfg else 1.0,
+                                    max_guidance_scale=params.guidance_scale if use_cfg else 1.0,
+                                    decode_chunk_size=memory_plan.decode_chunk_size,
+                                    generator=generator,
+                                    output_type="latent",
+                                    callback_on_step_end=step_callback,
+                                    callback_on_step_end_tensor_inputs=["latents"],
+                                )
+                            break
+                        except Converged as converged:
+                            converged_at, converged_latents = converged.completed_steps, converged.latents
+                            print(f"[CONVERGENCE] Converged after step {converged_at}/{params.steps}, "
+                                  f"skipping to the last {monitor.final_steps} steps")
+                            continue
+                        except Exception as e:
+                            if not self._is_out_of_memory(e):
+                                raise
+                            fallback = self.memory_planner.fallback(memory_plan, width, height, num_frames, batch)
+                            if fallback is None:
+                                raise
+                        # Outside the except block, so the traceback no longer pins activations
+                        print(f"[MEMORY] Out of memory while denoising, retrying with: {fallback.describe()}")
+                        self.last_stats["memory_fallbacks"].append({"phase": "denoise", "plan": fallback.describe()})
+                        if torch.cuda.is_available():
+                            torch.cuda.empty_cache()
+                        memory_plan = fallback
+                        self._apply_memory_plan(memory_plan)
+                        self.last_stats["attention"] = self._select_attention(memory_plan, width, height, num_frames, batch)
+                        self._set_token_merging(params.token_merge_ratio)
+                        if checkpointer:
+                            checkpoint = checkpointer.load() or checkpoint
+                            start_step = checkpoint["step"] if checkpoint else 0
                     
-                    print(f"[INFERENCE] Pipeline call completed, extracting frames...")
-                    frames = result.frames[0]
+                    self.last_stats["steps_used"] = (converged_at + monitor.final_steps if converged_at is not None
+                                                     else params.steps)
+                    if monitor:
+                        self.last_stats["converged_at_step"] = converged_at
+                        self.last_stats["convergence_trace"] = monitor.trace
+                    
+                    # Decode separately, so a decode OOM only repeats the decode
+                    print(f"[INFERENCE] Pipeline call completed, decoding frames...")
+                    while True:
+                        try:
+                            with self._cpu_precision():
+                                frames = self._decode_latents(result.frames, num_frames, memory_plan.decode_chunk_size)
+                            break
+                        except Exception as e:
+                            if not self._is_out_of_memory(e):
+                                raise
+                            fallback = self.memory_planner.decode_fallback(memory_plan)
+                            if fallback is None:
+                                raise
+                        print(f"[MEMORY] Out of memory while decoding, retrying with decode chunk {fallback.decode_chunk_size}")
+                        self.last_stats["memory_fallbacks"].append({"phase": "decode", "plan": fallback.describe()})
+                        if torch.cuda.is_available():
+                            torch.cuda.empty_cache()
+                        memory_plan = fallback
+                    self.last_stats["memory_plan"] = memory_plan.describe()
+                    if len(frames) > requested_frames:
+                        print(f"[COMPILE] Trimming {num_frames}-frame bucket to {requested_frames} frames")
+                        frames = frames[:requested_frames]
                     print(f"[INFERENCE] Got {len(frames)} frames")
                     
+                    if feature_cache:
+                        self.last_stats["unet_cached_calls"] = feature_cache.cached_calls
+                    
+                    if checkpointer:
+                        checkpointer.clear()
+                    
+                except (GenerationCancelled, GenerationPreempted, GenerationOutOfMemory):
+                    raise
+                    
                 except RuntimeError as e:
                     error_msg = str(e)
                     print(f"[ERROR] RuntimeError in pipeline call: {error_msg}")
@@ -377,6 +1249,10 @@ class SVDRenderer:
                         if torch.cuda.is_available():
                             print(f"[ERROR] GPU memory allocated: {torch.cuda.memory_allocated() / 1024**3:.2f}GB")
                             print(f"[ERROR] GPU memory reserved: {torch.cuda.memory_reserved() / 1024**3:.2f}GB")
+                        if self._is_out_of_memory(e):
+                            # Every memory plan failed - the caller may retry with cheaper parameters
+                            raise GenerationOutOfMemory(f"GPU memory error: {error_msg}",
+                                                        self.last_stats["memory_fallbacks"])
                         raise RuntimeError(f"GPU memory error: {error_msg}. Try reducing resolution or duration.")
                     
                     # Check for configuration errors
@@ -395,6 +1271,22 @@ class SVDRenderer:
                     print(f"[ERROR] Error details: {repr(e)}")
                     raise RuntimeError(f"Pipeline generation failed: {error_type}: {error_msg}") from e
         
+        except GenerationCancelled as cancelled:
+            print(f"[CANCELLED] {cancelled}")
+            # A cancelled job is never resumed
+            if checkpointer:
+                checkpointer.clear()
+            # Release activations of the aborted run right away
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            raise
+        
+        except GenerationPreempted as preempted:
+            print(f"[PREEMPTED] {preempted}")
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            raise
+        
         except Exception as pipeline_error:
             # Log full error context
             print(f"[FATAL] Video generation pipeline failed!")
@@ -419,33 +1311,24 @@ class SVDRenderer:
             torch.cuda.synchronize()
             print(f"[GPU] After cleanup: {torch.cuda.memory_allocated() / 1024**3:.2f}GB allocated")
         
-        # Save video to file using imageio with ffmpeg
-        print(f"[SAVING] Video to {params.output_path}")
-        
-        # Ensure output directory exists
-        params.output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Convert frames to numpy arrays and apply enhancements
-        frame_array = []
-        for idx, frame in enumerate(frames):
-            if isinstance(frame, Image.Image):
-                frame_np = np.array(frame)
-            else:
-                frame_np = frame
-            
-            # Apply post-processing enhancements if enabled
-            if params.enhance_output:
-                frame_np = self.enhance_frame(frame_np)
-            
-            frame_array.append(frame_np)
+        return frames
+    
+    def _encode_video(self, frames: list, output_path: Path, fps: int):
+        """
+        Encode frames to the final MP4.
         
+        Args:
+            frames: List of uint8 RGB frames
+            output_path: Output file
+            fps: Frames per second
+        """
         print(f"[ENCODING] Using high-quality H.264 encoding...")
         
         # Save as MP4 using imageio-ffmpeg with maximum quality settings
         imageio.mimsave(
-            str(params.output_path),
-            frame_array,
-            fps=params.fps,
+            str(output_path),
+            frames,
+            fps=fps,
             codec='libx264',
             quality=10,  # Maximum quality (0-10 scale)
             pixelformat='yuv420p',
@@ -455,13 +1338,72 @@ class SVDRenderer:
                 '-preset', 'slow',  # Slower encoding for better compression
                 '-tune', 'film',  # Optimize for film content
                 '-movflags', '+faststart',  # Enable fast start for web playback
-            ]
+            ] + (['-threads', str(self.cpu_options.encode_threads)]
+                 if self.device == "cpu" and self.cpu_options.encode_threads > 0 else [])
         )
+    
+    def _render_windows(self, params: VideoGenerationParams, progress_callback=None,
+                        cancel_check: Optional[Callable[[], bool]] = None,
+                        preview_callback: Optional[Callable[[Path], None]] = None) -> list:
+        """
+        Render a clip as consecutive windows of params.window_seconds.
         
-        print(f"[SUCCESS] Video generated: {params.output_path}")
-        print(f"           Frames: {len(frame_array)}, FPS: {params.fps}, Duration: {params.duration}s")
+        Each window is conditioned on the last decoded frame of the previous
+        one, kept in memory at the render size, so frames are encoded only
+        once for the joined clip. Peak memory follows the frames per pass,
+        so this trades some coherence at the window seams for a much
+        smaller footprint. Windowed renders are not preempted or
+        checkpointed.
         
-        return params.output_path
+        Args:
+            params: Video generation parameters with window_seconds set
+            progress_callback: Optional callback function(step, total_steps) over all windows
+            cancel_check: Optional callable polled at every denoising step
+            preview_callback: Optional callback function(preview_path) for the draft
+            
+        Returns:
+            List of uint8 RGB frames at the internal render size
+        """
+        windows = []
+        remaining = params.duration
+        while remaining > 0:
+            windows.append(min(params.window_seconds, remaining))
+            remaining -= windows[-1]
+        print(f"[WINDOWS] Rendering {params.duration}s as {len(windows)} windows of {windows}s")
+        
+        seed = params.seed if params.seed is not None else int(torch.randint(0, 2**31 - 1, (1,)).item())
+        frames = []
+        memory_fallbacks = []
+        steps_used = 0
+        image = None
+        for index, seconds in enumerate(windows):
+            window_params = replace(
+                params,
+                duration=seconds,
+                window_seconds=0,
+                seed=seed + index,
+                checkpoint_dir=None,
+                preview=params.preview if index == 0 else None,
+            )
+            
+            def on_progress(step, total_steps, index=index):
+                if progress_callback:
+                    progress_callback(index * total_steps + step, total_steps * len(windows))
+            
+            print(f"[WINDOWS] Window {index + 1}/{len(windows)}: {seconds}s")
+            segment = self._render_frames(window_params, on_progress, cancel_check, None, preview_callback, image)
+            memory_fallbacks.extend(self.last_stats.get("memory_fallbacks", []))
+            steps_used += self.last_stats.get("steps_used", params.steps)
+            
+            # The first frame of a later window repeats the frame it was conditioned on
+            frames.extend(segment if index == 0 else segment[1:])
+            image = Image.fromarray(segment[-1])
+        
+        self.last_stats["windows"] = len(windows)
+        self.last_stats["memory_fallbacks"] = memory_fallbacks
+        self.last_stats["steps_used"] = steps_used  # Over all windows
+        self.last_stats["seed"] = seed
+        return frames
     
     def cleanup(self):
         """Free up GPU memory by unloading the model."""
@@ -494,13 +1436,21 @@ _renderer_instance: Optional[SVDRenderer] = None
 
 
 def get_renderer(model_id: str = "stabilityai/stable-video-diffusion-img2vid-xt",
-                 cache_dir: Optional[Path] = None) -> SVDRenderer:
+                 cache_dir: Optional[Path] = None,
+                 attention_cache: Optional[Path] = None,
+                 compile: Optional[CompileOptions] = None,
+                 snapshot_dir: Optional[Path] = None,
+                 cpu: Optional[CpuOptions] = None) -> SVDRenderer:
     """
     Get or create singleton renderer instance.
     
     Args:
         model_id: HuggingFace model identifier
         cache_dir: Cache directory for models
+        attention_cache: JSON file of attention autotune decisions (None = no autotuning)
+        compile: Compile the UNet for these shape buckets (None = eager only)
+        snapshot_dir: Local snapshot baked by bake_snapshot.py, used when present
+        cpu: CPU execution options (used when running on the CPU)
         
     Returns:
         SVDRenderer instance
@@ -509,7 +1459,9 @@ def get_renderer(model_id: str = "stabilityai/stable-video-diffusion-img2vid-xt"
     
     if _renderer_instance is None:
         print("[RENDERER] Creating new renderer instance...")
-        _renderer_instance = SVDRenderer(model_id=model_id, cache_dir=cache_dir)
+        _renderer_instance = SVDRenderer(model_id=model_id, cache_dir=cache_dir,
+                                         attention_cache=attention_cache, compile=compile,
+                                         snapshot_dir=snapshot_dir, cpu=cpu)
         _renderer_instance.load_model()
         print("[RENDERER] Renderer instance created and model loaded")
     else:
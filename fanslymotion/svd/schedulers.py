@@ -0,0 +1,96 @@
+"""
+Sampling schedulers for the SVD pipeline.
+Maps scheduler names used in VideoConfig.QUALITY_MODES to diffusers
+scheduler classes configured for SVD's EDM-style v-prediction.
+"""
+import torch
+from diffusers import EulerDiscreteScheduler
+from diffusers.schedulers.scheduling_euler_discrete import EulerDiscreteSchedulerOutput
+
+
+class DPMSolverPlusPlus2MScheduler(EulerDiscreteScheduler):
+    """
+    DPM-Solver++(2M) on the Euler scheduler's sigma schedule.
+
+    diffusers' own DPMSolverMultistepScheduler works on discrete VP
+    timesteps, which the SVD UNet (conditioned on 0.25 * log(sigma)) cannot
+    use. This keeps everything the pipeline sees from the model's Euler
+    config (karras sigmas, continuous timesteps, input scaling) and only
+    replaces the update rule with the second-order multistep one
+    (k-diffusion's sample_dpmpp_2m). The only extra state is the previous
+    step's denoised prediction, reset by set_timesteps, so a render resumed
+    from a checkpoint restarts at first order.
+    """
+
+    def set_timesteps(self, *args, **kwargs):
+        super().set_timesteps(*args, **kwargs)
+        self._previous_denoised = None
+
+    def step(self, model_output, timestep, sample, generator=None, return_dict: bool = True, **kwargs):
+        if self.step_index is None:
+            self._init_step_index(timestep)
+
+        sample = sample.to(torch.float32)
+        sigma = self.sigmas[self.step_index]
+        sigma_next = self.sigmas[self.step_index + 1]
+
+        # v-prediction preconditioning with sigma_data = 1 (same as Euler)
+        denoised = model_output * (-sigma / (sigma**2 + 1) ** 0.5) + sample / (sigma**2 + 1)
+
+        previous = getattr(self, "_previous_denoised", None)
+        if sigma_next == 0:
+            prev_sample = denoised
+        else:
+            # Step in log-SNR time: lambda = -log(sigma)
+            h = sigma.log() - sigma_next.log()
+            if previous is None or self.step_index == 0:
+                correction = denoised
+            else:
+                h_last = self.sigmas[self.step_index - 1].log() - sigma.log()
+                r = h_last / h
+                correction = (1 + 1 / (2 * r)) * denoised - (1 / (2 * r)) * previous
+            prev_sample = (sigma_next / sigma) * sample - torch.expm1(-h) * correction
+
+        self._previous_denoised = denoised
+        prev_sample = prev_sample.to(model_output.dtype)
+        self._step_index += 1
+
+        if not return_dict:
+            return (prev_sample,)
+        return EulerDiscreteSchedulerOutput(prev_sample=prev_sample, pred_original_sample=denoised)
+
+
+# Scheduler the model ships with
+DEFAULT_SCHEDULER = "euler"
+
+# name -> (scheduler class, config overrides applied on top of the model's config)
+SCHEDULERS = {
+    "euler": (EulerDiscreteScheduler, {}),
+    "dpmpp_2m": (DPMSolverPlusPlus2MScheduler, {}),
+}
+
+
+def available_schedulers() -> list:
+    """Names of the schedulers that can be selected."""
+    return list(SCHEDULERS)
+
+
+def create_scheduler(name: str, base_config):
+    """
+    Build a scheduler from the model's scheduler config.
+
+    Args:
+        name: Scheduler name (key of SCHEDULERS)
+        base_config: Config of the scheduler the model ships with
+
+    Returns:
+        Scheduler instance
+
+    Raises:
+        ValueError: If the scheduler is unknown
+    """
+    if name not in SCHEDULERS:
+        raise ValueError(f"Unknown scheduler '{name}'. Available: {available_schedulers()}")
+
+    scheduler_class, overrides = SCHEDULERS[name]
+    return scheduler_class.from_config(base_config, **overrides)
@@ -0,0 +1,89 @@
+"""
+Local model snapshots for fast cold starts.
+A snapshot is the pipeline saved once as plain safetensors files in the
+dtype the renderer runs in, next to a manifest. Loading it skips the hub
+cache resolution and dtype conversion: weights are read from memory-mapped
+safetensors files straight into modules created without initialization.
+"""
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import torch
+
+MANIFEST_NAME = "snapshot.json"
+
+DTYPES = {
+    "float16": torch.float16,
+    "float32": torch.float32,
+}
+
+
+def dtype_name(dtype: torch.dtype) -> str:
+    return str(dtype).replace("torch.", "")
+
+
+def read_manifest(snapshot_dir: Path) -> Optional[dict]:
+    """Manifest of a snapshot, or None if there is no complete snapshot."""
+    try:
+        return json.loads((Path(snapshot_dir) / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def usable_snapshot(snapshot_dir: Optional[Path], model_id: str, dtype: torch.dtype) -> bool:
+    """
+    Whether a snapshot exists for this model and dtype.
+
+    Args:
+        snapshot_dir: Snapshot directory (None = snapshots disabled)
+        model_id: Model the renderer is configured for
+        dtype: Dtype the renderer runs in
+
+    Returns:
+        True if the snapshot can be loaded as-is
+    """
+    if snapshot_dir is None:
+        return False
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        return False
+    if manifest.get("model_id") != model_id or manifest.get("dtype") != dtype_name(dtype):
+        print(f"[SNAPSHOT] {snapshot_dir} holds {manifest.get('model_id')} ({manifest.get('dtype')}), "
+              f"need {model_id} ({dtype_name(dtype)}) - ignoring it")
+        return False
+    return True
+
+
+def bake_snapshot(pipeline, snapshot_dir: Path, model_id: str) -> dict:
+    """
+    Write a loaded pipeline as a local snapshot.
+
+    Each component is saved as a single safetensors file in the pipeline's
+    dtype. The manifest is written last, so an interrupted bake is never
+    picked up by the renderer.
+
+    Args:
+        pipeline: Loaded StableVideoDiffusionPipeline in the target dtype
+        snapshot_dir: Output directory
+        model_id: Model the pipeline was loaded from
+
+    Returns:
+        The manifest
+    """
+    snapshot_dir = Path(snapshot_dir)
+    (snapshot_dir / MANIFEST_NAME).unlink(missing_ok=True)
+    pipeline.save_pretrained(snapshot_dir, safe_serialization=True)
+
+    import diffusers
+    manifest = {
+        "model_id": model_id,
+        "dtype": dtype_name(pipeline.unet.dtype),
+        "diffusers": diffusers.__version__,
+        "torch": torch.__version__,
+        "size_bytes": sum(path.stat().st_size for path in snapshot_dir.rglob("*.safetensors")),
+        "baked_at": datetime.utcnow().isoformat(),
+    }
+    (snapshot_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
@@ -0,0 +1,135 @@
+"""
+Token merging (ToMe) for the self-attention layers of the SVD UNet.
+Before a self-attention layer runs, the most similar tokens are merged by
+bipartite soft matching; the attention output is unmerged back to the full
+token count afterwards, so the surrounding blocks are unchanged. Spatial
+layers merge pixels of a frame, temporal layers merge frames of a pixel.
+Implemented as an attention processor wrapper, so any backend (SDPA,
+xformers, sliced) runs on the merged tokens.
+"""
+import torch
+
+# Every STRIDE-th token is a merge destination (spread over the sequence)
+SPATIAL_STRIDE = 4
+TEMPORAL_STRIDE = 2
+# Smallest sequence worth merging
+MIN_TOKENS = 16
+# Upper bound for one chunk of similarity scores
+SCORE_CHUNK_BYTES = 256 * 1024 ** 2
+
+
+class TokenMerge:
+    """Merge/unmerge plan of one token sequence batch."""
+
+    def __init__(self, hidden_states: torch.Tensor, ratio: float, stride: int):
+        """
+        Match tokens for merging.
+
+        Args:
+            hidden_states: Tokens [batch, tokens, channels]; also the similarity metric
+            ratio: Fraction of tokens to remove
+            stride: Every stride-th token is a destination
+        """
+        batch, tokens, _ = hidden_states.shape
+        positions = torch.arange(tokens, device=hidden_states.device)
+        is_dst = positions % stride == 0
+        self.dst_pos, self.src_pos = positions[is_dst], positions[~is_dst]
+        self.tokens = tokens
+        self.removed = min(int(tokens * ratio), len(self.src_pos))
+
+        metric = hidden_states / hidden_states.norm(dim=-1, keepdim=True)
+        src, dst = metric[:, self.src_pos], metric[:, self.dst_pos]
+        # Best destination per source token, in chunks of batch elements and
+        # source rows to bound the score matrix (one 1080p frame alone exceeds it)
+        sources = src.shape[1]
+        rows = max(1, SCORE_CHUNK_BYTES // (dst.shape[1] * metric.element_size()))
+        batch_chunk, row_chunk = max(1, rows // sources), min(rows, sources)
+        best_score, best_dst = [], []
+        for start in range(0, batch, batch_chunk):
+            dst_t = dst[start:start + batch_chunk].transpose(-1, -2)
+            row_score, row_dst = [], []
+            for row in range(0, sources, row_chunk):
+                score, index = (src[start:start + batch_chunk, row:row + row_chunk] @ dst_t).max(dim=-1)
+                row_score.append(score)
+                row_dst.append(index)
+            best_score.append(torch.cat(row_score, dim=1))
+            best_dst.append(torch.cat(row_dst, dim=1))
+        best_score, best_dst = torch.cat(best_score), torch.cat(best_dst)
+
+        order = best_score.argsort(dim=-1, descending=True)
+        self.merged_src = order[:, :self.removed]
+        self.kept_src = order[:, self.removed:]
+        self.merged_dst = best_dst.gather(-1, self.merged_src)
+
+    @staticmethod
+    def _expand(index: torch.Tensor, channels: int) -> torch.Tensor:
+        return index[..., None].expand(-1, -1, channels)
+
+    def merge(self, x: torch.Tensor) -> torch.Tensor:
+        """[batch, tokens, channels] -> [batch, tokens - removed, channels]"""
+        channels = x.shape[-1]
+        src, dst = x[:, self.src_pos], x[:, self.dst_pos]
+        kept = src.gather(1, self._expand(self.kept_src, channels))
+        moving = src.gather(1, self._expand(self.merged_src, channels))
+        dst = dst.scatter_reduce(1, self._expand(self.merged_dst, channels), moving,
+                                 reduce="mean", include_self=True)
+        return torch.cat([kept, dst], dim=1)
+
+    def unmerge(self, y: torch.Tensor) -> torch.Tensor:
+        """[batch, tokens - removed, channels] -> [batch, tokens, channels]"""
+        batch, _, channels = y.shape
+        kept, dst = y[:, :self.kept_src.shape[1]], y[:, self.kept_src.shape[1]:]
+        src = y.new_empty(batch, len(self.src_pos), channels)
+        src.scatter_(1, self._expand(self.kept_src, channels), kept)
+        # Merged tokens take the output of the token they were merged into
+        src.scatter_(1, self._expand(self.merged_src, channels), dst.gather(1, self._expand(self.merged_dst, channels)))
+        out = y.new_empty(batch, self.tokens, channels)
+        out[:, self.dst_pos] = dst
+        out[:, self.src_pos] = src
+        return out
+
+
+class TokenMergingProcessor:
+    """Attention processor running another processor on merged tokens."""
+
+    def __init__(self, processor, ratio: float, stride: int):
+        """
+        Initialize the wrapper.
+
+        Args:
+            processor: Attention processor doing the actual attention
+            ratio: Fraction of tokens to remove before attention
+            stride: Destination stride (SPATIAL_STRIDE / TEMPORAL_STRIDE)
+        """
+        self.processor = processor
+        self.ratio = ratio
+        self.stride = stride
+
+    def __call__(self, attn, hidden_states, encoder_hidden_states=None, attention_mask=None, **kwargs):
+        # Self-attention on 3D tokens only; masks refer to the unmerged sequence
+        if (encoder_hidden_states is not None or attention_mask is not None
+                or hidden_states.ndim != 3 or hidden_states.shape[1] < MIN_TOKENS):
+            return self.processor(attn, hidden_states, encoder_hidden_states, attention_mask)
+        plan = TokenMerge(hidden_states, self.ratio, self.stride)
+        if plan.removed == 0:
+            return self.processor(attn, hidden_states)
+        return plan.unmerge(self.processor(attn, plan.merge(hidden_states)))
+
+
+def apply_token_merging(unet, ratio: float):
+    """
+    Wrap the current processors of all self-attention layers with token merging.
+
+    Args:
+        unet: UNet of the SVD pipeline
+        ratio: Fraction of tokens to remove (0 < ratio < 1)
+    """
+    processors = {}
+    for name, processor in unet.attn_processors.items():
+        if isinstance(processor, TokenMergingProcessor):
+            processor = processor.processor
+        if name.endswith("attn1.processor"):
+            stride = TEMPORAL_STRIDE if "temporal_transformer_blocks" in name else SPATIAL_STRIDE
+            processor = TokenMergingProcessor(processor, ratio, stride)
+        processors[name] = processor
+    unet.set_attn_processor(processors)
@@ -0,0 +1,63 @@
+"""Tests for the persisted attention backend autotuner."""
+import json
+import time
+
+import pytest
+
+from svd.attention import AttentionAutotuner
+
+SHAPE = AttentionAutotuner.shape_key(1024, 576, 25, 1)
+ALL = ["sdpa", "sliced_2", "sliced_4"]
+FRUGAL = ["sliced_2", "sdpa"]
+
+
+def runner(durations: dict, calls: list):
+    """Fake probe sleeping per backend; None fails like an OOM."""
+    def run(backend):
+        calls.append(backend)
+        if durations[backend] is None:
+            raise RuntimeError("CUDA out of memory")
+        time.sleep(durations[backend])
+    return run
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / "attention.json"
+
+
+def test_tune_persists_fastest_backend(cache_path):
+    tuner = AttentionAutotuner(cache_path, "gpu")
+    winner = tuner.tune(SHAPE, ALL, runner({"sdpa": 0.01, "sliced_2": 0.0, "sliced_4": 0.02}, []), repeats=1)
+
+    assert winner == "sliced_2"
+    assert AttentionAutotuner(cache_path, "gpu").lookup(SHAPE, ALL) == "sliced_2"
+    assert AttentionAutotuner(cache_path, "other gpu").lookup(SHAPE, ALL) is None
+
+
+def test_restricted_candidates_do_not_replace_unrestricted_winner(cache_path):
+    tuner = AttentionAutotuner(cache_path, "gpu")
+    tuner.tune(SHAPE, ALL, runner({"sdpa": 0.0, "sliced_2": 0.01, "sliced_4": 0.01}, []), repeats=1)
+
+    assert tuner.lookup(SHAPE, FRUGAL) is None
+    tuner.tune(SHAPE, FRUGAL, runner({"sdpa": None, "sliced_2": 0.0}, []), repeats=1)
+
+    assert tuner.lookup(SHAPE, FRUGAL) == "sliced_2"
+    assert tuner.lookup(SHAPE, ALL) == "sdpa"
+
+
+def test_all_candidates_failing_is_remembered(cache_path):
+    tuner = AttentionAutotuner(cache_path, "gpu")
+    calls = []
+    assert tuner.tune(SHAPE, FRUGAL, runner({"sdpa": None, "sliced_2": None}, calls)) == "sliced_2"
+    assert calls == ["sliced_2", "sdpa"]
+
+    reloaded = AttentionAutotuner(cache_path, "gpu")
+    assert reloaded.lookup(SHAPE, FRUGAL) == "sliced_2"
+    decision = json.loads(cache_path.read_text())["gpu"][AttentionAutotuner.decision_key(SHAPE, FRUGAL)]
+    assert decision["backend"] is None
+
+
+def test_unreadable_cache_starts_empty(cache_path):
+    cache_path.write_text("{not json")
+    assert AttentionAutotuner(cache_path, "gpu").lookup(SHAPE, ALL) is None
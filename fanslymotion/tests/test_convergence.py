@@ -0,0 +1,56 @@
+"""Tests for the convergence monitor behind the early exit."""
+import torch
+
+from svd.convergence import ConvergenceMonitor
+
+SHAPE = (1, 4, 4, 16, 16)
+
+
+def run(monitor: ConvergenceMonitor, estimates) -> list:
+    """Feed one x0 per step; return the completed steps the monitor fired at."""
+    monitor.reset()
+    return [completed for completed, x0 in enumerate(estimates, start=1) if monitor.update(x0, completed)]
+
+
+def test_fires_once_x0_stops_changing():
+    torch.manual_seed(0)
+    x0 = torch.randn(SHAPE)
+    monitor = ConvergenceMonitor(threshold=0.01, total_steps=20, min_steps=4, patience=2)
+
+    fired = run(monitor, [x0] * 20)
+
+    # Steps 2 and 3 are below the threshold, but the first exit is at min_steps;
+    # it stops firing before the final steps that always run.
+    assert fired[0] == 4
+    assert fired[-1] == 20 - monitor.final_steps - 1
+
+
+def test_quiet_while_x0_keeps_changing():
+    torch.manual_seed(0)
+    monitor = ConvergenceMonitor(threshold=0.01, total_steps=20, min_steps=4, patience=2)
+
+    assert run(monitor, [torch.randn(SHAPE) for _ in range(20)]) == []
+    assert all(change > 0.01 for _, change in monitor.trace)
+
+
+def test_patience_resets_on_a_large_change():
+    torch.manual_seed(0)
+    x0, other = torch.randn(SHAPE), torch.randn(SHAPE)
+    monitor = ConvergenceMonitor(threshold=0.01, total_steps=20, min_steps=1, patience=3)
+
+    # Two quiet steps, a jump, then quiet again: needs three in a row after the jump
+    fired = run(monitor, [x0, x0, x0, other] + [other] * 10)
+
+    assert fired[0] == 4 + 3
+
+
+def test_reset_forgets_the_previous_call():
+    torch.manual_seed(0)
+    monitor = ConvergenceMonitor(threshold=0.01, total_steps=20, min_steps=1, patience=1)
+    monitor.update(torch.randn(SHAPE), 1)
+
+    monitor.reset()
+
+    # Without the reset the first estimate of the next call would be compared to the old one
+    assert not monitor.update(torch.randn(SHAPE), 2)
+    assert len(monitor.trace) == 0
@@ -0,0 +1,84 @@
+"""Tests for Range and conditional GET handling of the download endpoint."""
+from email.utils import formatdate
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from starlette.requests import Request
+
+from backend.delivery import RangeNotSatisfiable, is_not_modified, parse_range
+
+ETAG = '"17f-400"'
+MTIME = 1_700_000_000.0
+
+
+def request_with(headers: dict) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-199", (100, 199)),
+    ("bytes=-100", (900, 999)),        # suffix
+    ("bytes=-5000", (0, 999)),         # suffix longer than the file
+    ("bytes=500-", (500, 999)),        # open-ended
+    ("bytes=900-5000", (900, 999)),    # end past the file size
+    ("BYTES = 0-0", (0, 0)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [
+    "bytes=0-99,200-299",   # multi-range
+    "items=0-99",           # bad unit
+    "bytes=abc-def",
+    "bytes=100",
+    "bytes=200-100",
+])
+def test_ignored_ranges_send_the_full_file(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5000-6000", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, 1000)
+
+
+@pytest.mark.parametrize("header", ["bytes=0-", "bytes=0-99", "bytes=-10"])
+def test_zero_length_file_is_never_satisfiable(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, 0)
+
+
+def test_if_none_match():
+    assert is_not_modified(request_with({"If-None-Match": ETAG}), ETAG, MTIME)
+    assert is_not_modified(request_with({"If-None-Match": f'"other", W/{ETAG}'}), ETAG, MTIME)
+    assert is_not_modified(request_with({"If-None-Match": "*"}), ETAG, MTIME)
+    assert not is_not_modified(request_with({"If-None-Match": '"other"'}), ETAG, MTIME)
+
+
+def test_if_modified_since():
+    assert is_not_modified(request_with({"If-Modified-Since": formatdate(MTIME, usegmt=True)}), ETAG, MTIME)
+    assert not is_not_modified(request_with({"If-Modified-Since": formatdate(MTIME - 60, usegmt=True)}),
+                               ETAG, MTIME)
+    assert not is_not_modified(request_with({"If-Modified-Since": "not a date"}), ETAG, MTIME)
+    assert not is_not_modified(request_with({}), ETAG, MTIME)
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    fresh_date = formatdate(MTIME, usegmt=True)
+    stale_date = formatdate(MTIME - 60, usegmt=True)
+
+    # A mismatching ETag wins over a date that would allow 304
+    assert not is_not_modified(request_with({"If-None-Match": '"other"', "If-Modified-Since": fresh_date}),
+                               ETAG, MTIME)
+    # A matching ETag wins over a date that would require the body
+    assert is_not_modified(request_with({"If-None-Match": ETAG, "If-Modified-Since": stale_date}), ETAG, MTIME)
@@ -0,0 +1,135 @@
+"""
+Tests for the SVD memory planner.
+Plans are computed against StaticDeviceMemory, so they run without a GPU.
+"""
+import pytest
+
+from svd.memory import GB, OFFLOAD_MODES, MemoryPlanner, StaticDeviceMemory
+
+SMALL = (640, 360, 25)  # 360p
+LARGE = (1920, 1080, 25)  # 1080p
+
+
+def planner(available_gb: float, supports_vae_tiling: bool = False) -> MemoryPlanner:
+    return MemoryPlanner(StaticDeviceMemory(80 * GB, int(available_gb * GB)),
+                         supports_vae_tiling=supports_vae_tiling)
+
+
+@pytest.mark.parametrize("available_gb", [12, 16, 24, 40, 80])
+def test_small_job_keeps_everything_on_device(available_gb):
+    plan = planner(available_gb).plan(*SMALL)
+    assert plan.offload == "none"
+    assert plan.attention_slice_size is None
+    assert not plan.vae_tiling
+    assert plan.decode_chunk_size == 14
+
+
+def test_small_job_slices_before_offloading_on_tight_budget():
+    plan = planner(6).plan(*SMALL)
+    assert plan.offload == "none"
+    assert plan.attention_slice_size == 2
+    assert plan.decode_chunk_size < 14
+
+
+def test_large_job_uses_full_decode_chunk_with_plenty_of_memory():
+    plan = planner(80).plan(*LARGE)
+    assert plan.offload == "none"
+    assert plan.attention_slice_size is None
+    assert plan.decode_chunk_size == 14
+
+
+def test_large_job_gets_cheaper_as_budget_shrinks():
+    plans = [planner(gb).plan(*LARGE) for gb in (80, 40, 24, 16, 12, 8)]
+    chunks = [plan.decode_chunk_size for plan in plans]
+    offloads = [OFFLOAD_MODES.index(plan.offload) for plan in plans]
+    assert chunks[:5] == sorted(chunks[:5], reverse=True)
+    assert offloads == sorted(offloads)
+    assert plans[-1].offload == "sequential"
+    assert plans[-1].attention_slice_size == 2
+
+
+@pytest.mark.parametrize("available_gb", [8, 12, 16, 24, 40])
+def test_large_job_plan_fits_budget(available_gb):
+    memory_planner = planner(available_gb)
+    plan = memory_planner.plan(*LARGE)
+    assert plan.estimated_peak_bytes <= memory_planner.budget()
+    assert plan.estimated_peak_bytes == memory_planner.estimate_peak(*LARGE, 1, plan)
+
+
+def test_large_job_pays_more_than_small_job_on_same_budget():
+    memory_planner = planner(12)
+    small, large = memory_planner.plan(*SMALL), memory_planner.plan(*LARGE)
+    assert large.estimated_peak_bytes > small.estimated_peak_bytes
+    assert large.decode_chunk_size < small.decode_chunk_size
+
+
+def test_nothing_fits_returns_most_frugal_plan():
+    memory_planner = planner(6, supports_vae_tiling=True)
+    plan = memory_planner.plan(*LARGE, batch=2)
+    assert plan.offload == "sequential"
+    assert plan.attention_slice_size == 2
+    assert plan.vae_tiling
+    assert plan.decode_chunk_size == 1
+
+
+def test_vae_tiling_only_when_supported():
+    for gb in (6, 8, 12, 24):
+        assert not planner(gb).plan(*LARGE, batch=2).vae_tiling
+
+
+def test_decode_chunk_never_exceeds_frame_count():
+    plan = planner(80).plan(640, 360, 6)
+    assert plan.decode_chunk_size == 6
+
+
+@pytest.mark.parametrize("available_gb", [24, 40, 80])
+@pytest.mark.parametrize("batch", [1, 2])
+def test_fallback_sequence_is_monotonic_and_terminates(available_gb, batch):
+    memory_planner = planner(available_gb, supports_vae_tiling=True)
+    plan = memory_planner.plan(*LARGE, batch=batch)
+    sequence = [plan]
+    while True:
+        plan = memory_planner.fallback(plan, *LARGE, batch=batch)
+        if plan is None:
+            break
+        sequence.append(plan)
+        assert len(sequence) <= len(memory_planner.candidates(LARGE[2]))
+
+    assert len(sequence) > 1
+    for previous, current in zip(sequence, sequence[1:]):
+        assert current.estimated_peak_bytes < previous.estimated_peak_bytes
+        assert OFFLOAD_MODES.index(current.offload) >= OFFLOAD_MODES.index(previous.offload)
+    assert sequence[-1].offload == "sequential"
+
+
+def test_fallback_from_most_frugal_plan_is_none():
+    memory_planner = planner(6, supports_vae_tiling=True)
+    frugal = memory_planner.candidates(LARGE[2])[-1]
+    assert memory_planner.fallback(frugal, *LARGE) is None
+
+
+def test_decode_fallback_halves_chunk_down_to_one():
+    memory_planner = planner(80)
+    plan = memory_planner.plan(*LARGE)
+    chunks = [plan.decode_chunk_size]
+    while True:
+        plan = memory_planner.decode_fallback(plan)
+        if plan is None:
+            break
+        chunks.append(plan.decode_chunk_size)
+    assert chunks == [14, 8, 4, 2, 1]
+
+
+def test_decode_fallback_keeps_the_rest_of_the_plan():
+    memory_planner = planner(8)
+    plan = memory_planner.plan(*LARGE)
+    smaller = memory_planner.decode_fallback(plan)
+    assert smaller.decode_chunk_size < plan.decode_chunk_size
+    assert (smaller.offload, smaller.attention_slice_size, smaller.vae_tiling) == \
+        (plan.offload, plan.attention_slice_size, plan.vae_tiling)
+
+
+def test_budget_subtracts_safety_margin():
+    memory_planner = MemoryPlanner(StaticDeviceMemory(16 * GB, 10 * GB), safety_margin=GB)
+    assert memory_planner.budget() == 9 * GB
+    assert MemoryPlanner(StaticDeviceMemory(GB // 2)).budget() == 0
@@ -0,0 +1,114 @@
+"""
+Tests for the sampling schedulers.
+Uses a Gaussian toy data distribution whose exact denoiser and
+probability-flow ODE solution are known in closed form.
+"""
+import pytest
+import torch
+from diffusers import EulerDiscreteScheduler
+
+from svd.schedulers import available_schedulers, create_scheduler
+
+# Scheduler config SVD-XT ships with
+SVD_SCHEDULER_CONFIG = EulerDiscreteScheduler(
+    beta_start=0.00085, beta_end=0.012, beta_schedule="scaled_linear", interpolation_type="linear",
+    num_train_timesteps=1000, prediction_type="v_prediction", sigma_max=700.0, sigma_min=0.002,
+    steps_offset=1, timestep_spacing="leading", timestep_type="continuous", use_karras_sigmas=True,
+).config
+
+# Data distribution: every element ~ N(MEAN, STD^2)
+MEAN, STD = 0.3, 0.5
+
+
+def v_prediction(sample: torch.Tensor, sigma: torch.Tensor) -> torch.Tensor:
+    """Model output of a perfect v-prediction model for the toy distribution."""
+    denoised = MEAN + STD ** 2 / (STD ** 2 + sigma ** 2) * (sample - MEAN)
+    return (denoised - sample / (sigma ** 2 + 1)) / (-sigma / (sigma ** 2 + 1) ** 0.5)
+
+
+def sample_loop(scheduler, latents: torch.Tensor) -> torch.Tensor:
+    """Denoise the way the SVD pipeline does, with the toy model."""
+    for timestep in scheduler.timesteps:
+        scheduler.scale_model_input(latents, timestep)
+        sigma = scheduler.sigmas[scheduler.step_index]
+        latents = scheduler.step(v_prediction(latents, sigma), timestep, latents).prev_sample
+    return latents
+
+
+def exact_solution(noise: torch.Tensor, sigma_max: torch.Tensor) -> torch.Tensor:
+    """Probability-flow ODE solution from x(sigma_max) = noise * sqrt(sigma_max^2 + 1)."""
+    start = noise * (sigma_max ** 2 + 1) ** 0.5
+    return MEAN + (start - MEAN) * STD / (STD ** 2 + sigma_max ** 2) ** 0.5
+
+
+@pytest.fixture
+def noise():
+    return torch.randn(4096, generator=torch.Generator().manual_seed(0), dtype=torch.float64)
+
+
+def error(name: str, steps: int, noise: torch.Tensor) -> float:
+    scheduler = create_scheduler(name, SVD_SCHEDULER_CONFIG)
+    scheduler.set_timesteps(steps)
+    result = sample_loop(scheduler, noise * scheduler.init_noise_sigma)
+    return float((result - exact_solution(noise, scheduler.sigmas[0])).abs().mean())
+
+
+def test_all_schedulers_are_available():
+    assert set(available_schedulers()) == {"euler", "dpmpp_2m"}
+
+
+def test_unknown_scheduler_raises():
+    with pytest.raises(ValueError):
+        create_scheduler("dpmpp_3m", SVD_SCHEDULER_CONFIG)
+
+
+def test_dpmpp_2m_converges_to_exact_solution(noise):
+    errors = [error("dpmpp_2m", steps, noise) for steps in (10, 20, 40, 80)]
+    assert errors == sorted(errors, reverse=True)
+    assert errors[-1] < 0.01
+
+
+def test_dpmpp_2m_beats_euler_at_equal_steps(noise):
+    for steps in (20, 30):
+        assert error("dpmpp_2m", steps, noise) < error("euler", steps, noise)
+
+
+def test_dpmpp_2m_matches_fine_step_euler(noise):
+    assert error("dpmpp_2m", 25, noise) < error("euler", 50, noise)
+
+
+def test_set_timesteps_resets_multistep_state(noise):
+    reused = create_scheduler("dpmpp_2m", SVD_SCHEDULER_CONFIG)
+    reused.set_timesteps(12)
+    latents = noise * reused.init_noise_sigma
+    # Abandon a job half way, leaving a previous x0 behind
+    for timestep in reused.timesteps[:5]:
+        sigma = reused.sigmas[reused.step_index or 0]
+        latents = reused.step(v_prediction(latents, sigma), timestep, latents).prev_sample
+
+    reused.set_timesteps(12)
+    assert reused._previous_denoised is None
+    fresh = create_scheduler("dpmpp_2m", SVD_SCHEDULER_CONFIG)
+    fresh.set_timesteps(12)
+    start = noise * fresh.init_noise_sigma
+    assert torch.equal(sample_loop(reused, start), sample_loop(fresh, start))
+
+
+def test_resume_cut_restarts_at_first_order(noise):
+    """A sigma cut like SVDRenderer._resume_from must not reuse the previous job's x0."""
+    def cut(scheduler, start_step):
+        scheduler.set_timesteps(20)
+        keep = list(range(start_step, len(scheduler.timesteps)))
+        scheduler.timesteps = scheduler.timesteps[keep]
+        scheduler.sigmas = torch.cat([scheduler.sigmas[keep], scheduler.sigmas[-1:]])
+
+    reused = create_scheduler("dpmpp_2m", SVD_SCHEDULER_CONFIG)
+    reused.set_timesteps(20)
+    sample_loop(reused, noise * reused.init_noise_sigma)
+    cut(reused, 8)
+    assert reused._previous_denoised is None
+
+    fresh = create_scheduler("dpmpp_2m", SVD_SCHEDULER_CONFIG)
+    cut(fresh, 8)
+    start = noise * fresh.sigmas[0]
+    assert torch.equal(sample_loop(reused, start), sample_loop(fresh, start))
@@ -0,0 +1,158 @@
+"""Tests for the cost-based scheduling helpers of the worker."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from worker import scheduling
+from config import VideoConfig
+from worker.scheduling import (MAX_DEGRADATION_LEVEL, OOM_RETRY_LADDER, _degraded_render, internal_resolution,
+                               next_oom_retry, parse_upscale_tiers, pinned_render_quality, plan_render_quality)
+
+JOB = {"quality_mode": "standard", "resolution": "720p", "duration": 3}
+
+
+@pytest.fixture
+def load_shedding(monkeypatch):
+    """Load shedding on, by queue depth only (no deadline)."""
+    monkeypatch.setattr(scheduling.settings, "load_shed_enabled", True)
+    monkeypatch.setattr(scheduling.settings, "load_shed_queue_depth", 5)
+    monkeypatch.setattr(scheduling.settings, "job_deadline_seconds", 0)
+    monkeypatch.setattr(scheduling.settings, "load_shed_min_steps", 16)
+    monkeypatch.setattr(scheduling.settings, "load_shed_min_fps", 12)
+    monkeypatch.setattr(scheduling.settings, "load_shed_min_resolution", "480p")
+
+
+def test_degradation_ladder(load_shedding):
+    full = _degraded_render(JOB, 0)
+    assert (full["steps"], full["fps"], full["resolution"]) == (40, 24, "720p")
+
+    levels = [_degraded_render(JOB, level) for level in range(1, MAX_DEGRADATION_LEVEL + 1)]
+    assert [(plan["steps"], plan["fps"], plan["resolution"]) for plan in levels] == [
+        (24, 24, "720p"),
+        (24, 16, "720p"),
+        (24, 16, "480p"),
+    ]
+
+
+def test_degradation_stops_at_the_bounds(load_shedding, monkeypatch):
+    monkeypatch.setattr(scheduling.settings, "load_shed_min_steps", 30)
+    plan = _degraded_render({**JOB, "resolution": "480p"}, MAX_DEGRADATION_LEVEL)
+    assert (plan["steps"], plan["fps"], plan["resolution"]) == (30, 16, "480p")
+
+    # A job already below the resolution floor is never raised to it
+    plan = _degraded_render({**JOB, "resolution": "360p"}, MAX_DEGRADATION_LEVEL)
+    assert plan["resolution"] == "360p"
+
+
+@pytest.mark.parametrize("queue_depth, level", [(0, 0), (4, 0), (5, 1), (9, 1), (10, 2), (15, 3), (100, 3)])
+def test_level_follows_queue_depth(load_shedding, queue_depth, level):
+    plan = plan_render_quality(JOB, queue_depth)
+    assert plan["level"] == level
+    if level:
+        assert plan["original"] == _degraded_render(JOB, 0)
+        assert plan["reason"] == f"{queue_depth} jobs waiting"
+
+
+def test_disabled_load_shedding_keeps_full_quality(load_shedding, monkeypatch):
+    monkeypatch.setattr(scheduling.settings, "load_shed_enabled", False)
+    assert plan_render_quality(JOB, 100) == {**_degraded_render(JOB, 0), "level": 0}
+
+
+def test_missed_deadline_raises_the_level(load_shedding, monkeypatch):
+    monkeypatch.setattr(scheduling.settings, "job_deadline_seconds", 60)
+    created_at = (datetime.utcnow() - timedelta(seconds=3600)).isoformat()
+
+    plan = plan_render_quality({**JOB, "created_at": created_at}, 0)
+
+    assert plan["level"] == MAX_DEGRADATION_LEVEL
+    assert "deadline" in plan["reason"]
+
+
+def test_plan_is_pinned_across_retries(load_shedding):
+    metadata = dict(JOB)
+
+    first, planned = pinned_render_quality(metadata, 10)
+    assert planned and first["level"] == 2
+    assert metadata["quality_plan"] == first
+
+    # The backlog drained before the retry: the job keeps its first plan
+    again, planned = pinned_render_quality(metadata, 0)
+    assert not planned
+    assert again == first
+
+
+def walk_oom_ladder(metadata: dict) -> list:
+    """Take every OOM retry the ladder offers; return (render_scale, window_seconds) per retry."""
+    metadata = {**metadata, "oom_recovery": []}
+    taken = []
+    while (retry := next_oom_retry(metadata)) is not None:
+        metadata["oom_recovery"].append({"retry_with": retry})
+        taken.append((retry["render_scale"], retry["window_seconds"]))
+    return taken
+
+
+def test_oom_ladder_is_walked_step_by_step(monkeypatch):
+    monkeypatch.setattr(scheduling.settings, "oom_retry_max", len(OOM_RETRY_LADDER))
+    assert walk_oom_ladder({**JOB, "duration": 6}) == [
+        (rung["render_scale"], rung["window_seconds"]) for rung in OOM_RETRY_LADDER]
+
+
+def test_oom_ladder_skips_windows_as_long_as_the_clip(monkeypatch):
+    monkeypatch.setattr(scheduling.settings, "oom_retry_max", len(OOM_RETRY_LADDER))
+    # 3 s windows cover a 3 s clip, so that rung would repeat the previous attempt
+    assert walk_oom_ladder({**JOB, "duration": 3}) == [(0.75, 0), (0.5, 0), (0.5, 2)]
+
+
+def test_oom_ladder_ends_with_none(monkeypatch):
+    monkeypatch.setattr(scheduling.settings, "oom_retry_max", 10)
+    last = {"rung": len(OOM_RETRY_LADDER) - 1, **OOM_RETRY_LADDER[-1]}
+    assert next_oom_retry({**JOB, "duration": 6, "oom_recovery": [{"retry_with": last}]}) is None
+
+
+def test_oom_retries_stop_at_the_configured_maximum(monkeypatch):
+    monkeypatch.setattr(scheduling.settings, "oom_retry_max", 2)
+    assert len(walk_oom_ladder({**JOB, "duration": 6})) == 2
+
+
+def test_upscale_tiers_by_name_and_size():
+    assert parse_upscale_tiers("1080p=720p, 720p=768x432") == {"1080p": (1280, 720), "720p": (768, 432)}
+    assert parse_upscale_tiers("1080p=1024X576") == {"1080p": (1024, 576)}
+    assert parse_upscale_tiers("") == {}
+    assert parse_upscale_tiers(" , ") == {}
+
+
+@pytest.mark.parametrize("spec", [
+    "1080p",                # no internal resolution
+    "1080p=",
+    "4k=720p",              # unknown output resolution
+    "1080p=720",            # not WxH
+    "1080p=axb",
+    "1080p=1280x720x3",
+    "1080p=960x540",        # 540 is not a multiple of 8
+    "1080p=964x544",        # neither is 964
+    "720p=1080p",           # not below the output
+    "720p=720p",
+    "1080p=1024x768",       # 4:3 for a 16:9 output
+])
+def test_malformed_upscale_tiers(spec):
+    with pytest.raises(ValueError):
+        parse_upscale_tiers(spec)
+
+
+def test_internal_resolution(monkeypatch):
+    monkeypatch.setattr(scheduling, "UPSCALE_TIERS", parse_upscale_tiers("1080p=1024x576"))
+    assert internal_resolution("1080p") == (1024, 576)
+    assert internal_resolution("720p") == VideoConfig.RESOLUTIONS["720p"]
+
+
+@pytest.mark.parametrize("name", list(VideoConfig.RESOLUTIONS))
+@pytest.mark.parametrize("render_scale", [1.0, 0.75, 0.5])
+def test_scaled_render_size_is_in_multiples_of_64(name, render_scale):
+    renderer = pytest.importorskip("svd.renderer")
+    width, height = VideoConfig.RESOLUTIONS[name]
+    max_side = int(max(width, height) * render_scale)
+
+    scaled = renderer.SVDRenderer._scaled_size((width, height), max_side)
+
+    assert all(side % 64 == 0 and side >= 64 for side in scaled)
+    assert max(scaled) <= max_side
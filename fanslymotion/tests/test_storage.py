@@ -0,0 +1,206 @@
+"""
+Tests for the Redis-indexed artifact storage.
+Run against fakeredis with Lua support (pip install "fakeredis[lua]").
+"""
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+import storage
+from storage import StorageManager
+
+
+class Clock:
+    """Settable replacement for time.time in the storage module."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(storage.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis()
+
+
+def make_manager(redis_client, tmp_path, hot_budget=0, archive_budget=0, artifact_ttl=0):
+    return StorageManager(redis_client, tmp_path / "hot", tmp_path / "archive",
+                          hot_budget=hot_budget, archive_budget=archive_budget,
+                          artifact_ttl=artifact_ttl)
+
+
+def write(manager, name: str, size: int, tier: str = "hot", ttl=None):
+    path = manager.paths[tier] / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    manager.register(path, tier=tier, ttl=ttl)
+    return path
+
+
+def lru(manager, tier: str) -> list:
+    return [name.decode() for name in manager.redis.zrange(manager.LRU_KEY.format(tier=tier), 0, -1)]
+
+
+def test_register_indexes_size_and_tier(redis_client, tmp_path, clock):
+    manager = make_manager(redis_client, tmp_path)
+    path = write(manager, "a.mp4", 100)
+
+    assert manager.used_bytes("hot") == 100
+    assert manager.locate(path) == path
+    assert lru(manager, "hot") == ["a.mp4"]
+
+
+def test_register_twice_does_not_double_count(redis_client, tmp_path, clock):
+    manager = make_manager(redis_client, tmp_path)
+    write(manager, "a.mp4", 100)
+    write(manager, "a.mp4", 40)
+
+    assert manager.used_bytes("hot") == 40
+    assert lru(manager, "hot") == ["a.mp4"]
+
+
+def test_touch_moves_entry_to_lru_tail(redis_client, tmp_path, clock):
+    manager = make_manager(redis_client, tmp_path)
+    write(manager, "a.mp4", 10)
+    clock.now += 1
+    write(manager, "b.mp4", 10)
+    clock.now += 1
+    manager.touch("a.mp4")
+
+    assert lru(manager, "hot") == ["b.mp4", "a.mp4"]
+
+
+def test_touch_ignores_unindexed_names(redis_client, tmp_path, clock):
+    manager = make_manager(redis_client, tmp_path)
+    manager.touch("missing.mp4")
+
+    assert lru(manager, "hot") == []
+
+
+def test_enforce_budget_archives_least_recently_used(redis_client, tmp_path, clock):
+    manager = make_manager(redis_client, tmp_path, hot_budget=250)
+    for name in ("a.mp4", "b.mp4", "c.mp4"):
+        write(manager, name, 100)
+        clock.now += 1
+    manager.touch("a.mp4")
+
+    stats = manager.enforce_budget()
+
+    assert stats == {"archived": 1, "deleted": 0}
+    assert manager.used_bytes("hot") == 200
+    assert manager.used_bytes("archive") == 100
+    assert manager.locate(manager.paths["hot"] / "b.mp4") == manager.paths["archive"] / "b.mp4"
+    assert (manager.paths["archive"] / "b.mp4").exists()
+    assert not (manager.paths["hot"] / "b.mp4").exists()
+    assert lru(manager, "archive") == ["b.mp4"]
+
+
+def test_enforce_budget_deletes_from_archive(redis_client, tmp_path, clock):
+    manager = make_manager(redis_client, tmp_path, archive_budget=150)
+    write(manager, "a.mp4", 100, tier="archive")
+    clock.now += 1
+    write(manager, "b.mp4", 100, tier="archive")
+
+    stats = manager.enforce_budget()
+
+    assert stats == {"archived": 0, "deleted": 1}
+    assert manager.used_bytes("archive") == 100
+    assert not (manager.paths["archive"] / "a.mp4").exists()
+    assert lru(manager, "archive") == ["b.mp4"]
+
+
+def test_archive_of_vanished_file_drops_entry(redis_client, tmp_path, clock):
+    manager = make_manager(redis_client, tmp_path, hot_budget=50)
+    write(manager, "a.mp4", 100).unlink()
+
+    manager.enforce_budget()
+
+    assert manager.used_bytes("hot") == 0
+    assert lru(manager, "hot") == []
+
+
+def test_enforce_budget_stops_when_counter_drifted(redis_client, tmp_path, clock):
+    manager = make_manager(redis_client, tmp_path, hot_budget=50)
+    write(manager, "a.mp4", 10)
+    redis_client.incrby(manager.BYTES_KEY.format(tier="hot"), 1000)
+
+    manager.enforce_budget(batch_size=1)
+
+    assert lru(manager, "hot") == []
+
+
+def test_orphaned_lru_members_are_evicted(redis_client, tmp_path, clock):
+    manager = make_manager(redis_client, tmp_path)
+    for tier in ("hot", "archive"):
+        redis_client.zadd(manager.LRU_KEY.format(tier=tier), {"orphan.mp4": clock.now - 100})
+
+    assert manager.evict_older_than(10) == 0
+    assert lru(manager, "hot") == []
+    assert lru(manager, "archive") == []
+
+
+def test_forget_clears_stale_lru_member_in_other_tier(redis_client, tmp_path, clock):
+    manager = make_manager(redis_client, tmp_path)
+    write(manager, "a.mp4", 10, tier="archive")
+    redis_client.zadd(manager.LRU_KEY.format(tier="hot"), {"a.mp4": clock.now})
+
+    assert manager.forget("a.mp4") == "archive"
+    assert lru(manager, "hot") == []
+    assert manager.used_bytes("archive") == 0
+
+
+def test_evict_older_than_deletes_idle_artifacts(redis_client, tmp_path, clock):
+    manager = make_manager(redis_client, tmp_path)
+    old = write(manager, "old.mp4", 10)
+    archived = write(manager, "archived.mp4", 10, tier="archive")
+    clock.now += 100
+    fresh = write(manager, "fresh.mp4", 10)
+
+    assert manager.evict_older_than(50, batch_size=1) == 2
+    assert not old.exists() and not archived.exists()
+    assert fresh.exists()
+    assert manager.used_bytes("hot") == 10
+    assert manager.used_bytes("archive") == 0
+
+
+def test_reap_expired_deletes_only_expired(redis_client, tmp_path, clock):
+    manager = make_manager(redis_client, tmp_path, artifact_ttl=60)
+    short = write(manager, "short.mp4", 10)
+    kept = write(manager, "kept.mp4", 10, ttl=0)
+    long = write(manager, "long.mp4", 10, ttl=600)
+    clock.now += 120
+
+    assert manager.reap_expired() == 1
+    assert not short.exists()
+    assert kept.exists() and long.exists()
+    assert manager.used_bytes("hot") == 20
+    assert manager.reap_expired() == 0
+
+
+def test_delete_unindexed_returns_false(redis_client, tmp_path, clock):
+    manager = make_manager(redis_client, tmp_path)
+
+    assert manager.delete("missing.mp4") is False
+
+
+def test_reindex_rebuilds_from_directories(redis_client, tmp_path, clock):
+    manager = make_manager(redis_client, tmp_path)
+    write(manager, "a.mp4", 10)
+    write(manager, "b.mp4", 20, tier="archive")
+    redis_client.flushall()
+
+    manager.reindex()
+
+    assert manager.used_bytes("hot") == 10
+    assert manager.used_bytes("archive") == 20
+    assert lru(manager, "archive") == ["b.mp4"]
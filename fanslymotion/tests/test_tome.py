@@ -0,0 +1,56 @@
+"""Tests for token merging of the UNet self-attention layers."""
+import torch
+
+from svd.tome import SPATIAL_STRIDE, TokenMerge, TokenMergingProcessor
+
+BATCH, TOKENS, CHANNELS = 2, 64, 8
+
+
+def test_merge_then_unmerge_keeps_count_and_order():
+    torch.manual_seed(0)
+    x = torch.randn(BATCH, TOKENS, CHANNELS)
+
+    plan = TokenMerge(x, 0.5, SPATIAL_STRIDE)
+    merged = plan.merge(x)
+    restored = plan.unmerge(merged)
+
+    assert merged.shape == (BATCH, TOKENS - plan.removed, CHANNELS)
+    assert plan.removed == TOKENS // 2
+    assert restored.shape == x.shape
+    # Tokens that were not merged come back unchanged at their own position
+    for b in range(BATCH):
+        kept = plan.src_pos[plan.kept_src[b]]
+        assert torch.equal(restored[b, kept], x[b, kept])
+
+
+def test_merging_identical_tokens_is_lossless():
+    torch.manual_seed(0)
+    # Every source token duplicates its group's destination, so merging averages equal values
+    groups = torch.randn(BATCH, TOKENS // SPATIAL_STRIDE, CHANNELS)
+    x = groups.repeat_interleave(SPATIAL_STRIDE, dim=1)
+
+    plan = TokenMerge(x, 0.75, SPATIAL_STRIDE)
+
+    assert plan.removed == len(plan.src_pos)
+    assert plan.merge(x).shape[1] == TOKENS // SPATIAL_STRIDE
+    assert torch.allclose(plan.unmerge(plan.merge(x)), x)
+
+
+def test_ratio_zero_is_an_exact_identity():
+    torch.manual_seed(0)
+    x = torch.randn(BATCH, TOKENS, CHANNELS)
+
+    plan = TokenMerge(x, 0.0, SPATIAL_STRIDE)
+
+    assert plan.removed == 0
+    assert plan.merge(x).shape == x.shape
+    assert torch.equal(plan.unmerge(plan.merge(x)), x)
+
+    calls = []
+
+    def processor(attn, hidden_states, *args):
+        calls.append(hidden_states)
+        return hidden_states
+
+    assert torch.equal(TokenMergingProcessor(processor, 0.0, SPATIAL_STRIDE)(None, x), x)
+    assert calls[0] is x
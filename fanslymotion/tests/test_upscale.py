@@ -0,0 +1,58 @@
+"""Tests for the CPU upscaler of render-low-then-upscale tiers."""
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from PIL import Image
+
+from svd import upscale
+from svd.upscale import CHUNK_FRAMES, upscale_clip
+
+SIZE = (96, 64)  # output (width, height)
+
+
+def clip(frames: int) -> list:
+    """Frames with a vertical edge, so sharpening has structure to boost."""
+    rng = np.random.default_rng(0)
+    frame = np.full((32, 48, 3), 64, dtype=np.uint8)
+    frame[:, 24:] = 192
+    return [np.clip(frame + rng.integers(-2, 3, frame.shape), 0, 255).astype(np.uint8) for _ in range(frames)]
+
+
+@pytest.mark.parametrize("frames", [1, 3, CHUNK_FRAMES + 5])
+@pytest.mark.parametrize("sharpen", [0.0, 0.6])
+def test_output_size_and_dtype(frames, sharpen):
+    result = upscale_clip(clip(frames), SIZE, sharpen=sharpen)
+
+    assert len(result) == frames
+    for frame in result:
+        assert frame.shape == (SIZE[1], SIZE[0], 3)
+        assert frame.dtype == np.uint8
+
+
+def test_accepts_pil_and_rgba_frames():
+    frames = [Image.fromarray(frame).convert("RGBA") for frame in clip(2)]
+    assert all(frame.shape == (SIZE[1], SIZE[0], 3) for frame in upscale_clip(frames, SIZE))
+
+
+def test_no_sharpening_when_off(monkeypatch):
+    def fail(*args):
+        raise AssertionError("sharpened with sharpen=0")
+
+    monkeypatch.setattr(upscale, "_sharpen_chunk", fail)
+    frames = clip(3)
+
+    result = upscale_clip(frames, SIZE, sharpen=0.0)
+
+    # Plain bicubic resampling
+    for frame, upscaled in zip(frames, result):
+        assert np.array_equal(upscaled, cv2.resize(frame, SIZE, interpolation=cv2.INTER_CUBIC))
+
+
+def test_sharpening_boosts_edges():
+    frames = clip(3)
+    plain, sharpened = upscale_clip(frames, SIZE, sharpen=0.0), upscale_clip(frames, SIZE, sharpen=1.0)
+
+    row = SIZE[1] // 2
+    assert np.ptp(sharpened[1][row].astype(int)) > np.ptp(plain[1][row].astype(int))
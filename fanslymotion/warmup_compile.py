@@ -0,0 +1,41 @@
+"""
+Compile the UNet for every configured shape bucket.
+
+Fills the persistent kernel cache (COMPILE_CACHE_DIR) so workers compile
+from cache instead of from scratch, e.g. when building an image. It only
+fills the kernel cache: Dynamo tracing still runs in every new process,
+which is why the worker warms up in its own process (COMPILE_WARMUP) and
+runs jobs there when COMPILE_UNET is set.
+
+Usage:
+    python warmup_compile.py
+"""
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import settings, VideoConfig
+from worker.tasks import compile_options_from_settings, get_configured_renderer
+
+
+def main():
+    options = compile_options_from_settings()
+    if options is None:
+        print("[COMPILE] COMPILE_UNET is off, nothing to warm up")
+        return
+
+    print("=" * 60)
+    print("Compiled UNet Warm-up")
+    print("=" * 60)
+    print(f"Mode: {options.mode}, cache: {options.cache_dir}")
+    print(f"Buckets: {len(options.buckets.shapes())} ({settings.compile_resolutions} x {options.buckets.frame_buckets} frames)")
+
+    started = time.perf_counter()
+    renderer = get_configured_renderer()
+    renderer.warmup_compiled(batch=2 if VideoConfig.GUIDANCE_SCALE > 1.0 else 1)
+    print(f"[COMPILE] Warm-up finished in {time.perf_counter() - started:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""
+Cost-based job scheduling.
+Predicts job cost from its render parameters, routes cheap jobs to a
+priority queue, decides when a long render should yield the GPU at a
+denoising-step boundary so queued short jobs can run, sheds load by
+lowering render quality within configured bounds when the backlog is deep,
+picks cheaper render settings for jobs that ran out of memory and resolves
+the internal resolution of upscaled resolution tiers.
+"""
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import settings, VideoConfig
+
+
+def render_params_from_metadata(metadata: dict) -> dict:
+    """
+    Resolve the fps, step count, sampler, UNet cache interval, token
+    merge ratio and convergence threshold a job will be rendered with.
+
+    Custom fps/steps from the request are used only when both are given,
+    otherwise the quality mode defaults apply. The sampler, cache interval,
+    token merge ratio and convergence threshold always come from the
+    quality mode.
+
+    Args:
+        metadata: Job metadata
+
+    Returns:
+        Dictionary with "fps", "steps", "scheduler", "cache_interval",
+        "token_merge_ratio" and "convergence_threshold"
+    """
+    quality_mode = metadata.get("quality_mode", "standard")
+    quality_settings = VideoConfig.QUALITY_MODES.get(quality_mode, {})
+    render = {
+        "fps": quality_settings.get("fps", VideoConfig.FPS),
+        "steps": quality_settings.get("steps", VideoConfig.STEPS),
+        "scheduler": quality_settings.get("scheduler", VideoConfig.SCHEDULER),
+        "cache_interval": quality_settings.get("cache_interval", 0),
+        "token_merge_ratio": quality_settings.get("token_merge_ratio", 0.0),
+        "convergence_threshold": quality_settings.get("convergence_threshold", 0.0),
+    }
+
+    if metadata.get("custom_fps") and metadata.get("custom_steps"):
+        render["fps"] = metadata["custom_fps"]
+        render["steps"] = metadata["custom_steps"]
+
+    return render
+
+
+# Largest aspect ratio difference between a tier's internal and output resolution
+UPSCALE_ASPECT_TOLERANCE = 0.02
+
+
+def parse_upscale_tiers(spec: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Parse render-low-then-upscale tiers.
+
+    Args:
+        spec: Comma-separated "output=internal" pairs, e.g. "1080p=720p,720p=768x432";
+            the output is a resolution name, the internal one a name or WIDTHxHEIGHT
+
+    Returns:
+        Output resolution name -> internal (width, height)
+
+    Raises:
+        ValueError: If a tier is malformed, not smaller than its output or
+            changes the aspect ratio
+    """
+    resolutions = VideoConfig.RESOLUTIONS
+    tiers = {}
+    for pair in filter(None, (part.strip() for part in spec.split(","))):
+        output, _, internal = (value.strip() for value in pair.partition("="))
+        if output not in resolutions or not internal:
+            raise ValueError(f"Invalid upscale tier '{pair}': expected <resolution name>=<resolution name or WxH>")
+        if internal in resolutions:
+            size = resolutions[internal]
+        else:
+            try:
+                size = tuple(int(value) for value in internal.lower().split("x"))
+            except ValueError:
+                size = ()
+            # The VAE downsamples by 8
+            if len(size) != 2 or size[0] % 8 or size[1] % 8:
+                raise ValueError(f"Invalid internal resolution '{internal}': expected WxH in multiples of 8")
+        out_width, out_height = resolutions[output]
+        if size[0] >= out_width or size[1] >= out_height:
+            raise ValueError(f"Internal resolution of tier '{pair}' is not below the output resolution")
+        if abs(size[0] / size[1] - out_width / out_height) > UPSCALE_ASPECT_TOLERANCE * out_width / out_height:
+            raise ValueError(f"Internal resolution of tier '{pair}' has a different aspect ratio")
+        tiers[output] = size
+    return tiers
+
+
+# Parsed once, so a malformed UPSCALE_TIERS stops the API and the worker at
+# startup instead of failing every job's cost estimate
+UPSCALE_TIERS = parse_upscale_tiers(settings.upscale_tiers)
+
+
+def internal_resolution(resolution: str) -> Tuple[int, int]:
+    """
+    Size a resolution is diffused at.
+
+    Args:
+        resolution: Resolution name (key of VideoConfig.RESOLUTIONS)
+
+    Returns:
+        (width, height) of the UPSCALE_TIERS internal resolution, or of the
+        resolution itself when it has no tier
+    """
+    return UPSCALE_TIERS.get(resolution, VideoConfig.RESOLUTIONS[resolution])
+
+
+def compile_frame_buckets() -> List[int]:
+    """
+    Frame counts the compiled UNet is specialized for.
+
+    Returns:
+        COMPILE_FRAME_BUCKETS, or by default the exact frame count of every
+        duration at every quality mode's fps, so standard requests are
+        never padded
+    """
+    if settings.compile_frame_buckets.strip():
+        return sorted({int(frames) for frames in settings.compile_frame_buckets.split(",") if frames.strip()})
+    fps_values = {mode.get("fps", VideoConfig.FPS) for mode in VideoConfig.QUALITY_MODES.values()}
+    return sorted({duration * fps for duration in VideoConfig.DURATIONS for fps in fps_values})
+
+
+# Parsed once at startup, like UPSCALE_TIERS: render sizes and frame counts
+# the compiled UNet pads renders to
+COMPILE_FRAME_BUCKETS = compile_frame_buckets()
+COMPILE_SIZES = {VideoConfig.RESOLUTIONS[name.strip()] for name in settings.compile_resolutions.split(",")
+                 if name.strip() in VideoConfig.RESOLUTIONS}
+
+
+def rendered_frames(size: Tuple[int, int], frames: int) -> int:
+    """
+    Frames actually denoised for a render.
+
+    In compiled mode renders of a bucketed resolution are rounded up to
+    the next frame bucket (the extra frames are trimmed after decoding).
+
+    Args:
+        size: Internal render (width, height)
+        frames: Requested number of frames
+
+    Returns:
+        Number of frames the UNet runs on
+    """
+    if not settings.compile_unet or tuple(size) not in COMPILE_SIZES:
+        return frames
+    return next((bucket for bucket in COMPILE_FRAME_BUCKETS if bucket >= frames), frames)
+
+
+def estimate_job_cost(metadata: dict) -> float:
+    """
+    Predict GPU time of a job in seconds.
+
+    Denoising cost grows linearly with pixels per frame, frame count and
+    step count; SCHEDULER_COST_PER_UNIT calibrates seconds per
+    megapixel-frame-step for the deployed GPU.
+
+    Args:
+        metadata: Job metadata (duration, resolution, quality mode, overrides)
+
+    Returns:
+        Predicted processing time in seconds
+    """
+    render = render_params_from_metadata(metadata)
+    return render_cost(metadata["resolution"], metadata["duration"], render["fps"], render["steps"])
+
+
+def render_cost(resolution: str, duration: int, fps: int, steps: int) -> float:
+    """
+    Predict GPU time of a render in seconds from explicit parameters.
+
+    Upscaled tiers are costed at their internal resolution (the CPU
+    upscale is negligible next to denoising), compiled renders at their
+    frame bucket.
+
+    Args:
+        resolution: Resolution name (key of VideoConfig.RESOLUTIONS)
+        duration: Video duration in seconds
+        fps: Frames per second
+        steps: Denoising steps
+
+    Returns:
+        Predicted processing time in seconds
+    """
+    width, height = internal_resolution(resolution)
+    units = (width * height / 1e6) * rendered_frames((width, height), duration * fps) * steps
+    return units * settings.scheduler_cost_per_unit
+
+
+def select_queue_name(cost: float) -> str:
+    """
+    Pick the queue for a job based on its predicted cost.
+
+    Args:
+        cost: Predicted processing time in seconds
+
+    Returns:
+        Priority queue name for short jobs, normal queue name otherwise
+    """
+    if cost <= settings.priority_cost_threshold:
+        return settings.worker_priority_queue_name
+    return settings.worker_queue_name
+
+
+def enqueue_generation(queue, job_id: str, at_front: bool = False):
+    """
+    Enqueue the generation task of a job.
+
+    Used for the first enqueue and for re-enqueues after preemption, so a
+    job keeps the same RQ options across runs. The task is referenced by
+    its import path to avoid importing the ML libraries in the API. Note:
+    job_timeout is not enforced by SimpleWorker (Windows, compiled mode);
+    the worker applies its own limits.
+
+    Args:
+        queue: RQ queue to put the job in
+        job_id: Job ID
+        at_front: Put the job at the head of the queue
+
+    Returns:
+        RQ job
+    """
+    return queue.enqueue(
+        'worker.tasks.process_video_generation',
+        job_id,
+        result_ttl=3600,  # Keep result for 1 hour
+        job_timeout=settings.worker_timeout,
+        at_front=at_front
+    )
+
+
+class SlicePolicy:
+    """
+    Preemption policy for one running job.
+
+    A job may be suspended once it has run for a full time slice, its
+    predicted cost is high enough to be worth preempting, it has not been
+    preempted too often already, and short jobs are waiting.
+    """
+
+    def __init__(self, predicted_cost: float, preemptions: int, waiting_jobs):
+        """
+        Initialize the policy.
+
+        Args:
+            predicted_cost: Predicted processing time of the job in seconds
+            preemptions: How many times the job was already preempted
+            waiting_jobs: Callable returning the number of queued priority jobs
+        """
+        self.predicted_cost = predicted_cost
+        self.preemptions = preemptions
+        self.waiting_jobs = waiting_jobs
+        self.slice_started = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether this job can be preempted at all."""
+        return (
+            settings.preempt_slice_seconds > 0
+            and self.predicted_cost >= settings.preempt_min_cost
+            and self.preemptions < settings.preempt_max_count
+        )
+
+    def should_preempt(self) -> bool:
+        """Checked at every step boundary; True means suspend now."""
+        if not self.enabled:
+            return False
+        if time.monotonic() - self.slice_started < settings.preempt_slice_seconds:
+            return False
+        try:
+            return self.waiting_jobs() > 0
+        except Exception as e:
+            print(f"[SCHEDULER] Failed to check priority queue: {e}")
+            return False
+
+
+# Degradation ladder: 1 = fewer steps, 2 = also lower fps, 3 = also lower resolution
+MAX_DEGRADATION_LEVEL = 3
+
+
+def _degraded_render(metadata: dict, level: int) -> dict:
+    """Render parameters of a job at a degradation level, never below the configured bounds."""
+    render = render_params_from_metadata(metadata)
+    steps, fps, resolution = render["steps"], render["fps"], metadata["resolution"]
+
+    if level >= 1:
+        steps = min(steps, max(settings.load_shed_min_steps, round(steps * 0.6)))
+    if level >= 2:
+        fps = min(fps, max(settings.load_shed_min_fps, fps * 2 // 3))
+    if level >= 3:
+        names = list(VideoConfig.RESOLUTIONS)
+        floor = names.index(settings.load_shed_min_resolution) if settings.load_shed_min_resolution in names else 0
+        resolution = names[max(names.index(resolution) - 1, min(floor, names.index(resolution)))]
+
+    return {"steps": steps, "fps": fps, "resolution": resolution,
+            "scheduler": render["scheduler"], "cache_interval": render["cache_interval"],
+            "token_merge_ratio": render["token_merge_ratio"],
+            "convergence_threshold": render["convergence_threshold"]}
+
+
+def plan_render_quality(metadata: dict, queue_depth: int) -> dict:
+    """
+    Choose the render quality of a job under the current load.
+
+    The degradation level starts at one level per LOAD_SHED_QUEUE_DEPTH
+    waiting jobs and is raised further while the predicted render time
+    would miss the job's deadline (JOB_DEADLINE_SECONDS after submission).
+    With a short queue and enough time left the job runs at full quality.
+
+    Args:
+        metadata: Job metadata
+        queue_depth: Number of jobs waiting in the queues
+
+    Returns:
+        Dictionary with "steps", "fps", "resolution", "scheduler",
+        "cache_interval", "token_merge_ratio", "convergence_threshold",
+        "level" and, when
+        degraded, "reason" and "original" (the full-quality parameters)
+    """
+    full = _degraded_render(metadata, 0)
+    if not settings.load_shed_enabled:
+        return {**full, "level": 0}
+
+    level = 0
+    reasons = []
+    if settings.load_shed_queue_depth > 0 and queue_depth >= settings.load_shed_queue_depth:
+        level = min(queue_depth // settings.load_shed_queue_depth, MAX_DEGRADATION_LEVEL)
+        reasons.append(f"{queue_depth} jobs waiting")
+
+    if settings.job_deadline_seconds > 0 and metadata.get("created_at"):
+        waited = (datetime.utcnow() - datetime.fromisoformat(metadata["created_at"])).total_seconds()
+        remaining = settings.job_deadline_seconds - waited
+        plan = _degraded_render(metadata, level)
+        if render_cost(plan["resolution"], metadata["duration"], plan["fps"], plan["steps"]) > remaining:
+            reasons.append(f"{max(remaining, 0):.0f}s left until deadline")
+            while level < MAX_DEGRADATION_LEVEL:
+                level += 1
+                plan = _degraded_render(metadata, level)
+                if render_cost(plan["resolution"], metadata["duration"], plan["fps"], plan["steps"]) <= remaining:
+                    break
+
+    plan = _degraded_render(metadata, level)
+    if plan == full:
+        # Already at the bounds - nothing to shed
+        return {**full, "level": 0}
+
+    return {**plan, "level": level, "reason": ", ".join(reasons), "original": full}
+
+
+def pinned_render_quality(metadata: dict, queue_depth: int) -> Tuple[dict, bool]:
+    """
+    Render quality of a job, planned on its first run only.
+
+    The plan is kept in metadata["quality_plan"], so a preempted or retried
+    job resumes with the same parameters whatever the load is by then.
+
+    Args:
+        metadata: Job metadata
+        queue_depth: Number of jobs waiting in the queues
+
+    Returns:
+        (plan, True if it was planned now and the metadata must be saved)
+    """
+    if metadata.get("quality_plan") is not None:
+        return metadata["quality_plan"], False
+    metadata["quality_plan"] = plan_render_quality(metadata, queue_depth)
+    return metadata["quality_plan"], True
+
+
+# Retry ladder for jobs that ran out of memory with every memory plan:
+# lower internal resolution (upscaled afterwards), then fewer frames per pass
+OOM_RETRY_LADDER = (
+    {"render_scale": 0.75, "window_seconds": 0},
+    {"render_scale": 0.75, "window_seconds": 3},
+    {"render_scale": 0.5, "window_seconds": 3},
+    {"render_scale": 0.5, "window_seconds": 2},
+)
+
+
+def next_oom_retry(metadata: dict) -> Optional[dict]:
+    """
+    Render settings for the next retry of a job that ran out of memory.
+
+    Rungs that would render the job exactly like the previous attempt
+    (e.g. windows at least as long as the clip) are skipped.
+
+    Args:
+        metadata: Job metadata with the retries taken so far in "oom_recovery"
+
+    Returns:
+        Dictionary with "rung", "render_scale" and "window_seconds", or None
+        when OOM_RETRY_MAX retries were taken or the ladder is exhausted
+    """
+    taken = metadata.get("oom_recovery", [])
+    if len(taken) >= settings.oom_retry_max:
+        return None
+
+    if taken:
+        current = taken[-1]["retry_with"]
+    else:
+        current = {"rung": -1, "render_scale": 1.0, "window_seconds": 0}
+    for rung in range(current["rung"] + 1, len(OOM_RETRY_LADDER)):
+        window = OOM_RETRY_LADDER[rung]["window_seconds"]
+        candidate = {
+            "rung": rung,
+            "render_scale": OOM_RETRY_LADDER[rung]["render_scale"],
+            "window_seconds": window if window < metadata["duration"] else 0,
+        }
+        if (candidate["render_scale"], candidate["window_seconds"]) != (current["render_scale"], current["window_seconds"]):
+            return candidate
+    return None
@@ -0,0 +1,115 @@
+"""
+Supervisor for CPU workers sharing one copy of the model weights.
+
+Loads the pipeline once and forks worker processes that inherit the
+loaded renderer. The weights (including packed int8 ones) are shared
+copy-on-write: inference never writes to them, so the children keep
+using the parent's pages. Each child runs jobs in-process (RQ
+SimpleWorker), so extra workers only cost their activations, and the CPU
+threads are split between them. Dead children are restarted. Linux/macOS
+only (needs fork); GPU hosts run worker.py.
+
+Fork rather than spawn: spawned children would each load their own copy
+unless the weights were moved to shared memory first, and packed int8
+weights cannot be. Forking is only safe while the parent has never
+started torch's OpenMP/intra-op thread pools (a child inherits their
+locks but not their threads and can hang in its first parallel op), so
+the parent loads and quantizes single-threaded and does nothing else; the
+compile warm-up and every other parallel torch op run in the children,
+after each sets its own thread count.
+
+Usage:
+    python worker/supervisor.py --processes 4
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path FIRST
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+
+import torch
+from redis import Redis
+from rq import Queue, SimpleWorker
+
+from config import settings, init_storage, VideoConfig
+
+
+def run_worker(index: int, threads: int):
+    """Child process: take jobs with the renderer inherited from the supervisor."""
+    # Don't run the supervisor's shutdown handler; RQ installs its own
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # First thing before any parallel torch work: the pools start in this process
+    torch.set_num_threads(threads)
+    if settings.compile_unet and settings.compile_warmup:
+        from worker.tasks import get_configured_renderer
+        get_configured_renderer().warmup_compiled(batch=2 if VideoConfig.GUIDANCE_SCALE > 1.0 else 1)
+    # Connections are per process - never reuse the parent's sockets
+    redis_conn = Redis(host=settings.redis_host, port=settings.redis_port, db=settings.redis_db)
+    queues = [
+        Queue(settings.worker_priority_queue_name, connection=redis_conn),
+        Queue(settings.worker_queue_name, connection=redis_conn),
+    ]
+    worker = SimpleWorker(queues, connection=redis_conn)
+    print(f"[SUPERVISOR] Worker {index} (pid {os.getpid()}) started with {threads} threads")
+    worker.work(with_scheduler=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run CPU workers sharing one copy of the model")
+    parser.add_argument("--processes", type=int, default=max(1, (os.cpu_count() or 1) // 8),
+                        help="Worker processes to fork")
+    args = parser.parse_args()
+
+    init_storage()
+
+    # Loaded here so every child inherits it as the renderer singleton; one
+    # thread, so no thread pool exists in the parent when it forks
+    torch.set_num_threads(1)
+    from worker.tasks import get_configured_renderer
+    renderer = get_configured_renderer(cpu_threads=1)
+    if renderer.device != "cpu":
+        print("[SUPERVISOR] CUDA is available - a CUDA context cannot be shared across fork, use worker.py")
+        sys.exit(1)
+
+    threads = max(1, (os.cpu_count() or 1) // args.processes)
+    context = multiprocessing.get_context("fork")
+    children = {}
+
+    def start(index: int):
+        process = context.Process(target=run_worker, args=(index, threads), name=f"svd-worker-{index}")
+        process.start()
+        children[index] = process
+
+    def stop(signum, frame):
+        print(f"[SUPERVISOR] Stopping {len(children)} workers...")
+        for process in children.values():
+            process.terminate()
+        for process in children.values():
+            process.join(timeout=30)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"[SUPERVISOR] Forking {args.processes} workers, {threads} threads each")
+    for index in range(args.processes):
+        start(index)
+
+    while True:
+        time.sleep(5)
+        for index, process in list(children.items()):
+            if not process.is_alive():
+                print(f"[SUPERVISOR] Worker {index} exited with code {process.exitcode}, restarting")
+                start(index)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,72 @@
 Worker tasks for video generation processing.
 These tasks are executed by RQ workers with GPU access.
 """
+import gc
+import hashlib
 import json
+import time
 import traceback
-from pathlib import Path
 from datetime import datetime
+from typing import Optional
 import redis
-from rq import get_current_job
+from rq import get_current_job, Queue
 
 from config import settings, VideoConfig
-from svd.renderer import get_renderer, VideoGenerationParams
+from svd.renderer import (
+    get_renderer, VideoGenerationParams, PreviewParams,
+    GenerationCancelled, GenerationPreempted, GenerationOutOfMemory
+)
+from svd.compiled import CompileOptions, ShapeBuckets
+from svd.checkpoint import clear_checkpoints
+from svd.cpu import CpuOptions
+from storage import get_storage_manager
+from worker.scheduling import compile_frame_buckets, enqueue_generation, internal_resolution, pinned_render_quality, next_oom_retry, render_cost, SlicePolicy
+
+
+def shape_buckets_from_settings() -> ShapeBuckets:
+    """Render shape buckets configured for compiled mode and attention autotuning."""
+    return ShapeBuckets(
+        resolutions=[VideoConfig.RESOLUTIONS[name.strip()] for name in settings.compile_resolutions.split(",")
+                     if name.strip() in VideoConfig.RESOLUTIONS],
+        frame_buckets=compile_frame_buckets()
+    )
+
+
+def compile_options_from_settings():
+    """CompileOptions for the configured shape buckets, or None when compiled mode is off."""
+    if not settings.compile_unet:
+        return None
+    return CompileOptions(buckets=shape_buckets_from_settings(), mode=settings.compile_mode,
+                          cache_dir=settings.compile_cache_dir)
+
+
+def get_configured_renderer(cpu_threads: Optional[int] = None):
+    """
+    Get the renderer singleton configured from settings.
+
+    Args:
+        cpu_threads: Intra-op threads on the CPU instead of CPU_THREADS
+    """
+    return get_renderer(
+        model_id=settings.svd_model_id,
+        cache_dir=settings.svd_model_cache,
+        attention_cache=settings.attention_autotune_cache if settings.attention_autotune else None,
+        compile=compile_options_from_settings(),
+        snapshot_dir=settings.svd_snapshot_path,
+        cpu=CpuOptions(
+            precision=settings.cpu_precision,
+            channels_last=settings.cpu_channels_last,
+            threads=settings.cpu_threads if cpu_threads is None else cpu_threads,
+            interop_threads=settings.cpu_interop_threads,
+            encode_threads=settings.cpu_encode_threads
+        )
+    )
+
+
+def autotune_attention_from_settings():
+    """Autotune the attention backend for the configured shape buckets."""
+    get_configured_renderer().autotune_attention(shape_buckets_from_settings().shapes(),
+                                                 batch=2 if VideoConfig.GUIDANCE_SCALE > 1.0 else 1)
 
 
 def update_job_progress(redis_client: redis.Redis, job_id: str, 
@@ -48,6 +105,24 @@ def update_job_progress(redis_client: redis.Redis, job_id: str,
         print(f"Error updating progress: {e}")
 
 
+def is_job_cancelled(redis_client: redis.Redis, job_id: str) -> bool:
+    """
+    Check whether cancellation was requested for a job.
+    
+    Args:
+        redis_client: Redis client instance
+        job_id: Job identifier
+        
+    Returns:
+        True if the job's cancel flag is set
+    """
+    try:
+        return bool(redis_client.exists(f"job:{job_id}:cancel"))
+    except Exception as e:
+        print(f"Error checking cancel flag: {e}")
+        return False
+
+
 def process_video_generation(job_id: str, job_timeout: int = 600,
                             retry_count: int = 3, retry_delay: int = 40):
     """
@@ -94,6 +169,10 @@ def process_video_generation(job_id: str, job_timeout: int = 600,
             print(f"[ERROR] Failed to parse metadata: {e}")
             raise
         
+        # Cancelled while waiting in the queue - don't load anything
+        if is_job_cancelled(redis_client, job_id):
+            raise GenerationCancelled("Cancelled before processing started")
+        
         # Update status to processing
         metadata["status"] = "processing"
         metadata["started_at"] = datetime.utcnow().isoformat()
@@ -116,10 +195,8 @@ def process_video_generation(job_id: str, job_timeout: int = 600,
                 torch.cuda.empty_cache()
                 print(f"[INFO] GPU memory cleared before model load")
             
-            renderer = get_renderer(
-                model_id=settings.svd_model_id,
-                cache_dir=settings.svd_model_cache
-            )
+            job_started = time.time()
+            renderer = get_configured_renderer()
             print(f"[INFO] Renderer obtained successfully")
             
             # Force model load
@@ -128,6 +205,12 @@ def process_video_generation(job_id: str, job_timeout: int = 600,
                 renderer.load_model()
             
             print(f"[INFO] Model loaded successfully for job {job_id}")
+            
+            # This job paid the cold start - publish it for /health
+            if renderer.load_stats.get("loaded_at", 0) >= job_started:
+                print(f"[INFO] Cold start: {renderer.load_stats['seconds']:.1f}s from {renderer.load_stats['source']}")
+                metadata["cold_start"] = renderer.load_stats
+                redis_client.set("worker:cold_start", json.dumps(renderer.load_stats))
             if torch.cuda.is_available():
                 print(f"[INFO] GPU memory after load: {torch.cuda.memory_allocated() / 1024**3:.2f}GB")
                 print(f"[INFO] GPU will be used for generation!")
@@ -142,27 +225,37 @@ def process_video_generation(job_id: str, job_timeout: int = 600,
         
         update_job_progress(redis_client, job_id, 20.0, "Model loaded, preprocessing image...")
         
-        # Prepare generation parameters
-        image_path = Path(metadata["image_path"])
+        storage_manager = get_storage_manager(redis_client)
+        
+        # Prepare generation parameters (input may have been moved to archive)
+        image_path = storage_manager.locate(metadata["image_path"])
         output_filename = f"{job_id}_output.mp4"
         output_path = settings.storage_hot_path / output_filename
         
-        resolution = VideoConfig.RESOLUTIONS[metadata["resolution"]]
+        priority_queue = Queue(settings.worker_priority_queue_name, connection=redis_client)
+        normal_queue = Queue(settings.worker_queue_name, connection=redis_client)
+        
+        # Custom FPS and steps if provided, otherwise quality mode defaults -
+        # lowered within bounds when the backlog is deep or the deadline is near
+        quality_plan, planned = pinned_render_quality(metadata, len(priority_queue) + len(normal_queue))
+        if planned:
+            redis_client.set(metadata_key, json.dumps(metadata), ex=86400)
+        if quality_plan["level"]:
+            original = quality_plan["original"]
+            print(f"[LOAD SHED] Level {quality_plan['level']} ({quality_plan['reason']}): "
+                  f"steps {original['steps']}->{quality_plan['steps']}, "
+                  f"fps {original['fps']}->{quality_plan['fps']}, "
+                  f"resolution {original['resolution']}->{quality_plan['resolution']}")
+        
+        resolution = VideoConfig.RESOLUTIONS[quality_plan["resolution"]]
         
         # Get motion preset configuration
         motion_preset = metadata["motion_preset"]
         motion_config = VideoConfig.MOTION_PRESETS.get(motion_preset, {})
         
-        # Use custom FPS and steps if provided, otherwise use defaults
-        custom_fps = metadata.get("custom_fps") or VideoConfig.FPS
-        custom_steps = metadata.get("custom_steps") or VideoConfig.STEPS
-        
-        # Get quality mode settings if not custom
         quality_mode = metadata.get("quality_mode", "standard")
-        if not metadata.get("custom_fps") or not metadata.get("custom_steps"):
-            quality_settings = VideoConfig.QUALITY_MODES.get(quality_mode, {})
-            custom_fps = quality_settings.get("fps", VideoConfig.FPS)
-            custom_steps = quality_settings.get("steps", VideoConfig.STEPS)
+        custom_fps = quality_plan["fps"]
+        custom_steps = quality_plan["steps"]
         
         params = VideoGenerationParams(
             image_path=image_path,
@@ -173,12 +266,38 @@ def process_video_generation(job_id: str, job_timeout: int = 600,
             fps=custom_fps,
             steps=custom_steps,
             guidance_scale=VideoConfig.GUIDANCE_SCALE,
+            min_guidance_scale=VideoConfig.MIN_GUIDANCE_SCALE,
+            guidance_steps=VideoConfig.GUIDANCE_STEPS,
+            scheduler=quality_plan.get("scheduler", VideoConfig.SCHEDULER),
+            unet_cache_interval=quality_plan.get("cache_interval", 0),
+            token_merge_ratio=quality_plan.get("token_merge_ratio", 0.0),
+            convergence_threshold=quality_plan.get("convergence_threshold", 0.0),
+            render_size=internal_resolution(quality_plan["resolution"]),
+            upscale_sharpen=settings.upscale_sharpen,
             noise_aug_strength=VideoConfig.NOISE_AUGMENTATION,
             motion_bucket_id=motion_config.get("motion_bucket_id", 127),
-            enhance_output=VideoConfig.ENHANCE_OUTPUT
+            enhance_output=VideoConfig.ENHANCE_OUTPUT,
+            checkpoint_dir=settings.checkpoint_path,
+            checkpoint_interval=settings.checkpoint_interval
         )
         
-        print(f"[CONFIG] Using FPS: {custom_fps}, Steps: {custom_steps}")
+        # A job that ran out of memory before keeps its cheaper render settings
+        if metadata.get("oom_recovery"):
+            retry = metadata["oom_recovery"][-1]["retry_with"]
+            params.render_scale = retry["render_scale"]
+            params.window_seconds = retry["window_seconds"]
+            print(f"[OOM RETRY] Render scale {params.render_scale}, windows {params.window_seconds or 'off'}")
+        
+        if settings.preview_enabled and not metadata.get("preview_path"):
+            params.preview = PreviewParams(
+                output_path=settings.storage_hot_path / f"{job_id}_preview.mp4",
+                steps=settings.preview_steps,
+                max_side=settings.preview_max_side,
+                num_frames=settings.preview_frames,
+                fps=settings.preview_fps
+            )
+        
+        print(f"[CONFIG] Using FPS: {custom_fps}, Steps: {custom_steps}, Scheduler: {params.scheduler}")
         print(f"[CONFIG] Style: {metadata.get('visual_style', 'none')}, Quality: {quality_mode}")
         if metadata.get("user_prompt"):
             print(f"[CONFIG] Prompt: {metadata['user_prompt'][:100]}...")
@@ -199,25 +318,113 @@ def process_video_generation(job_id: str, job_timeout: int = 600,
             print(f"[PROGRESS] Step {step}/{total_steps} ({progress:.1f}%)")
             update_job_progress(redis_client, job_id, progress, f"Generating frame step {step}/{total_steps}...")
         
-        # Generate video with progress callback
-        print(f"[INFO] Calling renderer.generate_video()...")
-        try:
-            video_path = renderer.generate_video(params, progress_callback=on_progress)
-            print(f"[INFO] Video generation completed: {video_path}")
-        except Exception as e:
-            print(f"[ERROR] Video generation failed: {e}")
-            print(f"[ERROR] Traceback:")
-            print(traceback.format_exc())
-            raise
+        # Publish the draft through the job record; the bot sends it right away
+        def on_preview(preview_path):
+            try:
+                storage_manager.register(preview_path)
+            except Exception as e:
+                print(f"[WARN] Storage index update failed: {e}")
+            metadata["preview_path"] = str(preview_path)
+            redis_client.set(metadata_key, json.dumps(metadata), ex=86400)
+            update_job_progress(redis_client, job_id, 30.0, "Preview ready, rendering full quality...")
+        
+        # Long jobs yield the GPU to waiting short jobs after each time slice;
+        # a degraded job is judged by the cost of what it actually renders
+        slice_policy = SlicePolicy(
+            predicted_cost=render_cost(quality_plan["resolution"], metadata["duration"],
+                                       quality_plan["fps"], quality_plan["steps"]),
+            preemptions=metadata.get("preemptions", 0),
+            waiting_jobs=lambda: len(priority_queue)
+        )
+        
+        # Generate video with progress callback; when the renderer runs out of
+        # memory with every memory plan, retry in place with cheaper settings
+        while True:
+            print(f"[INFO] Calling renderer.generate_video()...")
+            try:
+                video_path = renderer.generate_video(
+                    params,
+                    progress_callback=on_progress,
+                    cancel_check=lambda: is_job_cancelled(redis_client, job_id),
+                    preempt_check=slice_policy.should_preempt,
+                    preview_callback=on_preview
+                )
+                print(f"[INFO] Video generation completed: {video_path}")
+                break
+            except (GenerationCancelled, GenerationPreempted):
+                raise
+            except GenerationOutOfMemory as e:
+                retry = next_oom_retry(metadata)
+                if retry is None:
+                    print(f"[ERROR] Out of memory, no cheaper settings left: {e}")
+                    raise
+                print(f"[OOM RETRY] {e}")
+                # The cheaper settings change the checkpoint key - the old one is unreachable
+                clear_checkpoints(settings.checkpoint_path, output_path)
+                metadata.setdefault("oom_recovery", []).append({
+                    "error": str(e)[:500],
+                    "memory_fallbacks": e.fallbacks,
+                    "retry_with": retry,
+                    "at": datetime.utcnow().isoformat()
+                })
+            except Exception as e:
+                print(f"[ERROR] Video generation failed: {e}")
+                print(f"[ERROR] Traceback:")
+                print(traceback.format_exc())
+                raise
+            
+            # Outside the except block, so the traceback no longer pins GPU tensors
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            
+            params.render_scale = retry["render_scale"]
+            params.window_seconds = retry["window_seconds"]
+            params.preview = None  # Delivered (or given up on) in the first attempt
+            redis_client.set(metadata_key, json.dumps(metadata), ex=86400)
+            print(f"[OOM RETRY] Attempt {len(metadata['oom_recovery'])}: render scale {params.render_scale}, "
+                  f"windows {params.window_seconds or 'off'}")
+            update_job_progress(redis_client, job_id, 30.0, "Out of GPU memory, retrying with lighter settings...")
         
         update_job_progress(redis_client, job_id, 90.0, "Finalizing video...")
         
+        # Index the output and keep storage within its byte budgets
+        try:
+            storage_manager.register(video_path)
+            storage_manager.enforce_budget()
+        except Exception as e:
+            print(f"[WARN] Storage index update failed: {e}")
+        
         # Update metadata with result
         metadata["status"] = "completed"
         metadata["video_path"] = str(video_path)
         metadata["completed_at"] = datetime.utcnow().isoformat()
         metadata["progress"] = 100.0
         metadata["message"] = "Video generation completed successfully"
+        metadata["render_stats"] = renderer.last_stats
+        # Unseeded renders differ between identical requests - the file_id
+        # cache may only serve this exact video (i.e. this job), never another job's
+        if metadata.get("content_hash"):
+            metadata["content_hash"] = hashlib.sha256(
+                f"{metadata['content_hash']}|seed|{renderer.last_stats.get('seed', job_id)}".encode("utf-8")
+            ).hexdigest()
+        if metadata.get("oom_recovery"):
+            metadata["render_stats"]["oom_retries"] = len(metadata["oom_recovery"])
+            # Rendered cheaper than requested - keep it out of the file_id cache
+            if metadata.get("content_hash"):
+                metadata["content_hash"] = hashlib.sha256(
+                    f"{metadata['content_hash']}|oom|{json.dumps(metadata['oom_recovery'][-1]['retry_with'], sort_keys=True)}".encode("utf-8")
+                ).hexdigest()
+        if quality_plan["level"]:
+            degradation = {key: quality_plan[key] for key in ("level", "reason", "steps", "fps", "resolution")}
+            degradation["original"] = quality_plan["original"]
+            metadata["degradation"] = degradation
+            metadata["render_stats"]["degradation_level"] = quality_plan["level"]
+            # Degraded output must not be served for full-quality requests from the file_id cache
+            if metadata.get("content_hash"):
+                metadata["content_hash"] = hashlib.sha256(
+                    f"{metadata['content_hash']}|{json.dumps(degradation, sort_keys=True)}".encode("utf-8")
+                ).hexdigest()
         
         redis_client.set(metadata_key, json.dumps(metadata), ex=86400)
         
@@ -237,8 +444,52 @@ def process_video_generation(job_id: str, job_timeout: int = 600,
             "status": "completed",
             "video_path": str(video_path),
             "duration": metadata["duration"],
-            "resolution": metadata["resolution"],
-            "motion_preset": motion_preset
+            "resolution": quality_plan["resolution"],
+            "motion_preset": motion_preset,
+            "degradation_level": quality_plan["level"]
+        }
+        
+    except GenerationPreempted as e:
+        print(f"[PREEMPTED] Job {job_id}: {e}")
+        
+        # Latents are checkpointed - put the job back at the head of the
+        # normal queue; it resumes from the saved step once short jobs ran
+        metadata["status"] = "queued"
+        metadata["message"] = "Paused to run shorter jobs, will resume"
+        metadata["preemptions"] = metadata.get("preemptions", 0) + 1
+        redis_client.set(metadata_key, json.dumps(metadata), ex=86400)
+        
+        rq_job = enqueue_generation(normal_queue, job_id, at_front=True)
+        redis_client.set(f"job:{job_id}:rq_id", rq_job.id, ex=86400)
+        
+        return {
+            "job_id": job_id,
+            "status": "preempted",
+            "completed_steps": e.completed_steps
+        }
+        
+    except GenerationCancelled as e:
+        print(f"[CANCELLED] Job {job_id}: {e}")
+        
+        # Record cancellation; the job is finished from RQ's point of view
+        try:
+            metadata_json = redis_client.get(f"job:{job_id}:metadata")
+            if metadata_json:
+                metadata = json.loads(metadata_json)
+                metadata["status"] = "cancelled"
+                metadata["message"] = str(e)
+                metadata["completed_at"] = datetime.utcnow().isoformat()
+                redis_client.set(f"job:{job_id}:metadata", json.dumps(metadata), ex=86400)
+                cancelled_storage = get_storage_manager(redis_client)
+                cancelled_storage.delete(metadata["image_path"])
+                if metadata.get("preview_path"):
+                    cancelled_storage.delete(metadata["preview_path"])
+        except Exception as update_error:
+            print(f"Failed to update cancelled status: {update_error}")
+        
+        return {
+            "job_id": job_id,
+            "status": "cancelled"
         }
         
     except Exception as e:
@@ -261,6 +512,14 @@ def process_video_generation(job_id: str, job_timeout: int = 600,
         except Exception as update_error:
             print(f"Failed to update error status: {update_error}")
         
+        # A failed job is never resumed - don't leave its latents behind
+        try:
+            removed = clear_checkpoints(settings.checkpoint_path, f"{job_id}_output.mp4")
+            if removed:
+                print(f"[CHECKPOINT] Removed {removed} checkpoint(s) of failed job {job_id}")
+        except Exception as cleanup_error:
+            print(f"Failed to remove checkpoints: {cleanup_error}")
+        
         raise e
 
 
@@ -268,24 +527,22 @@ def cleanup_old_files(days: int = 7):
     """
     Cleanup task to remove old files from storage.
     
+    Uses the artifact index, so only expired entries are visited instead of
+    scanning the storage directories. Run StorageManager.reindex() once to
+    pick up files written before the index existed.
+    
     Args:
-        days: Number of days to keep files
+        days: Number of days to keep files since their last access
     """
-    from datetime import timedelta
-    import time
+    redis_client = redis.Redis(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=settings.redis_db,
+        decode_responses=False
+    )
+    storage_manager = get_storage_manager(redis_client)
     
-    cutoff_time = time.time() - (days * 86400)
+    deleted = storage_manager.evict_older_than(days * 86400)
+    print(f"🗑️ Deleted {deleted} files not accessed for {days} days")
     
-    for storage_path in [settings.storage_hot_path, settings.storage_archive_path]:
-        if not storage_path.exists():
-            continue
-            
-        for file_path in storage_path.glob("*"):
-            if file_path.is_file():
-                if file_path.stat().st_mtime < cutoff_time:
-                    try:
-                        file_path.unlink()
-                        print(f"🗑️ Deleted old file: {file_path}")
-                    except Exception as e:
-                        print(f"Failed to delete {file_path}: {e}")
-
+    storage_manager.enforce_budget()
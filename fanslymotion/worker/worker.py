@@ -113,13 +113,14 @@ redis_conn = Redis(
     db=settings.redis_db
 )
 
-# Create queue
+# Create queues (listed in priority order - RQ drains the first one first)
+priority_queue = Queue(settings.worker_priority_queue_name, connection=redis_conn)
 queue = Queue(settings.worker_queue_name, connection=redis_conn)
 
 if __name__ == "__main__":
     print("Starting RQ Worker for video generation...")
     print(f"Connected to Redis: {settings.redis_host}:{settings.redis_port}")
-    print(f"Queue: {settings.worker_queue_name}")
+    print(f"Queues: {settings.worker_priority_queue_name}, {settings.worker_queue_name}")
     print(f"Timeout: {settings.worker_timeout}s")
     
     # Test import before starting worker
@@ -135,11 +136,41 @@ if __name__ == "__main__":
     # Detect platform and use appropriate Worker
     # SimpleWorker is required for Windows (no fork support)
     is_windows = os.name == 'nt'
+    # The compiled UNet (Dynamo graphs, not just the kernel cache) only survives
+    # between jobs in this process, so compiled mode also runs jobs in-process
+    in_process = is_windows or settings.compile_unet
     
-    if is_windows:
+    # Compile the UNet shape buckets before taking jobs
+    if settings.compile_unet and settings.compile_warmup:
+        print("Warming up compiled UNet shape buckets...")
+        try:
+            from worker.tasks import get_configured_renderer
+            from config import VideoConfig
+            get_configured_renderer().warmup_compiled(batch=2 if VideoConfig.GUIDANCE_SCALE > 1.0 else 1)
+        except Exception as e:
+            print(f"⚠️  Compile warm-up failed, buckets compile on first use: {e}")
+    
+    # Autotune attention for the same buckets (the compile warm-up above does it
+    # in-process). Jobs fork from this process, and CUDA cannot be used in a
+    # child forked after the parent initialized it, so tune in a spawned process;
+    # the decisions reach the jobs through the autotune cache file.
+    if settings.attention_autotune and not settings.compile_unet:
+        print("Autotuning attention backends for the render shape buckets...")
+        import multiprocessing
+        from worker.tasks import autotune_attention_from_settings
+        tuner = multiprocessing.get_context("spawn").Process(target=autotune_attention_from_settings)
+        tuner.start()
+        tuner.join()
+        if tuner.exitcode != 0:
+            print(f"⚠️  Attention autotuning failed (exit code {tuner.exitcode}), untuned shapes use the default backend")
+    
+    if in_process and not is_windows:
+        print("Running in compiled mode (SimpleWorker, jobs run in this process)")
+        worker = SimpleWorker([priority_queue, queue], connection=redis_conn)
+    elif is_windows:
         print("Running in Windows mode (SimpleWorker with NoOp death penalty)")
         # Create worker with NoOp death penalty
-        worker = SimpleWorker([queue], connection=redis_conn)
+        worker = SimpleWorker([priority_queue, queue], connection=redis_conn)
         # Force NoOp death penalty
         worker.death_penalty_class = NoOpDeathPenalty
         
@@ -149,7 +180,7 @@ if __name__ == "__main__":
         print("    Using application-level timeout: 600s")
     else:
         print("Running in Unix mode (Worker)")
-        worker = Worker([queue], connection=redis_conn)
+        worker = Worker([priority_queue, queue], connection=redis_conn)
     
     # Start processing jobs without scheduler
     print("Worker started, waiting for jobs...")